@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Compares the compression codecs of sssweep (see sssweep.Codec) on a message
+log: the compressed size and the compression and decompression throughput of
+the commands the Sweeper runs. The message log is given with --mpf (in any
+codec of sssweep) or a synthetic one resembling a supersim message log is
+generated. Codecs whose command line tool isn't installed are skipped.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from sssweep.Codec import Codec
+
+def synthetic_mpf(path, size):
+  # transactions of messages of packets of flits, as logged by supersim
+  rnd = random.Random(0)
+  written = 0
+  trans = 0
+  msg = 0
+  pkt = 0
+  tick = 0
+  with open(path, 'w') as fd_mpf:
+    while written < size:
+      lines = ['+T,{0},{1}'.format(trans, tick)]
+      end = tick
+      for _ in range(rnd.randint(1, 4)):
+        lines.append('+M,{0},{1},{2},{3},0,{4}'.format(
+          msg, rnd.randrange(4096), rnd.randrange(4096), trans,
+          rnd.randint(0, 3)))
+        for _ in range(rnd.randint(1, 8)):
+          lines.append('+P,{0},{1},{2}'.format(pkt, rnd.randint(1, 6),
+                                               rnd.randint(1, 6)))
+          send = tick + rnd.randint(0, 50)
+          receive = send + rnd.randint(20, 2000)
+          for flit in range(rnd.randint(1, 16)):
+            lines.append('F,{0},{1},{2}'.format(flit, send + flit,
+                                                receive + flit))
+          end = max(end, receive + flit)
+          lines.append('-P')
+          pkt += 1
+        lines.append('-M')
+        msg += 1
+      lines.append('-T,{0},{1}'.format(trans, end))
+      text = '\n'.join(lines) + '\n'
+      fd_mpf.write(text)
+      written += len(text)
+      trans += 1
+      tick += rnd.randint(1, 100)
+
+def run(cmd):
+  start = time.perf_counter()
+  subprocess.check_call(cmd, shell=True)
+  return time.perf_counter() - start
+
+def main(args):
+  tmp = tempfile.mkdtemp()
+  try:
+    raw = os.path.join(tmp, 'messages.mpf')
+    if args.mpf is None:
+      synthetic_mpf(raw, args.size * 2**20)
+    else:
+      codec = [Codec(x_name) for x_name in Codec.CODECS
+               if x_name != 'none' and
+               args.mpf.endswith(Codec.CODECS[x_name][0])]
+      codec = codec[0] if codec else Codec('none')
+      subprocess.check_call('{0} > {1}'.format(
+        codec.decompress_cmd(args.mpf), raw), shell=True)
+    raw_size = os.path.getsize(raw)
+    # warm the page cache
+    run('cat {0} > /dev/null'.format(raw))
+
+    print('message log: {0:.1f} MiB'.format(raw_size / 2**20))
+    print('{0:>6} {1:>10} {2:>8} {3:>12} {4:>12}'.format(
+      'codec', 'MiB', 'ratio', 'comp MiB/s', 'decomp MiB/s'))
+    for name in sorted(Codec.CODECS):
+      codec = Codec(name)
+      tool = codec.decompress_cmd('').split()[0]
+      if shutil.which(tool) is None:
+        print('{0:>6} skipped, {1} not found'.format(name, tool))
+        continue
+      packed = os.path.join(tmp, 'messages' + codec.mpf_ext + '.bench')
+      comp = min([run(codec.compress_cmd(raw, packed))
+                  for _ in range(args.runs)])
+      decomp = min([run('{0} > /dev/null'.format(codec.decompress_cmd(packed)))
+                    for _ in range(args.runs)])
+      size = os.path.getsize(packed)
+      os.remove(packed)
+      print('{0:>6} {1:>10.1f} {2:>8.2f} {3:>12.1f} {4:>12.1f}'.format(
+        name, size / 2**20, raw_size / size, raw_size / 2**20 / comp,
+        raw_size / 2**20 / decomp))
+  finally:
+    shutil.rmtree(tmp)
+  return 0
+
+if __name__ == '__main__':
+  ap = argparse.ArgumentParser()
+  ap.add_argument('-m', '--mpf', default=None,
+                  help='message log to compress (default: synthetic)')
+  ap.add_argument('-s', '--size', type=int, default=256,
+                  help='size of the synthetic message log (MiB)')
+  ap.add_argument('-n', '--runs', type=int, default=3,
+                  help='runs of each command, the fastest is reported')
+  args = ap.parse_args()
+  exit(main(args))
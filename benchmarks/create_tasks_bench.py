@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Measures how Sweeper.create_tasks() scales with the total number of configs.
+The time per config should stay roughly constant as the sweep grows.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import sssweep
+import taskrun
+
+def make_sweeper(tmp, num_values, num_loads):
+  # fake binaries and settings, nothing is executed
+  paths = []
+  for name in ['supersim', 'settings.json', 'sslatency']:
+    path = os.path.join(tmp, name)
+    open(path, 'w').close()
+    paths.append(path)
+  out_dir = os.path.join(tmp, 'out')
+  if os.path.isdir(out_dir):
+    shutil.rmtree(out_dir)
+
+  s = sssweep.Sweeper(paths[0], paths[1], paths[2], out_dir,
+                      parse_scalar=0.001, plot_units='ns', web_viewer=False)
+  def set_cmd(v, config):
+    return 'some.setting=string={0}'.format(v)
+  s.add_variable('TrafficPattern', 'TP', ['UR', 'BC', 'TP'], set_cmd)
+  s.add_variable('RoutingAlgorithm', 'RA', ['OB', 'AD'], set_cmd)
+  s.add_variable('Topology', 'TO', ['T{0}'.format(x) for x in range(num_values)],
+                 set_cmd)
+  s.add_variable('Buffers', 'BF', ['8', '16'], set_cmd, compare=False)
+  s.add_loads('Load', 'l', 0, num_loads - 1, 1, set_cmd)
+  return s
+
+def main(args):
+  tmp = tempfile.mkdtemp()
+  try:
+    print('{0:>10} {1:>10} {2:>10} {3:>12}'.format(
+      'configs', 'tasks', 'seconds', 'us/config'))
+    num_values = args.start
+    while num_values <= args.stop:
+      s = make_sweeper(tmp, num_values, args.loads)
+      tm = taskrun.TaskManager()
+      start = time.perf_counter()
+      s.create_tasks(tm)
+      elapsed = time.perf_counter() - start
+      configs = 3 * 2 * num_values * 2 * args.loads
+      tasks = len(tm._waiting_tasks)
+      print('{0:>10} {1:>10} {2:>10.3f} {3:>12.1f}'.format(
+        configs, tasks, elapsed, elapsed / configs * 1e6))
+      num_values *= 2
+  finally:
+    shutil.rmtree(tmp)
+
+if __name__ == '__main__':
+  ap = argparse.ArgumentParser()
+  ap.add_argument('-s', '--start', type=int, default=1,
+                  help='starting number of values of the scaled variable')
+  ap.add_argument('-e', '--stop', type=int, default=32,
+                  help='largest number of values of the scaled variable')
+  ap.add_argument('-l', '--loads', type=int, default=40,
+                  help='number of load points')
+  args = ap.parse_args()
+  exit(main(args))
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Measures the time of 'import sssweep' in fresh interpreters and checks that the
+heavy dependencies (ssplot, matplotlib, numpy, taskrun) aren't loaded by it.
+Exits with an error if they are or if the import is slower than --max-ms.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY = ['ssplot', 'matplotlib', 'numpy', 'taskrun']
+
+CHILD = """
+import json, sys, time, types
+start = time.perf_counter()
+import sssweep
+elapsed = time.perf_counter() - start
+# lazily imported modules aren't loaded until used
+loaded = [x for x in {0} if x in sys.modules and
+          type(sys.modules[x]) is types.ModuleType]
+print(json.dumps({{'seconds': elapsed, 'loaded': loaded}}))
+""".format(HEAVY)
+
+def main(args):
+  # import the sssweep of this tree
+  root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+  times = []
+  loaded = set()
+  for _ in range(args.runs):
+    out = subprocess.check_output([sys.executable, '-c', CHILD], cwd=root)
+    res = json.loads(out.decode('utf-8').splitlines()[-1])
+    times.append(res['seconds'] * 1e3)
+    loaded.update(res['loaded'])
+
+  print('{0:>10} {1:>10} {2:>10} {3:>10}'.format(
+    'runs', 'min ms', 'median ms', 'max ms'))
+  print('{0:>10} {1:>10.1f} {2:>10.1f} {3:>10.1f}'.format(
+    args.runs, min(times), statistics.median(times), max(times)))
+
+  ok = True
+  if loaded:
+    print('loaded at import: {0}'.format(', '.join(sorted(loaded))))
+    ok = False
+  if args.max_ms is not None and statistics.median(times) > args.max_ms:
+    print('median import time exceeds {0} ms'.format(args.max_ms))
+    ok = False
+  return 0 if ok else -1
+
+if __name__ == '__main__':
+  ap = argparse.ArgumentParser()
+  ap.add_argument('-n', '--runs', type=int, default=20,
+                  help='number of interpreters to import in')
+  ap.add_argument('-m', '--max_ms', type=float, default=None,
+                  help='fail if the median import time exceeds this')
+  args = ap.parse_args()
+  exit(main(args))
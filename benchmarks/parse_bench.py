@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Measures the throughput of the in-process LatencyParser (see sssweep) on a
+message log, given with --mpf or the synthetic one of codec_bench.py. With
+--sslatency the sslatency binary parses it too, and the aggregate statistics
+and latency samples of both are compared.
+"""
+
+import argparse
+import gzip
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import handycsv
+from codec_bench import synthetic_mpf
+from sssweep.LatencyParser import LatencyParser
+
+def read_samples(latency_csv):
+  with gzip.open(latency_csv, 'rt') as fd_lat:
+    return [tuple([float(y_val) for y_val in x_line.split(',')])
+            for x_line in fd_lat if ',' in x_line]
+
+def main(args):
+  tmp = tempfile.mkdtemp()
+  try:
+    mpf = args.mpf
+    if mpf is None:
+      mpf = os.path.join(tmp, 'messages.mpf')
+      synthetic_mpf(mpf, args.size * 2**20)
+    size = os.path.getsize(mpf)
+    parser = LatencyParser(args.mode, args.scalar)
+    outs = {}
+    print('{0:>10} {1:>10} {2:>10}'.format('engine', 'seconds', 'MiB/s'))
+    engines = ['numpy'] + (['sslatency'] if args.sslatency else [])
+    for engine in engines:
+      lat = os.path.join(tmp, 'latency_{0}.csv.gz'.format(engine))
+      agg = os.path.join(tmp, 'aggregate_{0}.csv.gz'.format(engine))
+      start = time.perf_counter()
+      if engine == 'numpy':
+        parser.parse(mpf, lat, agg)
+      else:
+        cmd = [args.sslatency, '-' + args.mode[:1].lower(), lat, '-a', agg, mpf]
+        if args.scalar is not None:
+          cmd += ['-s', str(args.scalar)]
+        subprocess.check_call(cmd)
+      elapsed = time.perf_counter() - start
+      outs[engine] = (lat, agg)
+      print('{0:>10} {1:>10.2f} {2:>10.1f}'.format(
+        engine, elapsed, size / 2**20 / elapsed))
+
+    if args.sslatency:
+      ok = True
+      grids = [handycsv.GridStats.read(outs[x_eng][1]) for x_eng in engines]
+      for row in LatencyParser.ROWS:
+        for field, _ in LatencyParser.FIELDS:
+          values = [float(x_grid.get(row, field, float('nan')))
+                    for x_grid in grids]
+          if values[0] != values[1] and not all(map(math.isnan, values)):
+            print('{0} {1}: numpy {2} sslatency {3}'.format(
+              row, field, values[0], values[1]))
+            ok = False
+      if read_samples(outs['numpy'][0]) != read_samples(outs['sslatency'][0]):
+        print('latency samples differ')
+        ok = False
+      print('outputs match' if ok else 'outputs differ')
+      return 0 if ok else -1
+  finally:
+    shutil.rmtree(tmp)
+  return 0
+
+if __name__ == '__main__':
+  ap = argparse.ArgumentParser()
+  ap.add_argument('-m', '--mpf', default=None,
+                  help='message log to parse (default: synthetic)')
+  ap.add_argument('-s', '--size', type=int, default=256,
+                  help='size of the synthetic message log (MiB)')
+  ap.add_argument('-l', '--mode', default='Packet',
+                  help='latency mode (Packet, Message or Transaction)')
+  ap.add_argument('-c', '--scalar', type=float, default=None,
+                  help='latency scalar')
+  ap.add_argument('-b', '--sslatency', default=None,
+                  help='sslatency binary to compare with')
+  args = ap.parse_args()
+  exit(main(args))
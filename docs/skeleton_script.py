@@ -23,7 +23,8 @@ def main(args):
                            observers=[vob, cob],
                            failure_mode=taskrun.FailureMode.ACTIVE_CONTINUE)
 
-  # define resource usage
+  # define resource usage, with a resource model the memory of sims is
+  #  predicted from the usage of similar sims that already ran
   def get_resources(task_type, config):
     if task_type is 'sim':
       return {'cpus': 1, 'mem': args.simmem}
@@ -51,7 +52,8 @@ def main(args):
                       latency_mode='Message',
                       sim=True, parse=True,
                       qplot=True, lplot=True, cplot=True,
-                      web_viewer=True, get_resources=get_resources)
+                      web_viewer=True, get_resources=get_resources,
+                      resource_model=args.resource_model)
 
   # ========================================================================== #
   # sweep variables & set commands
@@ -90,6 +92,9 @@ def main(args):
   # run the tasks
   tm.run_tasks()
 
+  # report the resource usage of the sims
+  s.report()
+
 # =========================================================================== #
 # input arguments
 # =========================================================================== #
@@ -118,6 +123,8 @@ if __name__ == '__main__':
                   help='maximum amount of memory to use during run')
   ap.add_argument('-s', '--simmem', type=float, default=10.0,
                   help='amount of memory for SuperSim simulation tasks')
+  ap.add_argument('-r', '--resource_model', type=str, default=None,
+                  help='file of the model learning SuperSim memory usage')
   ap.add_argument('-v', '--verbose', action='store_true',
                   help='show all commands')
   ap.add_argument('-l', '--log', type=str, default=None,
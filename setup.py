@@ -60,5 +60,7 @@ setup(
     url='http://github.com/nicmcd/sssweep',
     packages=['sssweep'],
     install_requires=['taskrun >= 3.0.0',
-                      'ssplot >= 0.1.0'],
+                      'ssplot >= 0.1.0',
+                      'handycsv >= 1.0.0',
+                      'numpy'],
     )
@@ -0,0 +1,87 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+class Codec(object):
+  """
+  This is the compression codec of the data files of a sweep. supersim,
+  sslatency and the plots compress gzip files themselves (by their extension)
+  and also read and write uncompressed files. The other codecs only compress
+  the message logs, with their command line tool: supersim writes the message
+  log into a named pipe read by the compressor and sslatency parses it from a
+  named pipe fed by the decompressor. The other data files of these codecs are
+  uncompressed.
+  """
+
+  # codec: (message log extension, compressor, decompressor, integrity test)
+  CODECS = {
+    'gzip': ('.mpf.gz', 'gzip -c', 'gzip -dc', 'gzip -t'),
+    'none': ('.mpf', 'cat', 'cat', 'test -f'),
+    'zstd': ('.mpf.zst', 'zstd -q -c', 'zstd -q -dc', 'zstd -q -t'),
+    'lz4': ('.mpf.lz4', 'lz4 -q -c', 'lz4 -q -dc', 'lz4 -q -t')
+  }
+
+  # read and written by supersim, sslatency and the plots
+  NATIVE = ['gzip', 'none']
+
+  def __init__(self, name):
+    """
+    Constructs a Codec object
+
+    Args:
+      name          : 'gzip', 'none', 'zstd' or 'lz4'
+    """
+    assert name in Codec.CODECS, "Invalid codec {0}!".format(name)
+    self.name = name
+    (self.mpf_ext, self._compressor, self._decompressor,
+     self._tester) = Codec.CODECS[name]
+    self.native = name in Codec.NATIVE
+    self.csv_ext = '.csv.gz' if name == 'gzip' else '.csv'
+
+  def compress_cmd(self, src, dst):
+    """
+    This returns the shell command compressing a file (or pipe) into a file
+    """
+    return '{0} < {1} > {2}'.format(self._compressor, src, dst)
+
+  def decompress_cmd(self, src):
+    """
+    This returns the shell command decompressing a file to its stdout
+    """
+    return '{0} {1}'.format(self._decompressor, src)
+
+  def test_cmd(self, src):
+    """
+    This returns the shell command checking the integrity of a file
+    """
+    return '{0} {1}'.format(self._tester, src)
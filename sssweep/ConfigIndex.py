@@ -0,0 +1,211 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+
+class ConfigIndex(object):
+  """
+  This is an integer coded index of the Cartesian product of the sweep
+  variables. Every full config is a single integer (code) in mixed radix where
+  the last variable varies the fastest, which is the same order the configs
+  have always been generated in. Partial configs are codes where the missing
+  variables are at index 0.
+  """
+
+  def __init__(self, variables, precompute=True):
+    """
+    Constructs a ConfigIndex object
+
+    Args:
+      variables   : list of sweep variables (as stored by the Sweeper)
+      precompute  : precompute the ids of all full configs, otherwise they are
+                    built on demand (for sampled sweeps of huge products)
+    """
+    self._variables = variables
+    self._dims = {}
+    self._widths = []
+    self._strides = [0] * len(variables)
+    self._strs = []
+    self._lookup = []
+    for dim, var in enumerate(variables):
+      self._dims[var['name']] = dim
+      self._widths.append(len(var['values']))
+      self._strs.append([str(x_values) for x_values in var['values']])
+      self._lookup.append({y: idx for idx, y in enumerate(self._strs[-1])})
+
+    # last variable varies the fastest
+    stride = 1
+    for dim in reversed(range(len(variables))):
+      self._strides[dim] = stride
+      stride *= self._widths[dim]
+    self._size = stride
+
+    # precompute the ids of all full configs in one pass
+    self._ids = None
+    if not precompute:
+      return
+    self._ids = ['']
+    for dim in range(len(variables)):
+      sep = '_' if dim > 0 else ''
+      self._ids = [x_id + sep + y_str for x_id in self._ids
+                   for y_str in self._strs[dim]]
+
+  @property
+  def widths(self):
+    """
+    Returns:
+      the number of values of each dimension
+    """
+    return list(self._widths)
+
+  @property
+  def size(self):
+    """
+    Returns:
+      the number of full configs
+    """
+    return self._size
+
+  def dims(self, names=None, dont=None):
+    """
+    This returns the ordered dimensions for the given variable names
+
+    Args:
+      names   : variable names to include (None for all)
+      dont    : variable names to exclude
+    """
+    if isinstance(names, str):
+      names = [names]
+    if isinstance(dont, str):
+      dont = [dont]
+    dims = []
+    for dim, var in enumerate(self._variables):
+      if ((names is None or var['name'] in names) and
+          (dont is None or var['name'] not in dont)):
+        dims.append(dim)
+    return dims
+
+  def stride(self, dim):
+    """
+    This returns the code distance between consecutive values of a dimension
+
+    Args:
+      dim     : dimension
+    """
+    return self._strides[dim]
+
+  def value_index(self, code, dim):
+    """
+    This returns the value index of a dimension within a code
+
+    Args:
+      code    : config code
+      dim     : dimension
+    """
+    return (code // self._strides[dim]) % self._widths[dim]
+
+  def offsets(self, dims):
+    """
+    This returns the code offsets of all combinations of the given dimensions,
+    in config generation order. Adding these offsets to a code with the given
+    dimensions at index 0 yields all the full configs.
+
+    Args:
+      dims    : dimensions to iterate through
+    """
+    offsets = [0]
+    for dim in sorted(dims):
+      stride = self._strides[dim]
+      offsets = [x_off + y_idx * stride for x_off in offsets
+                 for y_idx in range(self._widths[dim])]
+    return offsets
+
+  def bases(self, dont_dims):
+    """
+    This returns the codes of all configs that iterate through every dimension
+    except the given ones, which are held at index 0.
+
+    Args:
+      dont_dims : dimensions to hold fixed
+    """
+    return self.offsets([dim for dim in range(len(self._variables))
+                         if dim not in dont_dims])
+
+  def code(self, config):
+    """
+    This returns the code of a (partial) config
+
+    Args:
+      config  : config to look up
+    """
+    code = 0
+    for var in config:
+      dim = self._dims[var['name']]
+      code += self._lookup[dim][str(var['value'])] * self._strides[dim]
+    return code
+
+  def config(self, code, dims=None):
+    """
+    This creates the config for a code
+
+    Args:
+      code    : config code
+      dims    : dimensions to include (None for all)
+    """
+    if dims is None:
+      dims = range(len(self._variables))
+    config = []
+    for dim in dims:
+      variable = self._variables[dim]
+      config.append({
+        'name': variable['name'],
+        'short_name': variable['short_name'],
+        'value': variable['values'][self.value_index(code, dim)],
+        'command': variable['command'],
+        'compare': variable['compare']
+      })
+    return config
+
+  def task_id(self, code, dims=None):
+    """
+    This returns the id of a code
+
+    Args:
+      code    : config code
+      dims    : dimensions to include (None for all)
+    """
+    if dims is None:
+      if self._ids is not None:
+        return self._ids[code]
+      dims = range(len(self._variables))
+    return '_'.join([self._strs[dim][self.value_index(code, dim)]
+                     for dim in dims])
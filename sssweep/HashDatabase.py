@@ -0,0 +1,328 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+import concurrent.futures
+import hashlib
+import json
+import os
+import threading
+import taskrun
+
+class HashDatabase(object):
+  """
+  This is a database of the content hashes of the files of a sweep and of the
+  signature of every task that finished: the hash of its command and of the
+  content of its inputs. A task whose inputs and command have the same content
+  as when it last finished is up to date regardless of modification times (see
+  HashCondition). Files are only hashed again when their size or modification
+  time changed, and they are hashed in parallel threads: the inputs of all tasks
+  when the run starts, before any task is checked, and the outputs of every task
+  once it completes. Conditions never wait for a hash, so the scheduler doesn't
+  either. The database is saved when the run completes, as a taskrun observer
+  of the task manager.
+  """
+
+  BLOCK = 1 << 20
+
+  def __init__(self, filename, workers=None):
+    """
+    Constructs a HashDatabase object, loading the existing database
+
+    Args:
+      filename    : location of the database file
+      workers     : number of threads hashing files (default: cpu count)
+    """
+    self._filename = filename
+    self._files = {}
+    self._tasks = {}
+    if os.path.isfile(filename):
+      with open(filename, 'r') as fd_db:
+        database = json.load(fd_db)
+      self._files = database['files']
+      self._tasks = database['tasks']
+    self._watched = set()
+    self._outputs = {}
+    self._pending = {}
+    self._hashing = {}
+    self._lock = threading.Lock()
+    self._pool = concurrent.futures.ThreadPoolExecutor(
+      workers if workers is not None else os.cpu_count())
+
+  def watch(self, filenames):
+    """
+    This adds files to hash when the run starts
+
+    Args:
+      filenames   : list of files
+    """
+    self._watched.update(filenames)
+
+  def produces(self, name, filenames):
+    """
+    This adds the output files of a task, the ones that are inputs of other
+    tasks are hashed once it completes
+
+    Args:
+      name        : task name
+      filenames   : list of files
+    """
+    self._outputs[name] = filenames
+
+  def _hash(self, filename, stamp):
+    hasher = hashlib.sha1()
+    with open(filename, 'rb') as fd_in:
+      for block in iter(lambda: fd_in.read(HashDatabase.BLOCK), b''):
+        hasher.update(block)
+    digest = hasher.hexdigest()
+    with self._lock:
+      self._files[filename] = stamp + [digest]
+    return digest
+
+  def _submit(self, filename):
+    # returns the digest, or a future of it, None if the file doesn't exist
+    try:
+      stat = os.stat(filename)
+    except OSError:
+      return None
+    stamp = [stat.st_size, stat.st_mtime_ns]
+    with self._lock:
+      entry = self._files.get(filename)
+      if entry is not None and entry[:2] == stamp:
+        return entry[2]
+      hashing = self._hashing.get(filename)
+      if hashing is None or hashing[0] != stamp:
+        hashing = (stamp, self._pool.submit(self._hash, filename, stamp))
+        self._hashing[filename] = hashing
+    return hashing[1]
+
+  def digests(self, filenames, wait=True):
+    """
+    This returns the content hash of files, hashed in parallel. Files that don't
+    exist are None.
+
+    Args:
+      filenames   : list of files
+      wait        : wait for the files being hashed, otherwise returns None if
+                    a file changed since it was hashed (it is hashed meanwhile)
+    """
+    self._watched.update(filenames)
+    digests = [self._submit(x_file) for x_file in filenames]
+    if not wait and any([isinstance(x_digest, concurrent.futures.Future) and
+                         not x_digest.done() for x_digest in digests]):
+      return None
+    return [x_digest.result()
+            if isinstance(x_digest, concurrent.futures.Future) else x_digest
+            for x_digest in digests]
+
+  def signature(self, command, inputs, wait=True):
+    """
+    This returns the signature of a task from its command and the content of its
+    inputs
+
+    Args:
+      command     : command of the task (str, list or None)
+      inputs      : input files of the task
+      wait        : wait for the inputs being hashed, otherwise returns None if
+                    an input changed since it was hashed
+    """
+    digests = self.digests(inputs, wait)
+    if digests is None:
+      return None
+    hasher = hashlib.sha1()
+    if isinstance(command, (list, tuple)):
+      command = '\n'.join(command)
+    hasher.update(str(command).encode('utf-8'))
+    for filename, digest in zip(inputs, digests):
+      hasher.update('\0{0}\0{1}'.format(filename, digest).encode('utf-8'))
+    return hasher.hexdigest()
+
+  def is_current(self, name, signature):
+    """
+    This checks a task against its signature when it last finished and holds
+    the signature to record when the task finishes. Returns None if the task
+    never finished.
+
+    Args:
+      name        : task name
+      signature   : current signature of the task
+    """
+    with self._lock:
+      self._pending[name] = signature
+      if name not in self._tasks:
+        return None
+      return self._tasks[name] == signature
+
+  def defer(self, name, command, inputs):
+    """
+    This holds the command and inputs of a task whose inputs are still being
+    hashed, its signature is recorded when the database is saved
+
+    Args:
+      name        : task name
+      command     : command of the task
+      inputs      : input files of the task
+    """
+    with self._lock:
+      self._pending[name] = (command, inputs)
+
+  def save(self):
+    """
+    This writes the database of the watched files, replacing the previous one
+    atomically
+    """
+    # signatures of the tasks that finished before their inputs were hashed
+    with self._lock:
+      deferred = {x_name: y_sig for x_name, y_sig in self._tasks.items()
+                  if isinstance(y_sig, tuple)}
+    for name, (command, inputs) in deferred.items():
+      signature = self.signature(command, inputs)
+      with self._lock:
+        self._tasks[name] = signature
+    with self._lock:
+      database = {
+        'files': {x_file: y_entry for x_file, y_entry in self._files.items()
+                  if x_file in self._watched},
+        'tasks': self._tasks
+      }
+      tmp_file = self._filename + '.tmp'
+      with open(tmp_file, 'w') as fd_db:
+        json.dump(database, fd_db, separators=(',', ':'), sort_keys=True)
+      os.replace(tmp_file, self._filename)
+
+  def _finished(self, task, done, completed=False):
+    with self._lock:
+      signature = self._pending.pop(task.name, None)
+      if done and signature is not None:
+        self._tasks[task.name] = signature
+      elif not done:
+        self._tasks.pop(task.name, None)
+    # the new outputs are hashed in the background
+    if completed:
+      for filename in self._outputs.get(task.name, []):
+        if filename in self._watched:
+          self._submit(filename)
+
+  def task_added(self, task):
+    """
+    See taskrun.Observer.task_added()
+    """
+
+  def task_started(self, task):
+    """
+    See taskrun.Observer.task_started()
+    """
+
+  def task_bypassed(self, task):
+    """
+    See taskrun.Observer.task_bypassed()
+    """
+    self._finished(task, True)
+
+  def task_completed(self, task):
+    """
+    See taskrun.Observer.task_completed()
+    """
+    self._finished(task, True, True)
+
+  def task_failed(self, task, errors):
+    """
+    See taskrun.Observer.task_failed()
+    """
+    self._finished(task, False)
+
+  def task_killed(self, task):
+    """
+    See taskrun.Observer.task_killed()
+    """
+    self._finished(task, False)
+
+  def run_starting(self):
+    """
+    See taskrun.Observer.run_starting()
+    """
+    # the existing inputs are hashed before the tasks are checked
+    self.digests(sorted(self._watched))
+
+  def run_complete(self):
+    """
+    See taskrun.Observer.run_complete()
+    """
+    self.save()
+
+
+class HashCondition(taskrun.Condition):
+  """
+  This condition runs a task when one of its outputs doesn't exist or when the
+  content of its inputs or its command changed since it last finished (see
+  HashDatabase). Tasks that never finished with the database use the fallback
+  condition, so a sweep switching to content hashes doesn't run again. So does
+  a task whose inputs changed during the run and aren't hashed yet, rather than
+  waiting for them.
+  """
+
+  def __init__(self, database, task, inputs, outputs, fallback):
+    """
+    Constructs a HashCondition object
+
+    Args:
+      database    : HashDatabase
+      task        : task of the condition, its command is read when checking
+      inputs      : input files of the task
+      outputs     : output files of the task
+      fallback    : condition of the tasks that never finished
+    """
+    super().__init__()
+    self._database = database
+    self._task = task
+    self.inputs = inputs
+    self.outputs = outputs
+    self._fallback = fallback
+    database.watch(inputs)
+    database.produces(task.name, outputs)
+
+  def check(self):
+    """
+    See taskrun.Condition.check()
+    """
+    command = getattr(self._task, 'command', None)
+    signature = self._database.signature(command, self.inputs, wait=False)
+    if signature is None:
+      self._database.defer(self._task.name, command, self.inputs)
+      current = None
+    else:
+      current = self._database.is_current(self._task.name, signature)
+    if not all([os.path.isfile(x_file) for x_file in self.outputs]):
+      return True
+    if current is None:
+      return self._fallback.check()
+    return not current
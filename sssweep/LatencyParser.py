@@ -0,0 +1,264 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+import gzip
+import subprocess
+from .lazy_import import lazy_import
+
+# loaded on first use
+handycsv = lazy_import('handycsv')
+numpy = lazy_import('numpy')
+
+class LatencyParser(object):
+  """
+  This parses supersim message logs in process, as an alternative to running
+  the sslatency binary. The message log is decompressed in large chunks of
+  complete messages, each chunk is decoded into NumPy arrays and the latencies
+  of its packets and messages are computed with vectorized operations. It
+  writes the files of sslatency: the latency file with the start and end time
+  of each packet, message or transaction of the latency mode, and the aggregate
+  file with the latency distribution of each.
+
+  The message log has a line per record: '+T,<id>,<start>' and '-T,<id>,<end>'
+  for transactions, '+M,<id>,...' and '-M' around the packets of a message,
+  '+P,<id>,...' and '-P' around the flits of a packet and 'F,<id>,<send>,
+  <receive>' for each flit. A packet is from the send of its first flit to the
+  receive of its last flit and a message from its first flit sent to its last
+  flit received.
+  """
+
+  CHUNK = 64 << 20
+
+  ROWS = ['Packet', 'Message', 'Transaction']
+
+  # field: percentile (None for the mean)
+  FIELDS = [('Minimum', 0.0), ('Mean', None), ('Median', 0.5),
+            ('90th%', 0.9), ('99th%', 0.99), ('99.9th%', 0.999),
+            ('99.99th%', 0.9999), ('99.999th%', 0.99999), ('Maximum', 1.0)]
+
+  # statistics and scaled times are written in fixed point, as sslatency does
+  FORMAT = '{0:.6f}'
+
+  def __init__(self, latency_mode='Packet', scalar=None):
+    """
+    Constructs a LatencyParser object
+
+    Args:
+      latency_mode  : latencies of the latency file ('Packet', 'Message' or
+                      'Transaction')
+      scalar        : factor applied to all times (None for none)
+    """
+    assert latency_mode.title() in LatencyParser.ROWS, \
+      "Invalid latency mode {0}!".format(latency_mode)
+    self._latency_mode = latency_mode.title()
+    self._scalar = scalar
+
+  def parse(self, messages, latency_csv, aggregate_csv, decompress_cmd=None):
+    """
+    This parses a message log and returns the aggregate statistics as a
+    handycsv.GridStats
+
+    Args:
+      messages       : message log (gzip or uncompressed)
+      latency_csv    : latency file
+      aggregate_csv  : aggregate file
+      decompress_cmd : shell command decompressing the message log to its
+                       stdout, for the other codecs
+    """
+    spans = {x_row: [] for x_row in LatencyParser.ROWS}
+    starts = []
+    ends = []
+    proc = None
+    if decompress_cmd is not None:
+      proc = subprocess.Popen(decompress_cmd, shell=True,
+                              stdout=subprocess.PIPE)
+      fd_mpf = proc.stdout
+    elif messages.endswith('.gz'):
+      fd_mpf = gzip.open(messages, 'rb')
+    else:
+      fd_mpf = open(messages, 'rb')
+    with fd_mpf:
+      for chunk in self._chunks(fd_mpf):
+        packets, msgs, trans_starts, trans_ends = self._decode(chunk)
+        spans['Packet'].append(packets)
+        spans['Message'].append(msgs)
+        starts.append(trans_starts)
+        ends.append(trans_ends)
+    if proc is not None:
+      assert proc.wait() == 0, "{0} failed".format(decompress_cmd)
+
+    empty = [numpy.empty((0, 2), dtype=numpy.int64)]
+    for row in ['Packet', 'Message']:
+      spans[row] = numpy.concatenate(spans[row] + empty)
+    spans['Transaction'] = self._transactions(numpy.concatenate(starts + empty),
+                                              numpy.concatenate(ends + empty))
+
+    self._write_latency(spans[self._latency_mode], latency_csv)
+    aggregate = self._aggregate(spans)
+    with self._open(aggregate_csv) as fd_agg:
+      fd_agg.write(aggregate)
+    return handycsv.GridStats.load(aggregate)
+
+  @staticmethod
+  def _open(filename):
+    opener = gzip.open if filename.endswith('.gz') else open
+    return opener(filename, 'wt')
+
+  def _chunks(self, fd_mpf):
+    """
+    This yields the message log in chunks of whole messages
+    """
+    carry = b''
+    while True:
+      data = fd_mpf.read(LatencyParser.CHUNK)
+      if not data:
+        if carry.strip():
+          yield carry if carry.endswith(b'\n') else carry + b'\n'
+        return
+      data = carry + data
+      # messages are logged in one piece, cut after the last one
+      cut = data.rfind(b'\n-M\n')
+      if cut < 0:
+        carry = data
+        continue
+      carry = data[cut + 4:]
+      yield data[:cut + 4]
+
+  def _decode(self, chunk):
+    """
+    This returns the (start, end) arrays of the packets and messages, and the
+    (id, time) arrays of the transaction starts and ends in a chunk of lines
+    """
+    data = numpy.frombuffer(chunk, dtype=numpy.uint8)
+    ends = numpy.flatnonzero(data == ord('\n'))
+    starts = numpy.concatenate([[0], ends[:-1] + 1])
+    first = data[starts]
+    second = data[numpy.minimum(starts + 1, len(data) - 1)]
+    is_flit = first == ord('F')
+    opens = first == ord('+')
+    is_packet = opens & (second == ord('P'))
+    is_message = opens & (second == ord('M'))
+    is_start = opens & (second == ord('T'))
+    is_end = (first == ord('-')) & (second == ord('T'))
+
+    # flit times, grouped by packet and by message
+    flits = self._fields(data, starts, ends, is_flit, 2, 3)
+    packet_of = numpy.cumsum(is_packet)[is_flit]
+    message_of = numpy.cumsum(is_message)[is_flit]
+    packets = self._spans(flits[:, 1], flits[:, 2], packet_of)
+    msgs = self._spans(flits[:, 1], flits[:, 2], message_of)
+    trans_starts = self._fields(data, starts, ends, is_start, 3, 2)
+    trans_ends = self._fields(data, starts, ends, is_end, 3, 2)
+    return packets, msgs, trans_starts, trans_ends
+
+  @staticmethod
+  def _fields(data, starts, ends, lines, prefix, num):
+    """
+    This decodes the first num integer fields of lines after their prefix
+    (number of characters). The bytes of the lines are selected without
+    splitting them and their newlines become separators.
+    """
+    count = numpy.count_nonzero(lines)
+    if count == 0:
+      return numpy.empty((0, num), dtype=numpy.int64)
+    select = numpy.repeat(lines, ends - starts + 1)
+    skip = starts[lines][:, None] + numpy.arange(prefix)
+    select[skip.ravel()] = False
+    text = data[select]
+    text[text == ord('\n')] = ord(',')
+    values = numpy.fromstring(text[:-1].tobytes(), dtype=numpy.int64, sep=',')
+    return values.reshape(count, -1)[:, :num]
+
+  @staticmethod
+  def _spans(send, receive, group):
+    """
+    This returns the first send and last receive time of each group of flits,
+    flits of a group are contiguous
+    """
+    if len(group) == 0:
+      return numpy.empty((0, 2), dtype=numpy.int64)
+    firsts = numpy.flatnonzero(numpy.diff(group, prepend=group[0] - 1))
+    return numpy.stack([numpy.minimum.reduceat(send, firsts),
+                        numpy.maximum.reduceat(receive, firsts)], axis=1)
+
+  @staticmethod
+  def _transactions(starts, ends):
+    """
+    This matches the starts and ends of transactions by id, in end order
+    """
+    _, start_idx, end_idx = numpy.intersect1d(
+      starts[:, 0], ends[:, 0], assume_unique=True, return_indices=True)
+    order = numpy.argsort(end_idx, kind='stable')
+    return numpy.stack([starts[start_idx[order], 1],
+                        ends[end_idx[order], 1]], axis=1)
+
+  def _write_latency(self, spans, latency_csv):
+    """
+    This writes the start and end time of each latency sample
+    """
+    # scaled times are written in fixed point, the others as integers
+    fmt = '%d'
+    if self._scalar is not None:
+      spans = spans * self._scalar
+      fmt = '%.6f'
+    text = numpy.char.add(numpy.char.add(numpy.char.mod(fmt, spans[:, 0]), ','),
+                          numpy.char.mod(fmt, spans[:, 1]))
+    with self._open(latency_csv) as fd_lat:
+      if len(text) > 0:
+        fd_lat.write('\n'.join(text.tolist()))
+        fd_lat.write('\n')
+
+  def _aggregate(self, spans):
+    """
+    This returns the text of the aggregate file. The percentiles are the
+    samples at the rounded rank, as ssplot.SampleStats computes them.
+    """
+    lines = ['Latency,' + ','.join([x_field for x_field, _ in
+                                    LatencyParser.FIELDS])]
+    for row in LatencyParser.ROWS:
+      samples = spans[row][:, 1] - spans[row][:, 0]
+      if self._scalar is not None:
+        samples = samples * self._scalar
+      samples = numpy.sort(samples)
+      values = []
+      for _, percentile in LatencyParser.FIELDS:
+        if len(samples) == 0:
+          value = float('nan')
+        elif percentile is None:
+          value = samples.mean()
+        else:
+          value = samples[min(len(samples) - 1,
+                              int(round(percentile * len(samples))))]
+        values.append(LatencyParser.FORMAT.format(value))
+      lines.append(row + ',' + ','.join(values))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,274 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+import collections
+import concurrent.futures
+import multiprocessing
+import os
+import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import traceback
+
+class PlotPool(object):
+  """
+  This is a pool of warm plotting worker processes. Each worker imports
+  matplotlib and ssplot once and runs the ssplot plotting scripts (sslqp, ssllp,
+  sslcp) in process, so a plot costs neither an interpreter start nor the
+  plotting imports. Workers cache the stats files they read, and plots are
+  routed to workers by an affinity key so plots sharing inputs share the cache.
+  Arguments of plot commands can be given in response files (@<file>.args).
+  As a taskrun observer of the task manager, it starts its workers when the run
+  starts and stops them when the run completes. Workers are forked, so the
+  script running the sweep doesn't need to guard it by checking __name__.
+  """
+
+  def __init__(self, num_workers):
+    """
+    Constructs a PlotPool object
+
+    Args:
+      num_workers : number of worker processes
+    """
+    assert num_workers > 0
+    self._num_workers = num_workers
+    self._executors = None
+    self._lock = threading.Lock()
+
+  @staticmethod
+  def command_line(commands):
+    """
+    This returns a shell command rendering several plot commands back to back in
+    a single process, which shares the stats files read between them
+
+    Args:
+      commands    : list of plot command lines
+    """
+    return ' '.join([shlex.quote(x_arg) for x_arg in
+                     [sys.executable, os.path.abspath(__file__)] + commands])
+
+  def submit(self, command, affinity=None):
+    """
+    This submits a plot command to a worker, returns a future of its errors
+
+    Args:
+      command     : plot command line, or a list of them rendered back to back
+      affinity    : key selecting the worker (e.g. an input file)
+    """
+    with self._lock:
+      self._start()
+    commands = [command] if isinstance(command, str) else list(command)
+    if affinity is None:
+      affinity = commands[0]
+    executor = self._executors[hash(affinity) % self._num_workers]
+    return executor.submit(_run_plots, commands)
+
+  def _start(self):
+    # workers are forked, a spawned worker would import the __main__ module of
+    # the script again and run it unless it checks __name__. forking is only
+    # safe before taskrun starts threads, so workers are started by
+    # run_starting(), and by the first plot when used out of a run.
+    if self._executors is None:
+      ctx = multiprocessing.get_context('fork')
+      self._executors = [
+        concurrent.futures.ProcessPoolExecutor(
+          1, mp_context=ctx, initializer=_init_worker)
+        for _ in range(self._num_workers)]
+      for executor in self._executors:
+        # forks the worker now, not on its first plot
+        executor.submit(os.getpid)
+
+  def shutdown(self):
+    """
+    This stops all workers
+    """
+    with self._lock:
+      if self._executors is not None:
+        for executor in self._executors:
+          executor.shutdown()
+        self._executors = None
+
+  def task_added(self, task):
+    """
+    See taskrun.Observer.task_added()
+    """
+
+  def task_started(self, task):
+    """
+    See taskrun.Observer.task_started()
+    """
+
+  def task_bypassed(self, task):
+    """
+    See taskrun.Observer.task_bypassed()
+    """
+
+  def task_completed(self, task):
+    """
+    See taskrun.Observer.task_completed()
+    """
+
+  def task_failed(self, task, errors):
+    """
+    See taskrun.Observer.task_failed()
+    """
+
+  def task_killed(self, task):
+    """
+    See taskrun.Observer.task_killed()
+    """
+
+  def run_starting(self):
+    """
+    See taskrun.Observer.run_starting()
+    """
+    with self._lock:
+      self._start()
+
+  def run_complete(self):
+    """
+    See taskrun.Observer.run_complete()
+    """
+    self.shutdown()
+
+
+# ========================================================================== #
+# worker process
+# ========================================================================== #
+_CACHE_SIZE = 4096
+_scripts = {}
+_stats = collections.OrderedDict()
+_plt = None
+
+def _init_worker():
+  global _plt
+  import matplotlib
+  matplotlib.use('Agg')
+  import matplotlib.pyplot
+  import handycsv
+  import ssplot
+  _plt = matplotlib.pyplot
+
+  # the task manager handles interrupts, its forked copy must not
+  signal.signal(signal.SIGINT, signal.SIG_IGN)
+  signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+  # cache stats files shared between plots
+  read = handycsv.GridStats.read
+  def cached_read(filename, transpose=False):
+    stat = os.stat(filename)
+    key = (os.path.abspath(filename), stat.st_mtime, stat.st_size, transpose)
+    if key in _stats:
+      _stats.move_to_end(key)
+    else:
+      _stats[key] = read(filename, transpose=transpose)
+      if len(_stats) > _CACHE_SIZE:
+        _stats.popitem(last=False)
+    return _stats[key]
+  handycsv.GridStats.read = staticmethod(cached_read)
+
+def _load_script(name):
+  """
+  This returns the path and compiled code of a plotting script. The code is None
+  if the script isn't python.
+  """
+  if name not in _scripts:
+    path = shutil.which(name)
+    if path is None:
+      raise ValueError('{0} not found'.format(name))
+    try:
+      with open(path, 'r') as fd_script:
+        code = compile(fd_script.read(), path, 'exec')
+    except (SyntaxError, UnicodeDecodeError):
+      code = None
+    _scripts[name] = (path, code)
+  return _scripts[name]
+
+def _expand(argv):
+  """
+  This replaces the response files of a plot command (@<file>.args) by the
+  arguments they hold, one per line.
+  """
+  expanded = []
+  for arg in argv:
+    if arg.startswith('@') and arg.endswith('.args'):
+      with open(arg[1:], 'r') as fd_args:
+        expanded.extend(fd_args.read().splitlines())
+    else:
+      expanded.append(arg)
+  return expanded
+
+def _run_plot(command):
+  argv = _expand(shlex.split(command))
+  try:
+    path, code = _load_script(argv[0])
+  except ValueError as ex:
+    return str(ex)
+  if code is None:
+    # not a python script, run it as a process
+    ret = subprocess.call([path] + argv[1:])
+    return None if ret == 0 else ret
+
+  # run the script as __main__
+  old_argv = sys.argv
+  sys.argv = [path] + argv[1:]
+  try:
+    exec(code, {'__name__': '__main__', '__file__': path})
+    ret = None
+  except SystemExit as ex:
+    ret = None if ex.code in (None, 0) else ex.code
+  except Exception:
+    ret = traceback.format_exc()
+  finally:
+    sys.argv = old_argv
+    _plt.close('all')
+  return ret
+
+def _run_plots(commands):
+  for command in commands:
+    ret = _run_plot(command)
+    if ret is not None:
+      return ret
+  return None
+
+
+if __name__ == '__main__':
+  # renders the plot commands given as arguments in this process
+  _init_worker()
+  ret = _run_plots(sys.argv[1:])
+  if ret is not None:
+    print(ret, file=sys.stderr)
+    sys.exit(1)
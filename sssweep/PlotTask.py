@@ -0,0 +1,86 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+import threading
+import taskrun
+
+class PlotTask(taskrun.Task):
+  """
+  This is a Task that renders a plot command in a PlotPool worker instead of a
+  new process. The command can be changed until the task executes.
+  """
+
+  def __init__(self, manager, name, command, pool, affinity=None):
+    """
+    Constructs a PlotTask object
+
+    Args:
+      manager     : passed to Task.__init__()
+      name        : passed to Task.__init__()
+      command     : the plot command line, or a list of them
+      pool        : the PlotPool to render in
+      affinity    : key selecting the worker of the pool
+    """
+    super(PlotTask, self).__init__(manager, name)
+    self.command = command
+    self._pool = pool
+    self._affinity = affinity
+    self._future = None
+    self._lock = threading.Lock()
+
+  def describe(self):
+    """
+    See Task.describe()
+    """
+    if isinstance(self.command, str):
+      return self.command
+    return '\n'.join(self.command)
+
+  def execute(self):
+    """
+    See Task.execute()
+    """
+    with self._lock:
+      if self.killed:
+        return None
+      self._future = self._pool.submit(self.command, self._affinity)
+    return self._future.result()
+
+  def kill(self):
+    """
+    See Task.kill()
+    Only plots that haven't started rendering can be killed.
+    """
+    with self._lock:
+      if self._future is None or self._future.cancel():
+        self.killed = True
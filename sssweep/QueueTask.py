@@ -0,0 +1,99 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+import threading
+import taskrun
+
+class QueueTask(taskrun.Task):
+  """
+  This is a Task that runs its command through a WorkQueue, on whichever worker
+  claims it, instead of a local process. The task manager still decides when
+  the task runs, the queue only decides where. The command can be changed
+  until the task executes.
+  """
+
+  def __init__(self, manager, name, command, queue):
+    """
+    Constructs a QueueTask object
+
+    Args:
+      manager     : passed to Task.__init__()
+      name        : passed to Task.__init__()
+      command     : the shell command
+      queue       : the WorkQueue to submit to
+    """
+    super(QueueTask, self).__init__(manager, name)
+    self.command = command
+    self.stdout_file = None
+    self.stderr_file = None
+    self.stdout = None
+    self.returncode = None
+    self._queue = queue
+    self._key = None
+    self._lock = threading.Lock()
+
+  def describe(self):
+    """
+    See Task.describe()
+    """
+    text = self.command
+    if self.stdout_file:
+      text += ' 1> ' + self.stdout_file
+    if self.stderr_file:
+      text += ' 2> ' + self.stderr_file
+    return text
+
+  def execute(self):
+    """
+    See Task.execute()
+    """
+    with self._lock:
+      if self.killed:
+        return None
+      self._key = self._queue.submit(
+        self.name, self.command, self.resources, self.priority,
+        self.stdout_file, self.stderr_file)
+    self.returncode, self.stdout = self._queue.wait(self._key)
+    if self.returncode == 0:
+      return None
+    return self.returncode
+
+  def kill(self):
+    """
+    See Task.kill()
+    """
+    with self._lock:
+      if self.returncode is None and not self.killed:
+        self.killed = True
+        if self._key is not None:
+          self._queue.cancel(self._key)
@@ -0,0 +1,257 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+import json
+import math
+import os
+import shutil
+import uuid
+from .lazy_import import lazy_import
+
+# loaded on first use
+handycsv = lazy_import('handycsv')
+
+class Replication(object):
+  """
+  This holds the settings of replicated runs and decides when a config has
+  enough replicas. A config has enough replicas once the Student t confidence
+  interval of a latency statistic over its replicas has a half width within a
+  tolerance of the mean. The statistics of the replicas are combined into one
+  aggregate file: the mean of every statistic, except the minimum and maximum
+  which are the extremes over the replicas.
+  """
+
+  def __init__(self, name, short_name, max_replicas, set_command,
+               min_replicas=3, statistic='Mean', tolerance=0.05,
+               confidence=0.95):
+    """
+    Constructs a Replication object
+
+    Args:
+      name          : name of the seed variable
+      short_name    : acronym of the seed variable for filename
+      max_replicas  : maximum number of replicas of a config
+      set_command   : pointer to command function setting the seed
+      min_replicas  : number of replicas always simulated
+      statistic     : latency statistic of the confidence interval
+      tolerance     : maximum half width of the confidence interval relative
+                      to the mean of the statistic
+      confidence    : confidence level of the interval
+    """
+    assert min_replicas >= 2, "The variance needs at least 2 replicas!"
+    assert max_replicas >= min_replicas, "Invalid number of replicas!"
+    assert 0 < confidence < 1, "Invalid confidence level!"
+    self.name = name
+    self.short_name = short_name
+    self.max_replicas = max_replicas
+    self.min_replicas = min_replicas
+    self.set_command = set_command
+    self._statistic = statistic
+    self._tolerance = tolerance
+    self._confidence = confidence
+
+  @property
+  def parameters(self):
+    """
+    Returns:
+      the parameters deciding the replicas and their combination
+    """
+    return [self.min_replicas, self.max_replicas, self._statistic,
+            self._tolerance, self._confidence]
+
+  @staticmethod
+  def seed(replica):
+    """
+    This returns the seed of a replica, seeds start at 1
+
+    Args:
+      replica       : replica
+    """
+    return replica + 1
+
+  def statistic_of(self, aggregate_csv, row):
+    """
+    This reads the statistic of the confidence interval from an aggregate file
+
+    Args:
+      aggregate_csv : aggregate file
+      row           : latency row
+    """
+    grid = handycsv.GridStats.read(aggregate_csv)
+    return float(grid.get(row, self._statistic))
+
+  def interval(self, samples):
+    """
+    This returns the mean and the half width of the confidence interval of the
+    mean of samples
+
+    Args:
+      samples       : list of samples (at least 2)
+    """
+    num = len(samples)
+    mean = sum(samples) / num
+    var = sum([(x_sample - mean) ** 2 for x_sample in samples]) / (num - 1)
+    quantile = self.t_quantile(1 - (1 - self._confidence) / 2, num - 1)
+    return mean, quantile * math.sqrt(var / num)
+
+  def converged(self, samples):
+    """
+    This checks whether the confidence interval of samples is within the
+    tolerance
+
+    Args:
+      samples       : list of samples
+    """
+    if len(samples) < 2:
+      return False
+    mean, half_width = self.interval(samples)
+    return half_width <= self._tolerance * abs(mean)
+
+  def combine(self, aggregate_csvs, latency_csv, aggregate_out, latency_out,
+              summary_json, row):
+    """
+    This combines the statistics of replicas into an aggregate file, links the
+    latency distribution of the first replica and writes a summary of the
+    confidence interval
+
+    Args:
+      aggregate_csvs : aggregate files of the replicas
+      latency_csv    : latency file of the first replica
+      aggregate_out  : combined aggregate file
+      latency_out    : latency file of the config
+      summary_json   : summary file
+      row            : latency row of the confidence interval
+    """
+    grids = [handycsv.GridStats.read(x_file) for x_file in aggregate_csvs]
+    # the first grid becomes the combined one
+    samples = [float(x_grid.get(row, self._statistic)) for x_grid in grids]
+    combined = grids[0]
+    for grid_row in combined.row_names():
+      for grid_col in combined.column_names():
+        values = [float(x_grid.get(grid_row, grid_col, float('nan')))
+                  for x_grid in grids]
+        if grid_col == 'Minimum':
+          value = min(values)
+        elif grid_col == 'Maximum':
+          value = max(values)
+        else:
+          value = sum(values) / len(values)
+        combined.set(grid_row, grid_col, value)
+    combined.write(aggregate_out)
+    self._link(latency_csv, latency_out)
+
+    summary = {
+      'replicas': len(samples),
+      'row': row,
+      'statistic': self._statistic,
+      'samples': samples,
+      'confidence': self._confidence,
+      'converged': self.converged(samples)
+    }
+    if len(samples) >= 2:
+      summary['mean'], summary['half_width'] = self.interval(samples)
+    with open(summary_json, 'w') as fd_sum:
+      json.dump(summary, fd_sum, indent=1, sort_keys=True)
+
+  @staticmethod
+  def _link(src, dst):
+    """
+    This hard links src to dst, replacing dst. Falls back to copying across
+    filesystems.
+    """
+    tmp = '{0}.{1}.tmp'.format(dst, uuid.uuid4().hex)
+    try:
+      os.link(src, tmp)
+    except OSError:
+      shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+  @staticmethod
+  def t_quantile(prob, dof):
+    """
+    This returns the quantile of the Student t distribution
+
+    Args:
+      prob          : probability (above 0.5)
+      dof           : degrees of freedom
+    """
+    # bisect the cdf, 1 - I_x(dof/2, 1/2) / 2 with x = dof / (dof + t^2)
+    low = 0.0
+    high = 1.0
+    while Replication._t_cdf(high, dof) < prob:
+      high *= 2
+    for _ in range(100):
+      mid = (low + high) / 2
+      if Replication._t_cdf(mid, dof) < prob:
+        low = mid
+      else:
+        high = mid
+    return (low + high) / 2
+
+  @staticmethod
+  def _t_cdf(t_val, dof):
+    x_val = dof / (dof + t_val * t_val)
+    return 1 - Replication._betainc(dof / 2, 0.5, x_val) / 2
+
+  @staticmethod
+  def _betainc(a_val, b_val, x_val):
+    """
+    This is the regularized incomplete beta function (continued fraction)
+    """
+    if x_val <= 0 or x_val >= 1:
+      return 0.0 if x_val <= 0 else 1.0
+    front = math.exp(math.lgamma(a_val + b_val) - math.lgamma(a_val) -
+                     math.lgamma(b_val) + a_val * math.log(x_val) +
+                     b_val * math.log(1 - x_val))
+    if x_val > (a_val + 1) / (a_val + b_val + 2):
+      return 1 - Replication._betainc(b_val, a_val, 1 - x_val)
+    # modified Lentz's method
+    tiny = 1e-300
+    c_val = 1.0
+    d_val = 1 - (a_val + b_val) * x_val / (a_val + 1)
+    d_val = 1 / (d_val if abs(d_val) > tiny else tiny)
+    frac = d_val
+    for m_idx in range(1, 300):
+      for term in (
+          m_idx * (b_val - m_idx) * x_val /
+          ((a_val + 2 * m_idx - 1) * (a_val + 2 * m_idx)),
+          -(a_val + m_idx) * (a_val + b_val + m_idx) * x_val /
+          ((a_val + 2 * m_idx) * (a_val + 2 * m_idx + 1))):
+        d_val = 1 + term * d_val
+        d_val = 1 / (d_val if abs(d_val) > tiny else tiny)
+        c_val = 1 + term / c_val
+        c_val = c_val if abs(c_val) > tiny else tiny
+        frac *= c_val * d_val
+      if abs(c_val * d_val - 1) < 1e-15:
+        break
+    return front * frac / a_val
@@ -0,0 +1,243 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+import json
+import os
+import re
+import threading
+from .lazy_import import lazy_import
+
+# loaded on first use
+numpy = lazy_import('numpy')
+
+class ResourceModel(object):
+  """
+  This predicts the peak memory and the run time of simulations from the
+  '/usr/bin/time -v' usage logs of the simulations that already ran. Configs
+  are grouped into families by their non-numeric variable values. Within a
+  family the metrics are fitted linearly to the numeric values (e.g. the load),
+  or taken from the nearest observation when there are too few for a fit.
+  Configs whose last run failed (e.g. out of memory) aren't predicted.
+  Observations are appended to the model file, so the model persists between
+  runs and can be shared by sweeps. They are keyed by the sweep and the replica
+  of the run as well as the config, so the runs of identical configs in other
+  sweeps or replicas don't supersede each other, they only take part in the
+  fits.
+  """
+
+  METRICS = ['mem', 'time']
+
+  def __init__(self, model_file, sweep=None):
+    """
+    Constructs a ResourceModel object
+
+    Args:
+      model_file  : file persisting the observations (JSON lines)
+      sweep       : identity of the sweep observing runs (e.g. its output
+                    directory)
+    """
+    self._model_file = os.path.abspath(os.path.expanduser(model_file))
+    self._sweep = sweep
+    self._lock = threading.Lock()
+    self._observations = {}
+    self._families = {}
+    self._fits = {}
+    model_dir = os.path.dirname(self._model_file)
+    if not os.path.isdir(model_dir):
+      os.makedirs(model_dir)
+    if os.path.isfile(self._model_file):
+      num_lines = 0
+      with open(self._model_file, 'r') as fd_model:
+        for line in fd_model:
+          if line.strip():
+            num_lines += 1
+            self._add(json.loads(line))
+      # drop superseded observations
+      if num_lines > 2 * len(self._observations):
+        tmp = self._model_file + '.tmp'
+        with open(tmp, 'w') as fd_model:
+          for obs in self._observations.values():
+            print(json.dumps(obs, sort_keys=True), file=fd_model)
+        os.replace(tmp, self._model_file)
+
+  @staticmethod
+  def parse_usage(usage_log):
+    """
+    This parses a '/usr/bin/time -v' log. Returns a dict with the exit status,
+    the peak memory (GiB) and the wall time (seconds), None if incomplete.
+
+    Args:
+      usage_log   : usage log file
+    """
+    mem = None
+    wall = None
+    status = None
+    signaled = False
+    with open(usage_log, 'r') as fd_log:
+      for line in fd_log:
+        # e.g. killed by the OOM killer
+        if line.strip().startswith('Command terminated by signal'):
+          signaled = True
+        key, _, value = line.strip().rpartition(': ')
+        if key == 'Maximum resident set size (kbytes)':
+          mem = int(value) / 1024**2
+        elif key.startswith('Elapsed (wall clock) time'):
+          wall = 0.0
+          for part in value.split(':'):
+            wall = wall * 60 + float(part)
+        elif key == 'Exit status':
+          status = int(value)
+    if status is None or mem is None or wall is None:
+      return None
+    if signaled and status == 0:
+      status = -1
+    return {'status': status, 'mem': mem, 'time': wall}
+
+  @staticmethod
+  def _values(config):
+    return {x_var['name']: str(x_var['value']) for x_var in config}
+
+  @staticmethod
+  def _key(sweep, replica, values):
+    return json.dumps([sweep, replica, values], sort_keys=True)
+
+  @staticmethod
+  def _split(values):
+    """
+    This splits the variable values into the family key and the numeric vector
+    """
+    family = []
+    numeric = []
+    for name in sorted(values):
+      if re.match(r'^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$', values[name]):
+        family.append(name)
+        numeric.append(float(values[name]))
+      else:
+        family.append((name, values[name]))
+    return json.dumps(family), numeric
+
+  def _add(self, obs):
+    # observations of older models have no sweep nor replica
+    key = self._key(obs.get('sweep'), obs.get('replica', 0), obs['config'])
+    family, numeric = self._split(obs['config'])
+    self._observations[key] = obs
+    members = self._families.setdefault(family, {})
+    if obs['status'] == 0:
+      members[key] = (numeric, obs)
+    else:
+      members.pop(key, None)
+    self._fits.pop(family, None)
+
+  def is_stale(self, config, usage_log, replica=0):
+    """
+    This returns True if the usage log of a run hasn't been observed
+
+    Args:
+      config      : sim config
+      usage_log   : usage log of the sim
+      replica     : replica of the run
+    """
+    if not os.path.isfile(usage_log):
+      return False
+    obs = self._observations.get(
+      self._key(self._sweep, replica, self._values(config)))
+    return obs is None or obs['mtime'] != os.path.getmtime(usage_log)
+
+  def observe(self, config, usage_log, replica=0):
+    """
+    This adds the usage log of a run to the model
+
+    Args:
+      config      : sim config
+      usage_log   : usage log of the sim
+      replica     : replica of the run
+    """
+    usage = self.parse_usage(usage_log)
+    if usage is None:
+      return None
+    obs = {'config': self._values(config), 'sweep': self._sweep,
+           'replica': replica, 'mtime': os.path.getmtime(usage_log)}
+    obs.update(usage)
+    with self._lock:
+      self._add(obs)
+      with open(self._model_file, 'a') as fd_model:
+        print(json.dumps(obs, sort_keys=True), file=fd_model)
+    return None
+
+  def predict(self, config, metric, replica=0):
+    """
+    This predicts a metric of a run, None if there is nothing to predict from
+
+    Args:
+      config      : sim config
+      metric      : 'mem' (GiB) or 'time' (seconds)
+      replica     : replica of the run
+    """
+    assert metric in self.METRICS
+    values = self._values(config)
+    family, numeric = self._split(values)
+    with self._lock:
+      obs = self._observations.get(self._key(self._sweep, replica, values))
+      if obs is not None:
+        return obs[metric] if obs['status'] == 0 else None
+      members = list(self._families.get(family, {}).values())
+      if not members:
+        return None
+      if family not in self._fits:
+        self._fits[family] = self._fit(members)
+      fit = self._fits[family]
+
+    if fit is not None:
+      pred = float(numpy.dot(fit[metric], [1.0] + numeric))
+      if pred > 0:
+        return pred
+    # nearest observation
+    nearest = min(members, key=lambda x_member: sum(
+      [(x - y)**2 for x, y in zip(numeric, x_member[0])]))
+    return nearest[1][metric]
+
+  @classmethod
+  def _fit(cls, members):
+    """
+    This fits the metrics of a family linearly to its numeric values. Returns
+    None if there are too few observations for the fit.
+    """
+    x_mat = numpy.array([[1.0] + x_num for x_num, _ in members])
+    if (len(members) < x_mat.shape[1] or
+        numpy.linalg.matrix_rank(x_mat) < x_mat.shape[1]):
+      return None
+    fit = {}
+    for metric in cls.METRICS:
+      y_vec = numpy.array([x_obs[metric] for _, x_obs in members])
+      fit[metric] = numpy.linalg.lstsq(x_mat, y_vec, rcond=None)[0]
+    return fit
@@ -0,0 +1,289 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+import hashlib
+import json
+import os
+import threading
+from .lazy_import import lazy_import
+
+# loaded on first use
+handycsv = lazy_import('handycsv')
+numpy = lazy_import('numpy')
+
+class Results(object):
+  """
+  This is a columnar store of the latency statistics of every config of a sweep.
+  It is a directory of memory mapped NumPy arrays indexed by config code (see
+  ConfigIndex) holding the value index of each variable and the aggregate
+  statistics of each config, so analyses across the sweep never open the
+  aggregate files. Configs that haven't been parsed are NaN. Sweeps that are
+  sampled or pruned only have rows for their configs, in code order (see
+  codes).
+  """
+
+  ROWS = ['Packet', 'Message', 'Transaction']
+
+  def __init__(self, results_dir, writable=False):
+    """
+    Constructs a Results object from an existing results directory
+
+    Args:
+      results_dir : location of the results directory
+      writable    : open the statistics for updating
+    """
+    self._results_dir = results_dir
+    index_file = os.path.join(results_dir, 'index.json')
+    assert os.path.isfile(index_file), \
+      "{0} doesn't exist, create the sweep tasks first".format(index_file)
+    with open(index_file, 'r') as fd_index:
+      self._index = json.load(fd_index)
+    self._names = [x_var['name'] for x_var in self._index['variables']]
+    self._rows = self._index['rows']
+    self._fields = self._index['fields']
+    mode = 'r+' if writable else 'r'
+    self._values = numpy.load(os.path.join(results_dir, 'values.npy'),
+                              mmap_mode='r')
+    self._stats = numpy.load(os.path.join(results_dir, 'stats.npy'),
+                             mmap_mode=mode)
+    self._mtimes = numpy.load(os.path.join(results_dir, 'mtimes.npy'),
+                              mmap_mode=mode)
+    self._codes = None
+    if 'codes' in self._index:
+      self._codes = numpy.load(os.path.join(results_dir, 'codes.npy'))
+    self._lock = threading.Lock()
+
+  @staticmethod
+  def create(results_dir, variables, index, fields, latency_mode, codes=None):
+    """
+    This opens the results of a sweep for updating. Existing results are kept if
+    they are of the same sweep, otherwise they are cleared.
+
+    Args:
+      results_dir  : location of the results directory
+      variables    : list of sweep variables (as stored by the Sweeper)
+      index        : ConfigIndex of the variables
+      fields       : latency distribution fields
+      latency_mode : default row of the statistics
+      codes        : sorted codes of the configs of a sparse sweep (None for
+                     all configs)
+    """
+    index_json = {
+      'variables': [{'name': x_var['name'],
+                     'short_name': x_var['short_name'],
+                     'values': [str(y_val) for y_val in x_var['values']]}
+                    for x_var in variables],
+      'rows': Results.ROWS,
+      'fields': list(fields),
+      'latency_mode': latency_mode.title()
+    }
+    if codes is not None:
+      codes = numpy.array(codes, dtype=numpy.int64)
+      index_json['codes'] = {
+        'count': len(codes),
+        'sha1': hashlib.sha1(codes.tobytes()).hexdigest()
+      }
+    else:
+      codes = numpy.arange(index.size)
+    index_file = os.path.join(results_dir, 'index.json')
+    if os.path.isfile(index_file):
+      with open(index_file, 'r') as fd_index:
+        if json.load(fd_index) == index_json:
+          return Results(results_dir, writable=True)
+      os.remove(index_file)
+    if not os.path.isdir(results_dir):
+      os.makedirs(results_dir)
+
+    # value index of each variable of every config
+    if 'codes' in index_json:
+      numpy.save(os.path.join(results_dir, 'codes.npy'), codes)
+    values = numpy.lib.format.open_memmap(
+      os.path.join(results_dir, 'values.npy'), mode='w+', dtype=numpy.int32,
+      shape=(len(codes), len(variables)))
+    for dim in range(len(variables)):
+      values[:, dim] = index.value_index(codes, dim)
+    values.flush()
+    del values
+    stats = numpy.lib.format.open_memmap(
+      os.path.join(results_dir, 'stats.npy'), mode='w+', dtype=numpy.float64,
+      shape=(len(codes), len(Results.ROWS), len(fields)))
+    stats[:] = numpy.nan
+    stats.flush()
+    del stats
+    mtimes = numpy.lib.format.open_memmap(
+      os.path.join(results_dir, 'mtimes.npy'), mode='w+', dtype=numpy.float64,
+      shape=(len(codes),))
+    mtimes[:] = 0
+    mtimes.flush()
+    del mtimes
+
+    # the index is written last, it marks the results as complete
+    with open(index_file, 'w') as fd_index:
+      json.dump(index_json, fd_index)
+    return Results(results_dir, writable=True)
+
+  def _row(self, code):
+    # rows of sparse sweeps are in code order
+    if self._codes is None:
+      return code
+    return int(numpy.searchsorted(self._codes, code))
+
+  def is_stale(self, code, aggregate_csv):
+    """
+    This returns True if the aggregate file of a config isn't in the results
+
+    Args:
+      code          : config code
+      aggregate_csv : aggregate file of the config
+    """
+    if not os.path.isfile(aggregate_csv):
+      return False
+    return bool(self._mtimes[self._row(code)] !=
+                os.path.getmtime(aggregate_csv))
+
+  def update(self, code, aggregate_csv, grid=None):
+    """
+    This stores the aggregate statistics of a config
+
+    Args:
+      code          : config code
+      aggregate_csv : aggregate file of the config
+      grid          : statistics of the aggregate file if already read
+    """
+    mtime = os.path.getmtime(aggregate_csv)
+    if grid is None:
+      grid = handycsv.GridStats.read(aggregate_csv)
+    stats = numpy.array([[float(grid.get(row, field, numpy.nan))
+                          for field in self._fields] for row in self._rows])
+    row = self._row(code)
+    with self._lock:
+      self._stats[row] = stats
+      self._mtimes[row] = mtime
+      self._stats.flush()
+      self._mtimes.flush()
+    return None
+
+  @property
+  def size(self):
+    """
+    Returns:
+      the number of configs
+    """
+    return len(self._values)
+
+  @property
+  def codes(self):
+    """
+    Returns:
+      array of the config code of every row
+    """
+    if self._codes is None:
+      return numpy.arange(self.size)
+    return self._codes
+
+  @property
+  def variables(self):
+    """
+    Returns:
+      the variable names
+    """
+    return list(self._names)
+
+  @property
+  def rows(self):
+    """
+    Returns:
+      the latency rows (Packet, Message, Transaction)
+    """
+    return list(self._rows)
+
+  @property
+  def fields(self):
+    """
+    Returns:
+      the latency distribution fields
+    """
+    return list(self._fields)
+
+  @property
+  def value_index(self):
+    """
+    Returns:
+      array (configs x variables) of the value index of each variable
+    """
+    return self._values
+
+  @property
+  def stats(self):
+    """
+    Returns:
+      array (configs x rows x fields) of the latency statistics
+    """
+    return self._stats
+
+  def values(self, name):
+    """
+    This returns the value of a variable for every config
+
+    Args:
+      name    : variable name
+    """
+    dim = self._names.index(name)
+    values = numpy.array(self._index['variables'][dim]['values'])
+    return values[self._values[:, dim]]
+
+  def get(self, field, row=None):
+    """
+    This returns a latency statistic for every config
+
+    Args:
+      field   : latency distribution field (e.g. 'Mean')
+      row     : latency row (defaults to the latency mode of the sweep)
+    """
+    if row is None:
+      row = self._index['latency_mode']
+    return self._stats[:, self._rows.index(row), self._fields.index(field)]
+
+  def select(self, values):
+    """
+    This returns a mask of the configs with the given variable values
+
+    Args:
+      values  : dict of variable name to value (or list of values)
+    """
+    mask = numpy.ones(self.size, dtype=bool)
+    for name, value in values.items():
+      if not isinstance(value, (list, tuple, set)):
+        value = [value]
+      mask &= numpy.isin(self.values(name), [str(x_val) for x_val in value])
+    return mask
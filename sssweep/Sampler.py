@@ -0,0 +1,189 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+import itertools
+import random
+
+class Sampler(object):
+  """
+  This selects the configs of a sampled sweep. Configs are tuples of value
+  indices, one per dimension, and only the configs accepted by a validity
+  function are sampled. The modes are:
+    random     : a uniformly random subset of the given size
+    lhs        : a Latin hypercube, every value of every dimension is sampled
+                 (nearly) the same number of times
+    fractional : a regular fractional factorial design. The first dimensions
+                 form a full factorial of at most the given size and the value
+                 of every other dimension is a distinct linear combination of
+                 the values of at least two of them (modulo its number of
+                 values), so no two main effects are aliased (resolution III).
+                 The design is balanced when the dimensions have the same prime
+                 number of values (e.g. all have 2 or 3 values).
+  """
+
+  MODES = ['random', 'lhs', 'fractional']
+
+  def __init__(self, mode, samples, seed=0):
+    """
+    Constructs a Sampler object
+
+    Args:
+      mode        : sampling mode ('random', 'lhs' or 'fractional')
+      samples     : number of configs to sample (the maximum for fractional)
+      seed        : seed of the random number generator
+    """
+    assert mode in Sampler.MODES, "Invalid sampling mode!"
+    assert samples is not None and samples > 0, "Invalid number of samples!"
+    self._mode = mode
+    self._samples = samples
+    self._seed = seed
+
+  def sample(self, widths, is_valid):
+    """
+    This returns the sorted list of sampled configs
+
+    Args:
+      widths      : number of values of each dimension
+      is_valid    : function (config) returning False for invalid configs
+    """
+    rng = random.Random(self._seed)
+    if self._mode == 'random':
+      configs = self._random(widths, is_valid, rng, set())
+    elif self._mode == 'lhs':
+      configs = self._lhs(widths, is_valid, rng)
+    else:
+      configs = self._fractional(widths, is_valid)
+    return sorted(configs)
+
+  @staticmethod
+  def _decode(number, widths):
+    # last dimension varies the fastest
+    config = []
+    for width in reversed(widths):
+      config.append(number % width)
+      number //= width
+    return tuple(reversed(config))
+
+  def _random(self, widths, is_valid, rng, configs):
+    """
+    This adds random valid configs until there are as many as samples. It gives
+    up when the configs tried are many more than samples, as most configs are
+    invalid.
+    """
+    total = 1
+    for width in widths:
+      total *= width
+    tried = set()
+    for config in configs:
+      tried.add(config)
+    attempts = 0
+    while (len(configs) < self._samples and len(tried) < total and
+           attempts < 100 * self._samples):
+      attempts += 1
+      config = self._decode(rng.randrange(total), widths)
+      if config in tried:
+        continue
+      tried.add(config)
+      if is_valid(config):
+        configs.add(config)
+    return configs
+
+  def _lhs(self, widths, is_valid, rng):
+    """
+    This creates a Latin hypercube. Each dimension is split into samples strata
+    over its values, which are shuffled independently. Duplicate and invalid
+    configs are replaced by random configs.
+    """
+    columns = []
+    for width in widths:
+      column = [x_idx * width // self._samples
+                for x_idx in range(self._samples)]
+      rng.shuffle(column)
+      columns.append(column)
+    configs = set([x_config for x_config in zip(*columns)
+                   if is_valid(x_config)])
+    return self._random(widths, is_valid, rng, configs)
+
+  def _fractional(self, widths, is_valid):
+    """
+    This creates a regular fractional factorial design
+    """
+    # dimensions with a single value don't take part
+    dims = [x_dim for x_dim, y_width in enumerate(widths) if y_width > 1]
+
+    # the basic dimensions form a full factorial of at most samples configs
+    basic = dims[:1]
+    runs = widths[dims[0]] if dims else 1
+    for dim in dims[1:]:
+      if runs * widths[dim] > self._samples:
+        break
+      basic.append(dim)
+      runs *= widths[dim]
+    added = dims[len(basic):]
+
+    # each added dimension is generated by a distinct linear combination of at
+    # least two basic ones, the first coefficient is 1 to skip multiples
+    max_width = max([widths[x_dim] for x_dim in dims]) if dims else 1
+    generators = []
+    used = set()
+    combinations = (
+      (y_sub, (1,) + y_coeffs)
+      for x_size in range(2, len(basic) + 1)
+      for y_sub in itertools.combinations(range(len(basic)), x_size)
+      for y_coeffs in itertools.product(range(1, max_width),
+                                        repeat=x_size - 1))
+    for dim in added:
+      width = widths[dim]
+      for subset, coeffs in combinations:
+        coeffs = tuple([x_coeff % width for x_coeff in coeffs])
+        if 0 not in coeffs and (subset, coeffs, width) not in used:
+          used.add((subset, coeffs, width))
+          generators.append((subset, coeffs))
+          break
+      else:
+        assert False, \
+          "Too many variables for a fractional factorial of {0} samples".format(
+            self._samples)
+
+    configs = set()
+    for values in itertools.product(*[range(widths[x_dim]) for x_dim in basic]):
+      config = [0] * len(widths)
+      for dim, value in zip(basic, values):
+        config[dim] = value
+      for dim, (subset, coeffs) in zip(added, generators):
+        config[dim] = sum([values[x_idx] * y_coeff for x_idx, y_coeff
+                           in zip(subset, coeffs)]) % widths[dim]
+      config = tuple(config)
+      if is_valid(config):
+        configs.add(config)
+    return configs
@@ -0,0 +1,301 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+import contextlib
+import errno
+import fcntl
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+
+class SimCache(object):
+  """
+  This is a content addressed cache of simulation outputs that can be shared
+  between sweeps. Entries are keyed by a hash of everything that determines the
+  simulation result and are stored as directories of the outputs. Outputs are
+  hard linked into and out of the cache, reflinked or copied when they can't be
+  linked (e.g. across filesystems). Linked files are shared with the entries,
+  so they must be unlinked before they are written again (see unshare()). The
+  total size of the entries is kept in the cache and the least recently used
+  entries are evicted when it exceeds the size of the cache.
+  """
+
+  # eviction brings the cache down to this fraction of its size
+  LOW_WATERMARK = 0.9
+
+  # ioctl sharing the data of a file with another (linux/fs.h)
+  FICLONE = 0x40049409
+
+  def __init__(self, cache_dir, size=None):
+    """
+    Constructs a SimCache object
+
+    Args:
+      cache_dir   : location of the cache directory
+      size        : maximum size of the cache in GiB (None for unbounded)
+    """
+    self._cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+    self._size = None if size is None else int(size * 1024**3)
+    self._lock = threading.Lock()
+    self._lock_file = os.path.join(self._cache_dir, 'lock')
+    self._size_file = os.path.join(self._cache_dir, 'size')
+    if not os.path.isdir(self._cache_dir):
+      os.makedirs(self._cache_dir)
+
+  @staticmethod
+  def hash_file(filename):
+    """
+    This returns the hash of the contents of a file
+
+    Args:
+      filename    : file to hash
+    """
+    hasher = hashlib.sha256()
+    with open(filename, 'rb') as fd_in:
+      for buf in iter(lambda: fd_in.read(1 << 20), b''):
+        hasher.update(buf)
+    return hasher.hexdigest()
+
+  @staticmethod
+  def key(*parts):
+    """
+    This creates a cache key from the parts that determine a simulation result
+
+    Args:
+      *           : strings to combine (hashes, command overrides, etc.)
+    """
+    hasher = hashlib.sha256()
+    for part in parts:
+      hasher.update(part.encode('utf-8'))
+      hasher.update(b'\0')
+    return hasher.hexdigest()
+
+  def _entry(self, key):
+    return os.path.join(self._cache_dir, key[:2], key)
+
+  def contains(self, key):
+    """
+    This checks whether the cache has an entry for a key
+
+    Args:
+      key         : cache key
+    """
+    return os.path.isdir(self._entry(key))
+
+  def fetch(self, key, files):
+    """
+    This links the cached outputs of a key into place. Returns True on a hit.
+
+    Args:
+      key         : cache key
+      files       : dict of output role to output file
+    """
+    entry = self._entry(key)
+    if not os.path.isdir(entry):
+      return False
+    try:
+      for role, filename in files.items():
+        self._link(os.path.join(entry, role), filename)
+      # mark as recently used
+      os.utime(entry, None)
+    except OSError:
+      # evicted while fetching, simulate instead
+      return False
+    # the size of the cache may have been lowered
+    if self._size is not None:
+      self._account(0)
+    return True
+
+  def store(self, key, files):
+    """
+    This stores the outputs of a simulation under a key. Outputs that were never
+    created (e.g. skipped loads) are not stored.
+
+    Args:
+      key         : cache key
+      files       : dict of output role to output file
+    """
+    entry = self._entry(key)
+    if os.path.isdir(entry):
+      return None
+    for filename in files.values():
+      if not os.path.isfile(filename):
+        return None
+
+    # build the entry aside then move it into place atomically
+    tmp = '{0}.{1}.tmp'.format(entry, uuid.uuid4().hex)
+    os.makedirs(tmp)
+    size = 0
+    for role, filename in files.items():
+      self._link(filename, os.path.join(tmp, role))
+      size += os.path.getsize(os.path.join(tmp, role))
+    try:
+      os.rename(tmp, entry)
+    except OSError:
+      # another sweep stored it first
+      shutil.rmtree(tmp, ignore_errors=True)
+      return None
+
+    self._account(size)
+    return None
+
+  @contextlib.contextmanager
+  def _locked(self):
+    """
+    This locks the cache against the threads and the other sweeps using it
+    """
+    with self._lock:
+      with open(self._lock_file, 'a') as fd_lock:
+        fcntl.flock(fd_lock, fcntl.LOCK_EX)
+        yield
+
+  def _account(self, added):
+    """
+    This adds the size of a new entry to the total size of the cache and evicts
+    entries when it exceeds the size of the cache
+    """
+    with self._locked():
+      try:
+        with open(self._size_file, 'r') as fd_size:
+          total = int(fd_size.read()) + added
+      except (OSError, ValueError):
+        # the new entry is already in place
+        total = sum([x_size for _, x_size, _ in self._entries()])
+      if self._size is not None and total > self._size:
+        total = self._evict()
+      tmp = '{0}.{1}.tmp'.format(self._size_file, uuid.uuid4().hex)
+      with open(tmp, 'w') as fd_size:
+        fd_size.write(str(total))
+      os.replace(tmp, self._size_file)
+
+  def _entries(self):
+    """
+    This returns the (last use, size, directory) of all entries
+    """
+    entries = []
+    for prefix in os.listdir(self._cache_dir):
+      pdir = os.path.join(self._cache_dir, prefix)
+      if not os.path.isdir(pdir):
+        continue
+      for name in os.listdir(pdir):
+        if name.endswith('.tmp'):
+          continue
+        entry = os.path.join(pdir, name)
+        try:
+          mtime = os.path.getmtime(entry)
+          size = sum([os.path.getsize(os.path.join(entry, x_file))
+                      for x_file in os.listdir(entry)])
+        except OSError:
+          continue
+        entries.append((mtime, size, entry))
+    return entries
+
+  def _evict(self):
+    """
+    This removes the least recently used entries until the cache is below its
+    low watermark, so entries are only walked once per that much new data.
+    Returns the new total size.
+    """
+    entries = self._entries()
+    total = sum([x_size for _, x_size, _ in entries])
+    for _, size, entry in sorted(entries):
+      if total <= self._size * SimCache.LOW_WATERMARK:
+        break
+      shutil.rmtree(entry, ignore_errors=True)
+      total -= size
+    return total
+
+  @staticmethod
+  def unshare(filenames):
+    """
+    This unlinks the files that are linked with cache entries (or any other
+    file), so writing them again doesn't change the entries
+
+    Args:
+      filenames   : files about to be written
+    """
+    for filename in filenames:
+      try:
+        if os.stat(filename).st_nlink > 1:
+          os.remove(filename)
+      except FileNotFoundError:
+        pass
+
+  @staticmethod
+  def _link(src, dst):
+    """
+    This links src to dst, replacing dst atomically. Files that can't be hard
+    linked are reflinked, and copied when that isn't supported either.
+    """
+    tmp = '{0}.{1}.tmp'.format(dst, uuid.uuid4().hex)
+    try:
+      os.link(src, tmp)
+    except OSError as ex:
+      if ex.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK,
+                          errno.ENOTSUP):
+        raise
+      SimCache._copy(src, tmp)
+    try:
+      os.replace(tmp, dst)
+    except OSError:
+      if os.path.exists(tmp):
+        os.remove(tmp)
+      raise
+
+  @staticmethod
+  def _copy(src, dst):
+    """
+    This copies src to dst. The data is shared by a reflink, or copied in the
+    kernel, falls back to a user space copy.
+    """
+    try:
+      with open(src, 'rb') as fd_src, open(dst, 'wb') as fd_dst:
+        try:
+          fcntl.ioctl(fd_dst.fileno(), SimCache.FICLONE, fd_src.fileno())
+        except OSError:
+          try:
+            while os.copy_file_range(fd_src.fileno(), fd_dst.fileno(),
+                                     1 << 30):
+              pass
+          except (AttributeError, OSError):
+            fd_src.seek(0)
+            fd_dst.seek(0)
+            fd_dst.truncate()
+            shutil.copyfileobj(fd_src, fd_dst, 1 << 20)
+      shutil.copystat(src, dst)
+    except OSError:
+      if os.path.exists(dst):
+        os.remove(dst)
+      raise
@@ -0,0 +1,205 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+import os
+
+class SweepObserver(object):
+  """
+  This is the base class of the observers instrumenting a Sweeper. Subclasses
+  override the notifications they are interested in. The phase notifications
+  come from Sweeper.create_tasks() and the task notifications are bridged from
+  the taskrun observers of the task manager.
+  """
+
+  def phase_started(self, phase):
+    """
+    Notification of a task creation phase starting
+
+    Args:
+      phase       : name of the phase ('sim', 'parse', 'qplot', ...)
+    """
+
+  def phase_finished(self, phase, stats):
+    """
+    Notification of a task creation phase finishing
+
+    Args:
+      phase       : name of the phase
+      stats       : dict with the elapsed time in seconds ('elapsed'), the
+                    number of tasks created ('tasks'), the total bytes of their
+                    command lines ('command_bytes') and the peak memory traced
+                    by Python during the phase ('peak_memory')
+    """
+
+  def task_queued(self, name):
+    """
+    Notification of a task added to the task manager
+
+    Args:
+      name        : task name
+    """
+
+  def task_started(self, name):
+    """
+    Notification of a task starting
+
+    Args:
+      name        : task name
+    """
+
+  def task_finished(self, name, status, bytes_written):
+    """
+    Notification of a task finishing
+
+    Args:
+      name        : task name
+      status      : 'completed', 'bypassed', 'failed' or 'killed'
+      bytes_written : total size of the output files of the task (None for tasks
+                      without output files)
+    """
+
+  def run_started(self):
+    """
+    Notification of the task manager starting to run the tasks
+    """
+
+  def run_finished(self):
+    """
+    Notification of the task manager finishing to run the tasks
+    """
+
+
+class TaskBridge(object):
+  """
+  This is a taskrun observer forwarding the task events of a task manager to
+  SweepObservers. It also counts the tasks created by each phase.
+  """
+
+  def __init__(self, observers, outputs):
+    """
+    Constructs a TaskBridge object
+
+    Args:
+      observers   : list of SweepObservers
+      outputs     : dict of task name to its output files
+    """
+    self._observers = observers
+    self._outputs = outputs
+    self._added = None
+
+  def begin_phase(self):
+    """
+    This starts counting the tasks of a phase
+    """
+    self._added = []
+
+  def end_phase(self):
+    """
+    This returns the number of tasks added since begin_phase() and the total
+    bytes of their command lines
+    """
+    command_bytes = 0
+    for task in self._added:
+      # function tasks have no command
+      command = getattr(task, 'command', None)
+      if command is None:
+        continue
+      if not isinstance(command, str):
+        command = '\n'.join(command)
+      command_bytes += len(command.encode('utf-8'))
+    tasks = len(self._added)
+    self._added = None
+    return tasks, command_bytes
+
+  def _finished(self, task, status):
+    bytes_written = None
+    if task.name in self._outputs:
+      bytes_written = sum([os.path.getsize(x_file) for x_file
+                           in self._outputs[task.name]
+                           if os.path.isfile(x_file)])
+    for observer in self._observers:
+      observer.task_finished(task.name, status, bytes_written)
+
+  def task_added(self, task):
+    """
+    See taskrun.Observer.task_added()
+    """
+    if self._added is not None:
+      self._added.append(task)
+    for observer in self._observers:
+      observer.task_queued(task.name)
+
+  def task_started(self, task):
+    """
+    See taskrun.Observer.task_started()
+    """
+    for observer in self._observers:
+      observer.task_started(task.name)
+
+  def task_bypassed(self, task):
+    """
+    See taskrun.Observer.task_bypassed()
+    """
+    self._finished(task, 'bypassed')
+
+  def task_completed(self, task):
+    """
+    See taskrun.Observer.task_completed()
+    """
+    self._finished(task, 'completed')
+
+  def task_failed(self, task, errors):
+    """
+    See taskrun.Observer.task_failed()
+    """
+    self._finished(task, 'failed')
+
+  def task_killed(self, task):
+    """
+    See taskrun.Observer.task_killed()
+    """
+    self._finished(task, 'killed')
+
+  def run_starting(self):
+    """
+    See taskrun.Observer.run_starting()
+    """
+    for observer in self._observers:
+      observer.run_started()
+
+  def run_complete(self):
+    """
+    See taskrun.Observer.run_complete()
+    """
+    for observer in self._observers:
+      observer.run_finished()
@@ -0,0 +1,313 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+import collections
+import csv
+import html
+import json
+
+class SweepReport(object):
+  """
+  This is a performance report of a sweep. It holds the status and resource
+  usage of every task (as logged by '/usr/bin/time -v' for sims) with the
+  variable values of its config, and aggregates the usage per task kind and
+  value of every variable, to show where the cluster time of a sweep goes.
+  """
+
+  # statuses of the tasks that finished
+  STATUSES = ['completed', 'bypassed', 'failed', 'killed']
+
+  # usage log keys of the reported metrics
+  USAGE = collections.OrderedDict([
+    ('User time (seconds)', 'user_s'),
+    ('System time (seconds)', 'sys_s'),
+    ('Maximum resident set size (kbytes)', 'max_rss_kb'),
+    ('Major (requiring I/O) page faults', 'major_faults'),
+    ('Minor (reclaiming a frame) page faults', 'minor_faults'),
+    ('File system inputs', 'fs_inputs'),
+    ('File system outputs', 'fs_outputs'),
+    ('Exit status', 'exit_status')
+  ])
+  METRICS = (['wall_s'] + list(USAGE.values()) +
+             ['cpu_s', 'output_bytes', 'simout_bytes'])
+  # metrics aggregated per variable value
+  AGGREGATES = ['wall_s', 'cpu_s', 'max_rss_kb', 'major_faults',
+                'output_bytes']
+
+  def __init__(self, variables):
+    """
+    Constructs a SweepReport object
+
+    Args:
+      variables   : names of the sweep variables
+    """
+    self._variables = list(variables)
+    self._rows = []
+
+  @staticmethod
+  def parse_usage(usage_log):
+    """
+    This parses a '/usr/bin/time -v' log into the reported metrics
+
+    Args:
+      usage_log   : usage log file
+    """
+    metrics = {}
+    with open(usage_log, 'r') as fd_log:
+      for line in fd_log:
+        key, _, value = line.strip().rpartition(': ')
+        if key.startswith('Elapsed (wall clock) time'):
+          wall = 0.0
+          for part in value.split(':'):
+            wall = wall * 60 + float(part)
+          metrics['wall_s'] = wall
+        elif key in SweepReport.USAGE:
+          metrics[SweepReport.USAGE[key]] = float(value)
+    if 'user_s' in metrics and 'sys_s' in metrics:
+      metrics['cpu_s'] = metrics['user_s'] + metrics['sys_s']
+    return metrics
+
+  def add(self, id_task, task_type, values, metrics, status=None):
+    """
+    This adds the usage of a task
+
+    Args:
+      id_task     : id of the config
+      task_type   : kind of the task ('sim', 'parse', ...)
+      values      : variable values of the config (in variable order), None
+                    for tasks of several configs
+      metrics     : dict of metric to value
+      status      : how the task finished (see STATUSES), None if unknown
+    """
+    self._rows.append((id_task, task_type,
+                       None if values is None else list(values), metrics,
+                       status))
+
+  def configs(self):
+    """
+    This returns a dict per task with its id, kind, status, variable values and
+    metrics
+    """
+    rows = []
+    for id_task, task_type, values, metrics, status in self._rows:
+      row = collections.OrderedDict([('id', id_task), ('task', task_type),
+                                     ('status', status)])
+      row.update(zip(self._variables,
+                     values or [None] * len(self._variables)))
+      for metric in self.METRICS:
+        row[metric] = metrics.get(metric)
+      rows.append(row)
+    return rows
+
+  def aggregates(self):
+    """
+    This returns the usage aggregated per task kind, variable and value as
+    {task: {variable: {value: {'count': n, '<metric>_total': x,
+    '<metric>_mean': y, ...}}}}. Tasks without values are left out.
+    """
+    sums = collections.OrderedDict()
+    for _, task_type, values, metrics, _ in self._rows:
+      if values is None:
+        continue
+      task_sums = sums.setdefault(task_type, collections.OrderedDict(
+        [(x_var, collections.OrderedDict()) for x_var in self._variables]))
+      for name, value in zip(self._variables, values):
+        agg = task_sums[name].setdefault(str(value), collections.OrderedDict(
+          [('count', 0)] + [(x_metric, [0.0, 0]) for x_metric in
+                            self.AGGREGATES]))
+        agg['count'] += 1
+        for metric in self.AGGREGATES:
+          if metrics.get(metric) is not None:
+            agg[metric][0] += metrics[metric]
+            agg[metric][1] += 1
+
+    aggregates = collections.OrderedDict()
+    for task_type, task_sums in sums.items():
+      aggregates[task_type] = collections.OrderedDict()
+      for name, value_sums in task_sums.items():
+        aggregates[task_type][name] = collections.OrderedDict()
+        for value, agg in value_sums.items():
+          entry = collections.OrderedDict([('count', agg['count'])])
+          for metric in self.AGGREGATES:
+            total, count = agg[metric]
+            entry[metric + '_total'] = total
+            entry[metric + '_mean'] = total / count if count else None
+          aggregates[task_type][name][value] = entry
+    return aggregates
+
+  def totals(self):
+    """
+    This returns the number of tasks, the number of them per status and the
+    total of every metric per task kind
+    """
+    totals = collections.OrderedDict()
+    for _, task_type, _, metrics, status in self._rows:
+      total = totals.setdefault(task_type, collections.OrderedDict(
+        [('count', 0)] + [(x_status, 0) for x_status in self.STATUSES] +
+        [(x_metric, 0.0) for x_metric in self.AGGREGATES]))
+      total['count'] += 1
+      if status is not None:
+        total[status] += 1
+      for metric in self.AGGREGATES:
+        total[metric] += metrics.get(metric) or 0.0
+    return totals
+
+  def write_json(self, filename):
+    """
+    This writes the configs, aggregates and totals to a JSON file
+
+    Args:
+      filename    : JSON file
+    """
+    report = collections.OrderedDict([
+      ('variables', self._variables),
+      ('totals', self.totals()),
+      ('aggregates', self.aggregates()),
+      ('configs', self.configs())
+    ])
+    with open(filename, 'w') as fd_json:
+      json.dump(report, fd_json, indent=1)
+
+  def write_csv(self, configs_csv, aggregates_csv):
+    """
+    This writes the configs and the aggregates to CSV files
+
+    Args:
+      configs_csv    : CSV file of the configs (one row per task)
+      aggregates_csv : CSV file of the aggregates (one row per value)
+    """
+    with open(configs_csv, 'w', newline='') as fd_csv:
+      writer = csv.writer(fd_csv)
+      writer.writerow(['id', 'task', 'status'] + self._variables +
+                      self.METRICS)
+      for row in self.configs():
+        writer.writerow(['' if x_val is None else x_val
+                         for x_val in row.values()])
+
+    columns = None
+    with open(aggregates_csv, 'w', newline='') as fd_csv:
+      writer = csv.writer(fd_csv)
+      for task_type, task_aggs in self.aggregates().items():
+        for name, value_aggs in task_aggs.items():
+          for value, entry in value_aggs.items():
+            if columns is None:
+              columns = list(entry.keys())
+              writer.writerow(['task', 'variable', 'value'] + columns)
+            writer.writerow([task_type, name, value] +
+                            ['' if x_val is None else x_val
+                             for x_val in entry.values()])
+
+  def write_html(self, filename, title, top=50):
+    """
+    This writes a static HTML page with the totals, the aggregates per variable
+    value and the longest tasks
+
+    Args:
+      filename    : HTML file
+      title       : page title
+      top         : number of longest tasks listed
+    """
+    def table(header, rows):
+      text = '<table>\n<tr>{0}</tr>\n'.format(
+        ''.join(['<th>{0}</th>'.format(html.escape(str(x_h)))
+                 for x_h in header]))
+      for row in rows:
+        text += '<tr>{0}</tr>\n'.format(''.join(
+          ['<td>{0}</td>'.format(html.escape(fmt(x_val))) for x_val in row]))
+      return text + '</table>\n'
+
+    def fmt(value):
+      if value is None:
+        return ''
+      if isinstance(value, float):
+        return '{0:.6g}'.format(value)
+      return str(value)
+
+    body = '<h1>{0}</h1>\n'.format(html.escape(title))
+    body += '<h2>Totals</h2>\n'
+    totals = self.totals()
+    body += table(['task', 'count'] + self.STATUSES +
+                  ['wall hours', 'cpu hours', 'output GiB'],
+                  [[x_task, y_tot['count']] +
+                   [y_tot[x_status] for x_status in self.STATUSES] +
+                   [y_tot['wall_s'] / 3600, y_tot['cpu_s'] / 3600,
+                    y_tot['output_bytes'] / 1024**3]
+                   for x_task, y_tot in totals.items()])
+
+    for task_type, task_aggs in self.aggregates().items():
+      for name, value_aggs in task_aggs.items():
+        body += '<h2>{0} by {1}</h2>\n'.format(html.escape(task_type),
+                                               html.escape(name))
+        body += table(
+          [name, 'count', 'wall hours', 'mean wall s', 'mean cpu s',
+           'mean max RSS MiB', 'mean major faults', 'mean output MiB'],
+          [[x_value, y_agg['count'], y_agg['wall_s_total'] / 3600,
+            y_agg['wall_s_mean'], y_agg['cpu_s_mean'],
+            None if y_agg['max_rss_kb_mean'] is None else
+            y_agg['max_rss_kb_mean'] / 1024,
+            y_agg['major_faults_mean'],
+            None if y_agg['output_bytes_mean'] is None else
+            y_agg['output_bytes_mean'] / 1024**2]
+           for x_value, y_agg in value_aggs.items()])
+
+    body += '<h2>Longest tasks</h2>\n'
+    rows = sorted(self.configs(), key=lambda x_row: -(x_row['wall_s'] or 0))
+    body += table(['id', 'task', 'status', 'wall s', 'cpu s', 'max RSS MiB',
+                   'major faults', 'output MiB', 'exit status'],
+                  [[x_row['id'], x_row['task'], x_row['status'],
+                    x_row['wall_s'],
+                    x_row['cpu_s'],
+                    None if x_row['max_rss_kb'] is None else
+                    x_row['max_rss_kb'] / 1024,
+                    x_row['major_faults'],
+                    None if x_row['output_bytes'] is None else
+                    x_row['output_bytes'] / 1024**2,
+                    x_row['exit_status']]
+                   for x_row in rows[:top]])
+
+    with open(filename, 'w') as fd_html:
+      print("""\
+<!DOCTYPE html>
+<html>
+<head>
+  <title>{0}</title>
+  <style>
+    body {{font-family: Arial, Helvetica, sans-serif; font-size: 14px;}}
+    table {{border-collapse: collapse; margin-bottom: 20px;}}
+    th, td {{border: thin solid #C6C9CA; padding: 4px 8px; text-align: right;}}
+    th {{background: #eee;}}
+  </style>
+</head>
+<body>
+{1}</body>
+</html>""".format(html.escape(title), body), file=fd_html)
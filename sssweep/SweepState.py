@@ -0,0 +1,171 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+import hashlib
+import json
+import os
+
+class SweepState(object):
+  """
+  This is the persisted state of an incremental sweep: the signature of every
+  task that finished (completed, or bypassed as up to date) in a previous run.
+  A task whose signature is unchanged has the same inputs and outputs as when
+  it finished, so it isn't created again unless a task it depends on is. The
+  state is saved when the run completes, as a taskrun observer of the task
+  manager. Tasks that failed or were killed, or were skipped by adaptive loads
+  or replicas, are not kept in it and are created again by the next run.
+  """
+
+  def __init__(self, state_file):
+    """
+    Constructs a SweepState object, loading the state of the previous run
+
+    Args:
+      state_file  : location of the state file
+    """
+    self._state_file = state_file
+    self._previous = {}
+    if os.path.isfile(state_file):
+      with open(state_file, 'r') as fd_state:
+        self._previous = json.load(fd_state)['tasks']
+    self._tasks = {}
+    self._created = {}
+
+  @staticmethod
+  def signature(*parts):
+    """
+    This returns the signature of the parts of a task (its command, its inputs,
+    ...). Lists of parts are joined.
+
+    Args:
+      *             : parts of the task
+    """
+    sha = hashlib.sha1()
+    for part in parts:
+      if isinstance(part, (list, tuple)):
+        part = '\n'.join([str(x_part) for x_part in part])
+      sha.update(str(part).encode('utf-8'))
+      sha.update(b'\0')
+    return sha.hexdigest()[:20]
+
+  def is_done(self, name, signature):
+    """
+    This checks whether a task finished in the previous run with the same
+    signature. Tasks that are done are kept in the state.
+
+    Args:
+      name          : task name
+      signature     : signature of the task
+    """
+    if self._previous.get(name) != signature:
+      return False
+    self._tasks[name] = signature
+    return True
+
+  def track(self, task, signature):
+    """
+    This records a task created by this run, it is done once it finishes
+
+    Args:
+      task          : task
+      signature     : signature of the task
+    """
+    self._created[task.name] = signature
+
+  def skip(self, task):
+    """
+    This records that a task created by this run is bypassed by a decision
+    rather than because it is up to date (e.g. a load beyond saturation), so it
+    isn't done and is created again by the next run
+
+    Args:
+      task          : task
+    """
+    self._created.pop(task.name, None)
+
+  def save(self):
+    """
+    This writes the state file, replacing the previous one atomically
+    """
+    tmp_file = self._state_file + '.tmp'
+    with open(tmp_file, 'w') as fd_state:
+      json.dump({'tasks': self._tasks}, fd_state, separators=(',', ':'),
+                sort_keys=True)
+    os.replace(tmp_file, self._state_file)
+
+  def _finished(self, task):
+    if task.name in self._created:
+      self._tasks[task.name] = self._created[task.name]
+
+  def task_added(self, task):
+    """
+    See taskrun.Observer.task_added()
+    """
+
+  def task_started(self, task):
+    """
+    See taskrun.Observer.task_started()
+    """
+
+  def task_bypassed(self, task):
+    """
+    See taskrun.Observer.task_bypassed()
+    """
+    self._finished(task)
+
+  def task_completed(self, task):
+    """
+    See taskrun.Observer.task_completed()
+    """
+    self._finished(task)
+
+  def task_failed(self, task, errors):
+    """
+    See taskrun.Observer.task_failed()
+    """
+
+  def task_killed(self, task):
+    """
+    See taskrun.Observer.task_killed()
+    """
+
+  def run_starting(self):
+    """
+    See taskrun.Observer.run_starting()
+    """
+
+  def run_complete(self):
+    """
+    See taskrun.Observer.run_complete()
+    """
+    self.save()
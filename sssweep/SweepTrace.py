@@ -0,0 +1,213 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+import heapq
+import json
+import threading
+import time
+
+from .SweepObserver import SweepObserver
+
+class SweepTrace(SweepObserver):
+  """
+  This is a SweepObserver recording the task creation phases and the lifecycle
+  of every task. It is written in the trace event format of chrome://tracing
+  and Perfetto: the phases are a timeline of create_tasks(), the tasks run on
+  as many lanes as ran concurrently, and a counter tracks the running tasks.
+  """
+
+  def __init__(self):
+    """
+    Constructs a SweepTrace object
+    """
+    self._lock = threading.Lock()
+    self._start = time.time()
+    self._phases = []
+    self._phase_starts = {}
+    self._tasks = {}
+    self._run = [None, None]
+
+  def _now(self):
+    # microseconds since the trace started
+    return int((time.time() - self._start) * 1e6)
+
+  def phase_started(self, phase):
+    """
+    See SweepObserver.phase_started()
+    """
+    self._phase_starts[phase] = self._now()
+
+  def phase_finished(self, phase, stats):
+    """
+    See SweepObserver.phase_finished()
+    """
+    start = self._phase_starts.pop(phase)
+    self._phases.append({'phase': phase, 'start': start,
+                         'end': self._now(), 'stats': dict(stats)})
+
+  def task_queued(self, name):
+    """
+    See SweepObserver.task_queued()
+    """
+    with self._lock:
+      self._tasks[name] = {'queued': self._now(), 'started': None,
+                           'finished': None, 'status': None,
+                           'bytes_written': None}
+
+  def task_started(self, name):
+    """
+    See SweepObserver.task_started()
+    """
+    with self._lock:
+      self._tasks[name]['started'] = self._now()
+
+  def task_finished(self, name, status, bytes_written):
+    """
+    See SweepObserver.task_finished()
+    """
+    with self._lock:
+      task = self._tasks[name]
+      task['finished'] = self._now()
+      task['status'] = status
+      task['bytes_written'] = bytes_written
+
+  def run_started(self):
+    """
+    See SweepObserver.run_started()
+    """
+    self._run[0] = self._now()
+
+  def run_finished(self):
+    """
+    See SweepObserver.run_finished()
+    """
+    self._run[1] = self._now()
+
+  def phases(self):
+    """
+    This returns the recorded phases in order as dicts with the phase name, the
+    start and end times (microseconds since the trace started) and the stats
+    (see SweepObserver.phase_finished())
+    """
+    return list(self._phases)
+
+  def tasks(self):
+    """
+    This returns a dict of task name to its queued, started and finished times
+    (microseconds since the trace started, None until they happen), status and
+    bytes written
+    """
+    with self._lock:
+      return {x_name: dict(y_task) for x_name, y_task in self._tasks.items()}
+
+  def events(self):
+    """
+    This returns the list of trace events
+    """
+    events = [
+      {'ph': 'M', 'pid': 1, 'name': 'process_name',
+       'args': {'name': 'create_tasks'}},
+      {'ph': 'M', 'pid': 2, 'name': 'process_name',
+       'args': {'name': 'run_tasks'}}
+    ]
+
+    # task creation phases
+    for phase in self._phases:
+      events.append({'ph': 'X', 'pid': 1, 'tid': 0, 'cat': 'phase',
+                     'name': phase['phase'], 'ts': phase['start'],
+                     'dur': phase['end'] - phase['start'],
+                     'args': phase['stats']})
+
+    # tasks on the first free lane
+    tasks = self.tasks()
+    run_start = self._run[0]
+    ran = sorted([(y_task['started'], x_name) for x_name, y_task
+                  in tasks.items() if y_task['started'] is not None])
+    free = []
+    lanes = 0
+    busy = []
+    counts = []
+    for started, name in ran:
+      task = tasks[name]
+      finished = task['finished']
+      if finished is None:
+        # still running (e.g. the trace was written during the run)
+        finished = self._now()
+      while busy and busy[0][0] <= started:
+        heapq.heappush(free, heapq.heappop(busy)[1])
+      if free:
+        lane = heapq.heappop(free)
+      else:
+        lanes += 1
+        lane = lanes
+      heapq.heappush(busy, (finished, lane))
+      queued = task['queued']
+      if run_start is not None:
+        queued = max(queued, run_start)
+      events.append({'ph': 'X', 'pid': 2, 'tid': lane,
+                     'cat': name.split('_', 1)[0], 'name': name,
+                     'ts': started, 'dur': finished - started,
+                     'args': {'status': task['status'],
+                              'waited_us': started - queued,
+                              'bytes_written': task['bytes_written']}})
+      counts.append((started, 1))
+      counts.append((finished, -1))
+
+    # tasks that never started
+    for name, task in sorted(tasks.items()):
+      if task['started'] is None and task['finished'] is not None:
+        events.append({'ph': 'i', 'pid': 2, 'tid': 0, 's': 't',
+                       'cat': name.split('_', 1)[0], 'name': name,
+                       'ts': task['finished'],
+                       'args': {'status': task['status'],
+                                'bytes_written': task['bytes_written']}})
+
+    # running tasks
+    running = 0
+    for ts, delta in sorted(counts):
+      running += delta
+      events.append({'ph': 'C', 'pid': 2, 'name': 'running', 'ts': ts,
+                     'args': {'tasks': running}})
+    return events
+
+  def write(self, filename):
+    """
+    This writes the trace to a JSON file, which can be loaded into a timeline
+    viewer (chrome://tracing, Perfetto)
+
+    Args:
+      filename    : trace file
+    """
+    with open(filename, 'w') as fd_trace:
+      json.dump({'traceEvents': self.events(), 'displayTimeUnit': 'ms'},
+                fd_trace)
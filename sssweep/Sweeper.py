@@ -31,12 +31,33 @@
 
 from __future__ import (absolute_import, division,
                         print_function, unicode_literals)
+import bisect
+import functools
+import hashlib
+import json
 import os
-import copy
-import ssplot
-import taskrun
+import time
+import tracemalloc
+from .Codec import Codec
+from .ConfigIndex import ConfigIndex
+from .LatencyParser import LatencyParser
+from .lazy_import import lazy_import
+from .Replication import Replication
+from .ResourceModel import ResourceModel
+from .Sampler import Sampler
+from .Results import Results
+from .SimCache import SimCache
+from .SweepObserver import TaskBridge
+from .SweepReport import SweepReport
+from .SweepState import SweepState
+from .TaskLog import TaskLog
 from .web_viewer_gen import *
 
+# loaded on first use
+handycsv = lazy_import('handycsv')
+ssplot = lazy_import('ssplot')
+taskrun = lazy_import('taskrun')
+
 class Sweeper(object):
 
   def __init__(self, supersim_path, settings_path, sslatency_path, out_dir,
@@ -45,8 +66,19 @@ class Sweeper(object):
                latency_mode='Packet',
                sim=True, parse=True,
                qplot=True, lplot=True, cplot=True,
-               web_viewer=True,
-               get_resources=None):
+               web_viewer=True, results=False,
+               get_resources=None,
+               sim_cache=None, sim_cache_size=None,
+               stream=False, stream_keep_mpf=False,
+               rate_log=True, channel_log=True,
+               plot_workers=None, cplot_multi_field=False,
+               layout='flat', resource_model=None, resource_margin=1.25,
+               resource_headroom=0.25, longest_first=False, observers=None,
+               sampling='full', samples=None, sampling_seed=0,
+               incremental=False, hash_database=None,
+               response_files=False, scratch=None, scratch_size=1,
+               scratch_keep=False, mpf_retention='keep', mpf_keep_fraction=0,
+               codec='gzip', parse_engine='sslatency', work_queue=None):
     """
     Constructs a Sweeper object
 
@@ -64,7 +96,59 @@ class Sweeper(object):
       sim, parse          : bools to enable/disable sim and parsing
       qplot, lplot, cplot : bools to enable/disable plots (quad, load, compare)
       web_viewer          : bool to enable/disable web viewer generation
+      results             : bool to enable/disable the columnar results store
       get_resources       : pointer to set resource function for tasks
+      sim_cache           : location of a simulation cache shared by sweeps
+      sim_cache_size      : maximum size of the simulation cache (GiB)
+      stream              : parse the message log through a named pipe while
+                            simulating instead of writing it to disk
+      stream_keep_mpf     : also compress the streamed message log to disk
+      rate_log            : bool to enable/disable the simulation rate log
+      channel_log         : bool to enable/disable the simulation channel log
+      plot_workers        : number of warm processes rendering all plots
+                            (None runs each plot as its own process)
+      cplot_multi_field   : render all latency distributions of a cplot in a
+                            single task that reads the aggregates once
+      layout              : 'flat' or 'sharded' output directories
+      resource_model      : file of a model learning the memory of sims from
+                            their usage logs (see get_resources())
+      resource_margin     : factor applied to the predicted memory of sims
+      resource_headroom   : memory (GiB) added to the predicted memory of sims
+      longest_first       : start the sims with the longest estimated run time
+                            first (see _set_sim_priorities())
+      observers           : list of SweepObservers instrumenting the task
+                            creation phases and the tasks (e.g. SweepTrace)
+      sampling            : 'full' factorial or sampled non-load configs
+                            ('random', 'lhs', 'fractional', see Sampler)
+      samples             : number of non-load configs to sample
+      sampling_seed       : seed of the random sampling modes
+      incremental         : only create the tasks that changed since the
+                            previous run of the sweep (see SweepState)
+      hash_database       : file of a database of content hashes, tasks are
+                            up to date when the content of their inputs and
+                            their command are unchanged instead of comparing
+                            modification times (see HashDatabase)
+      response_files      : give lplots and cplots their input files in a
+                            response file written when they run, so their
+                            commands don't grow with the sweep
+      scratch             : location of a local scratch directory (e.g.
+                            /dev/shm) where each sim stages its outputs and
+                            is parsed, only the final files are moved to
+                            out_dir
+      scratch_size        : scratch space (GiB) of each sim, requested as the
+                            'scratch' resource of the sim tasks
+      scratch_keep        : also move the message log out of the scratch
+      mpf_retention       : what becomes of message logs once parsed, 'keep',
+                            'delete' or 'archive' (recompressed with xz)
+      mpf_keep_fraction   : fraction of the runs keeping their message log as
+                            is when they are deleted or archived
+      codec               : compression of the data files, 'gzip', 'none',
+                            'zstd' or 'lz4' (see Codec)
+      parse_engine        : 'sslatency' runs the sslatency binary, 'numpy'
+                            parses in process (see LatencyParser)
+      work_queue          : shared directory of a work queue running the
+                            process tasks on workers of any host (see
+                            WorkQueue)
     """
     # paths
     self._supersim_path = os.path.abspath(os.path.expanduser(supersim_path)) # '../supersim/bin/supersim'
@@ -88,14 +172,119 @@ class Sweeper(object):
     self._lplot = lplot
     self._cplot = cplot
     self._web_viewer = web_viewer
+    self._results = results
     self._get_resources = get_resources
 
+    # plotting engine
+    self._plot_pool = None
+    if plot_workers is not None:
+      from .PlotPool import PlotPool
+      self._plot_pool = PlotPool(plot_workers)
+    self._cplot_multi_field = cplot_multi_field
+    self._response_files = response_files
+
+    # distributed execution
+    self._work_queue = None
+    if work_queue is not None:
+      from .WorkQueue import WorkQueue
+      self._work_queue = WorkQueue(work_queue)
+
+    # resource model predicting the memory of sims
+    self._resource_model = None
+    self._resource_margin = resource_margin
+    self._resource_headroom = resource_headroom
+    self._base_resources = get_resources
+    if resource_model is not None:
+      self._resource_model = ResourceModel(resource_model, self._out_dir)
+      self._get_resources = self.get_resources
+
+    # instrumentation
+    self._observers = list(observers) if observers is not None else []
+    self._task_outputs = {}
+    self._task_log = None
+    self._bridge = None
+
+    # incremental sweep
+    self._incremental = incremental
+    self._state = None
+    self._stale = {}
+    self._stale_ids = set()
+
+    # content hash up-to-date checks
+    self._hash_db = None
+    if hash_database is not None:
+      from .HashDatabase import HashDatabase
+      self._hash_db = HashDatabase(
+        os.path.abspath(os.path.expanduser(hash_database)))
+
+    # sims are spread over priority levels below the other tasks
+    self._sim_levels = 8 if longest_first else 1
+
+    # output layout
+    assert layout in ['flat', 'sharded'], "Invalid layout!"
+    self._layout = layout
+    self._manifest = {}
+    self._shards = set()
+
+    # simulation logs
+    self._rate_log = rate_log
+    self._channel_log = channel_log
+    self._codec = Codec(codec)
+
+    # streaming sim and parse
+    self._stream = stream
+    self._stream_keep_mpf = stream_keep_mpf
+
+    # staging sim and parse in scratch space, per sweep
+    self._scratch = None
+    if scratch is not None:
+      assert not stream, "Streaming sims don't need scratch space!"
+      self._scratch = os.path.join(
+        os.path.abspath(os.path.expanduser(scratch)), 'sssweep_{0}'.format(
+          hashlib.sha1(self._out_dir.encode('utf-8')).hexdigest()[:12]))
+    self._scratch_size = scratch_size
+    self._scratch_keep = scratch_keep
+    # sims parse their own message log
+    self._fused = stream or scratch is not None
+
+    # parse engine
+    assert parse_engine in ['sslatency', 'numpy'], "Invalid parse engine!"
+    self._latency_parser = None
+    if parse_engine == 'numpy':
+      assert not self._fused, "Streaming and staging parse with sslatency!"
+      self._latency_parser = LatencyParser(latency_mode, parse_scalar)
+
+    # message log retention
+    assert mpf_retention in ['keep', 'delete', 'archive'], \
+      "Invalid message log retention!"
+    self._mpf_retention = mpf_retention
+    self._mpf_keep_fraction = mpf_keep_fraction
+
+    # simulation cache
+    self._sim_cache = None
+    if sim_cache is not None:
+      self._sim_cache = SimCache(sim_cache, sim_cache_size)
+
     # load sweep values
     self._start = None
     self._stop = None
     self._step = None
+    self._saturation = None
+    self._saturation_field = None
+    self._load_active = {}
+
+    # replicated runs
+    self._replication = None
+    self._replica_needed = {}
 
     self._variables = []
+    self._constraints = []
+    self._valid = None
+    self._codes = None
+    self._sampler = None
+    if sampling != 'full':
+      self._sampler = Sampler(sampling, samples, sampling_seed)
+    self._plots = set()
     self._created = False
     self._load_variable = None
     self._load_name = None
@@ -108,6 +297,13 @@ class Sweeper(object):
     # store tasks
     self._sim_tasks = {}
     self._parse_tasks = {}
+    self._sim_cache_tasks = {}
+    self._sim_cache_stores = {}
+    self._sim_cache_fetches = {}
+    self._sim_cache_hits = set()
+    self._sim_cache_base = None
+    self._sim_cache_parsed = None
+    self._results_store = None
 
     # ensure the settings file exists
     if not os.path.isfile(self._settings_path):
@@ -159,7 +355,8 @@ class Sweeper(object):
       except:
         self._error('couldn\'t create {0}'.format(web_viewer_f))
 
-  def add_loads(self, name, short_name, start, stop, step, set_command):
+  def add_loads(self, name, short_name, start, stop, step, set_command,
+                saturation=None, saturation_field='Mean'):
     """
     This creates and adds the load sweep variable to _load_variable
 
@@ -168,6 +365,9 @@ class Sweeper(object):
       shortname         : acronym of sweep variable for filename
       start, stop, step : load sweep start stop and step
       set_command       : pointer to command function
+      saturation        : enables adaptive loads, skip the higher loads once
+                          latency exceeds this multiple of the first load's
+      saturation_field  : latency statistic compared for saturation
     """
     # build the variable
     loads = ['{0:.02f}'.format(x_values/100)
@@ -181,8 +381,35 @@ class Sweeper(object):
     self._start = start
     self._stop = stop
     self._step = step
+    self._saturation = saturation
+    self._saturation_field = saturation_field
 
-  def add_variable(self, name, short_name, values, set_command, compare=True):
+  def add_replicas(self, name, short_name, max_replicas, set_command,
+                   min_replicas=3, statistic='Mean', tolerance=0.05,
+                   confidence=0.95):
+    """
+    This enables replicated runs of every config with different seeds. The
+    replicas are added until the confidence interval of a latency statistic is
+    within a tolerance of its mean, and their statistics are combined into the
+    aggregate file of the config (see Replication).
+
+    Args:
+      name          : name of the seed variable
+      short_name    : acronym of the seed variable for filename
+      max_replicas  : maximum number of replicas of a config
+      set_command   : pointer to command function setting the seed
+      min_replicas  : number of replicas always simulated (in parallel)
+      statistic     : latency statistic of the confidence interval
+      tolerance     : maximum half width of the confidence interval relative
+                      to the mean of the statistic
+      confidence    : confidence level of the interval
+    """
+    self._replication = Replication(name, short_name, max_replicas,
+                                    set_command, min_replicas, statistic,
+                                    tolerance, confidence)
+
+  def add_variable(self, name, short_name, values, set_command, compare=True,
+                   constraint=None):
     """
     This adds a sweep variable to the config variable
 
@@ -192,6 +419,8 @@ class Sweeper(object):
       values        : values of variable to sweep through
       set_command    : pointer to command function
       compare       : should this variable be compared in cplot
+      constraint    : pointer to constraint function (value, config) returning
+                      False for the configs to prune (see add_constraint())
     """
     # checks to enable dict format for web display
     if isinstance(values, dict):
@@ -206,81 +435,49 @@ class Sweeper(object):
                  'values_dic': dictvals}
     # add the variable
     self._variables.append(configall)
+    if constraint is not None:
+      self.add_constraint(functools.partial(self._check_variable, name,
+                                            constraint))
 
-  def _dim_iter(self, do_vars=None, dont=None):
+  def add_values(self, name, values):
     """
-    This function creates the config files with the permutations of the sweep
-    variables
+    This adds values to a sweep variable, e.g. to extend the sweep and create
+    its tasks again
 
     Args:
-      do_vars           : variables to iterate through
-      dont         : variables to remove from iteration
+      name          : name of sweep variable
+      values        : values to add (dict if the variable was given a dict)
     """
+    for var in self._variables:
+      if var['name'] == name:
+        assert var is not self._load_variable, "Use add_loads for loads!"
+        assert (var['values_dic'] is None) != isinstance(values, dict)
+        var['values'].extend([x_val for x_val in values
+                              if x_val not in var['values']])
+        if var['values_dic'] is not None:
+          var['values_dic'].update(values)
+        return
+    assert False, "Unknown variable {0}!".format(name)
+
+  def add_constraint(self, constraint):
+    """
+    This adds a constraint pruning configs from the sweep before any task is
+    created. Pruned configs are not simulated, plots omit them and the web
+    viewer greys them out.
 
-    tmp_vars = []
-    # All variables
-    if do_vars is None:
-      tmp_vars = copy.deepcopy(self._variables) #Adds all
-    else:
-      for var in copy.deepcopy(self._variables):
-        if var['name'] in do_vars: # add only dos
-          tmp_vars.append(var)
-
-    # remove variables
-    vars_all = []
-    for var in tmp_vars:
-      if dont is None or var['name'] not in dont:
-        vars_all.append(var) # add only variables not in dont
-
-    # reverse the order
-    vars_all = list(reversed(vars_all))
-
-    # find value lengths
-    widths = []
-    for var in vars_all:
-      widths.append(len(var['values']))
-
-    # find top non-single value variable
-    top_non_one = None
-    for dim in reversed(range(len(widths))):
-      if widths[dim] is not 1:
-        top_non_one = dim
-        break
-
-    # generate all indices
-    cur = [0] * len(widths)
-    more = True
-    while more:
-      # yield the configuration
-      config = []
-      for dim in reversed(range(len(cur))):
-        variable = vars_all[dim]
-        config.append({
-          'name': variable['name'],
-          'short_name': variable['short_name'],
-          'value': variable['values'][cur[dim]],
-          'command': variable['command'],
-          'compare': variable['compare']
-        })
-      yield config
-
-      # detect only one config
-      if top_non_one is None:
-        more = False
-        break
-
-      # advance the generator
-      for dim in range(len(widths)):
-        if cur[dim] == widths[dim] - 1:
-          if dim == top_non_one:
-            more = False
-            break
-          else:
-            cur[dim] = 0
+    Args:
+      constraint    : pointer to constraint function (config) returning False
+                      for the configs to prune. The config is the same as the
+                      one given to the set commands.
+    """
+    self._constraints.append(constraint)
 
-        else:
-          cur[dim] += 1
-          break
+  @staticmethod
+  def _check_variable(name, constraint, config):
+    for var in config:
+      if var['name'] == name:
+        return constraint(var['value'], config)
+    assert False
 
   def _error(self, msg, code=-1):
     if msg:
@@ -366,27 +563,6 @@ class Sweeper(object):
         title = '"{0} Cmp ({1} [{2}])"'.format(cvar['short_name'], title, lat_dist)
     return title
 
-  def _create_config(self, *args):
-    """
-    This creates ordered config from multiple sub-configs
-
-    Args:
-      *   : configs to combine
-    """
-    # vars to return
-    combined = []
-    for var in copy.deepcopy(self._variables):
-      for config in args:
-        found = False
-        for var2 in config:
-          if var2['name'] == var['name']:
-            found = True
-            combined.append(copy.deepcopy(var2))
-            break
-        if found:
-          break
-    return combined
-
   def _cmd_clean(self, cmd):
     """
     This adds leading space to input commands
@@ -408,46 +584,130 @@ class Sweeper(object):
       id_task   : id_task to generate files for
     """
     dir_var = self._out_dir
-    return {
+    shard, stem = self._shard(id_task)
+    data_dir = os.path.join(dir_var, 'data', shard)
+    logs_dir = os.path.join(dir_var, 'logs', shard)
+    plots_dir = os.path.join(dir_var, 'plots', shard)
+    web_dir = os.path.join(dir_var, 'web_viewer')
+    mpf_ext = self._codec.mpf_ext
+    csv_ext = self._codec.csv_ext
+    files = {
       'messages_mpf'  : os.path.join(
-        dir_var, 'data', 'messages_{0}.mpf.gz'.format(id_task)),
-      'rates_csv'     : os.path.join(
-        dir_var, 'data', 'rates_{0}.csv.gz'.format(id_task)),
-      'channels_csv'  : os.path.join(
-        dir_var, 'data', 'channels_{0}.csv.gz'.format(id_task)),
+        data_dir, 'messages_{0}{1}'.format(stem, mpf_ext)),
+      'messages_fifo' : os.path.join(
+        data_dir, 'messages_{0}.fifo'.format(stem)),
+      'messages_xz'   : os.path.join(
+        data_dir, 'messages_{0}.mpf.xz'.format(stem)),
       'latency_csv'   : os.path.join(
-        dir_var, 'data', 'latency_{0}.csv.gz'.format(id_task)),
+        data_dir, 'latency_{0}{1}'.format(stem, csv_ext)),
       'aggregate_csv' : os.path.join(
-        dir_var, 'data', 'aggregate_{0}.csv.gz'.format(id_task)),
+        data_dir, 'aggregate_{0}{1}'.format(stem, csv_ext)),
       'usage_log'     : os.path.join(
-        dir_var, 'logs', 'usage_{0}.log'.format(id_task)),
+        logs_dir, 'usage_{0}.log'.format(stem)),
       'simout_log'    : os.path.join(
-        dir_var, 'logs', 'simout_{0}.log'.format(id_task)),
+        logs_dir, 'simout_{0}.log'.format(stem)),
       'qplot_png'     : os.path.join(
-        dir_var, 'plots', 'qplot_{0}.png'.format(id_task)),
+        plots_dir, 'qplot_{0}.png'.format(stem)),
       'lplot_png'     : os.path.join(
-        dir_var, 'plots', 'lplot_{0}.png'.format(id_task)),
+        plots_dir, 'lplot_{0}.png'.format(stem)),
       'cplot_png'     : os.path.join(
-        dir_var, 'plots', 'cplot_{0}.png'.format(id_task)),
+        plots_dir, 'cplot_{0}.png'.format(stem)),
       'html'          : os.path.join(
-        dir_var, 'web_viewer', 'plots.html'),
+        web_dir, 'plots.html'),
       'javascript'    : os.path.join(
-        dir_var, 'web_viewer', 'dynamic_plot.js'),
+        web_dir, 'dynamic_plot.js'),
       'css'           : os.path.join(
-        dir_var, 'web_viewer', 'style.css'),
+        web_dir, 'style.css'),
       'javascript_in' : 'dynamic_plot.js',
-      'css_in'        : 'style.css'
+      'css_in'        : 'style.css',
+      'report_html'   : os.path.join(
+        web_dir, 'report.html'),
+      'report_json'   : os.path.join(
+        web_dir, 'report.json'),
+      'report_configs_csv' : os.path.join(
+        web_dir, 'report_configs.csv'),
+      'report_aggregates_csv' : os.path.join(
+        web_dir, 'report_aggregates.csv'),
+      'results'       : os.path.join(
+        dir_var, 'data', 'results'),
+      'replicas_json' : os.path.join(
+        data_dir, 'replicas_{0}.json'.format(stem))
     }
+    # staging directory of the sim
+    if self._scratch is not None:
+      files['scratch_dir'] = os.path.join(self._scratch, stem)
+    # optional simulation logs
+    if self._rate_log:
+      files['rates_csv'] = os.path.join(
+        data_dir, 'rates_{0}{1}'.format(stem, csv_ext))
+    if self._channel_log:
+      files['channels_csv'] = os.path.join(
+        data_dir, 'channels_{0}{1}'.format(stem, csv_ext))
+    return files
+
+  def _shard(self, id_task):
+    """
+    This returns the shard subdirectory and the file name stem of an id_task. In
+    the sharded layout ids are spread over 256 subdirectories by hash, and ids
+    too long for a file name are named by their hash. The flat layout uses the
+    output directories and the id as is.
+
+    Args:
+      id_task   : id_task to generate files for
+    """
+    if self._layout == 'flat' or not id_task:
+      return '', id_task
+    entry = self._manifest.get(id_task)
+    if entry is None:
+      digest = hashlib.sha1(id_task.encode('utf-8')).hexdigest()
+      stem = id_task if len(id_task) <= 200 else digest
+      entry = (digest[:2], stem)
+      self._manifest[id_task] = entry
+      if entry[0] not in self._shards:
+        for sub_dir in ['data', 'logs', 'plots']:
+          shard_f = os.path.join(self._out_dir, sub_dir, entry[0])
+          if not os.path.isdir(shard_f):
+            os.makedirs(shard_f, exist_ok=True)
+        self._shards.add(entry[0])
+    return entry
+
+  def _write_manifest(self):
+    """
+    This writes the manifest mapping every id_task to its shard subdirectory
+    and file name stem. Files are named <dir>/<shard>/<kind>_<stem><ext>.
+    """
+    manifest = {
+      'layout': self._layout,
+      'ids': {x_id: '/'.join(y_entry)
+              for x_id, y_entry in sorted(self._manifest.items())}
+    }
+    with open(os.path.join(self._out_dir, 'manifest.json'), 'w') as fd_man:
+      json.dump(manifest, fd_man, indent=1, sort_keys=True)
 
   def create_tasks(self, tm_var):
     """
-    This creates all the tasks
+    This creates all the tasks. It can be called again after the sweep was
+    extended (e.g. add_values()), with a new task manager.
     """
-    # task created only once
-    assert not self._created, "Task already created! Fail!"
     self._created = True
+    self._sim_tasks = {}
+    self._parse_tasks = {}
+    self._sim_cache_tasks = {}
+    self._sim_cache_stores = {}
+    self._sim_cache_fetches = {}
+    self._sim_cache_hits = set()
+    self._load_active = {}
+    self._replica_needed = {}
+    self._task_outputs.clear()
+    self._plots = set()
+    self._valid = None
+    self._comp_var_count = 0
+    self._stale = {}
+    self._stale_ids = set()
 
-    # add load to _variables
+    # add load to _variables, last
+    if self._load_variable in self._variables:
+      self._variables.remove(self._load_variable)
     self._variables.append(self._load_variable)
 
     # check for unique names
@@ -459,93 +719,1117 @@ class Sweeper(object):
     assert len(x_values) == len(set(x_values)), "Not unique names!"
     assert len(y_values) == len(set(y_values)), "Not unique short names!"
 
+    # index all configs
+    self._index = ConfigIndex(self._variables,
+                              precompute=self._sampler is None)
+    self._load_dim = self._index.dims(self._load_name)[0]
+    self._load_stride = self._index.stride(self._load_dim)
+    self._load_offsets = self._index.offsets([self._load_dim])
+
+    # sample and prune the configs
+    if self._sampler is not None:
+      self._valid = self._sample()
+    elif self._constraints:
+      self._valid = set([x_code for x_code in range(self._index.size)
+                         if self._is_allowed(x_code)])
+    if self._valid is not None:
+      assert len(self._valid) > 0, "All configs pruned!"
+      self._codes = sorted(self._valid)
+      print("Sweeping {0} of {1} configs".format(len(self._codes),
+                                                 self._index.size))
+    else:
+      self._codes = range(self._index.size)
+
+    # streaming and staging parse as part of the sim
+    if self._fused:
+      assert self._sim and self._parse, "Fused sims need sim and parse!"
+
+    # adaptive loads need the parsed latency of each load
+    if self._saturation is not None:
+      assert self._sim and self._parse, "Adaptive loads need sim and parse!"
+
+    # incremental sweeps only create the tasks that changed
+    self._state = None
+    if self._incremental:
+      self._state = SweepState(os.path.join(self._out_dir,
+                                            'sweep_state.json'))
+      tm_var.add_observer(self._state)
+      self._plan_runs()
+
+    # the plot workers stop when the run completes
+    if self._plot_pool is not None:
+      tm_var.add_observer(self._plot_pool)
+
+    # record the hashes of the tasks that finish
+    if self._hash_db is not None:
+      tm_var.add_observer(self._hash_db)
+
+    # bridge the task events to the observers and the log of the report
+    self._task_log = TaskLog()
+    self._bridge = TaskBridge(self._observers + [self._task_log],
+                              self._task_outputs)
+    tm_var.add_observer(self._bridge)
+    if self._observers:
+      traced = tracemalloc.is_tracing()
+      if not traced:
+        tracemalloc.start()
+
     # generate tasks
     if self._sim:
       print("Creating simulation tasks")
-      self._create_sim_tasks(tm_var)
+      self._run_phase('sim', self._create_sim_tasks, tm_var)
     if self._parse:
       print("Creating parsing tasks")
-      self._create_parse_tasks(tm_var)
+      self._run_phase('parse', self._create_parse_tasks, tm_var)
+    if self._results:
+      print("Creating results tasks")
+      self._run_phase('results', self._create_results_tasks, tm_var)
     if self._qplot:
       print("Creating qplot tasks")
-      self._create_qplot_tasks(tm_var)
+      self._run_phase('qplot', self._create_qplot_tasks, tm_var)
     if self._lplot:
       print("Creating lplot tasks")
-      self._create_lplot_tasks(tm_var)
+      self._run_phase('lplot', self._create_lplot_tasks, tm_var)
     if self._cplot:
       print("Creating cplot tasks")
-      self._create_cplot_tasks(tm_var)
+      self._run_phase('cplot', self._create_cplot_tasks, tm_var)
     if self._web_viewer:
       print("Creating web_viewer")
-      self._create_web_viewer_task()
+      self._run_phase('web_viewer', self._create_web_viewer_task)
+    if self._observers and not traced:
+      tracemalloc.stop()
+    if self._layout == 'sharded':
+      self._write_manifest()
+
+  def _plan_runs(self):
+    """
+    This finds the tasks of the runs of an incremental sweep that must be
+    created: the sims, parses and combines that changed, and those following
+    them in the chains of adaptive loads and replicas as their conditions
+    depend on the previous results. Their ids are stale.
+    """
+    for code in self._codes:
+      plan_config = self._index.config(code)
+      id_task = self._index.task_id(code)
+      runs = self._runs(code)
+      # adaptive loads follow the previous load
+      prev_code = self._prev_load(code)
+      stale = (self._saturation is not None and prev_code is not None and
+               self._index.task_id(prev_code) in self._stale_ids)
+      for replica, id_run in enumerate(runs):
+        files = self._get_files(id_run)
+        # replicas past the minimum follow the previous replica
+        run_stale = stale or (self._replication is not None and
+                              replica >= self._replication.min_replicas and
+                              runs[replica - 1] in self._stale_ids)
+        gates = self._gates(replica)
+        if self._sim:
+          sim_cmd = self._sim_cmd(files,
+                                  self._run_config(plan_config, replica))[0]
+          run_stale = self._is_stale('sim_{0}'.format(id_run), run_stale,
+                                     sim_cmd, *gates)
+        if self._parse and not self._fused:
+          run_stale = self._is_stale(
+            'parse_{0}'.format(id_run), run_stale,
+            self._parse_mpf_cmd(files) if self._latency_parser is None else
+            [files['messages_mpf'], self._latency_mode,
+             str(self._parse_scalar)], *gates)
+        if run_stale:
+          self._stale_ids.add(id_run)
+      if self._replication is not None:
+        if self._is_stale('combine_{0}'.format(id_task),
+                          any([x_id in self._stale_ids for x_id in runs]),
+                          runs, self._replication.parameters):
+          self._stale_ids.add(id_task)
+
+  def _gates(self, replica=0):
+    """
+    This returns the settings deciding whether the tasks of a run are skipped
+    (adaptive loads and replicas), which are part of their signatures
+
+    Args:
+      replica       : replica of the run
+    """
+    gates = []
+    if self._saturation is not None:
+      gates += [self._saturation, self._saturation_field]
+    if (self._replication is not None and
+        replica >= self._replication.min_replicas):
+      gates.append(self._replication.parameters)
+    return gates
+
+  def _is_stale(self, name, stale, *parts):
+    """
+    This checks whether a task is created. Incremental sweeps skip the tasks
+    that are done with the same signature, unless stale (a task they depend
+    on is created).
+
+    Args:
+      name          : task name
+      stale         : the task depends on a task that is created
+      *             : parts of the signature of the task (see SweepState)
+    """
+    if self._state is None:
+      return True
+    if name in self._stale:
+      return True
+    signature = SweepState.signature(*parts)
+    if not stale and self._state.is_done(name, signature):
+      return False
+    self._stale[name] = signature
+    return True
+
+  def _is_planned(self, name):
+    """
+    This checks whether a task of a run is created (see _plan_runs())
+
+    Args:
+      name          : task name
+    """
+    return self._state is None or name in self._stale
+
+  def _skip(self, task):
+    """
+    This records that a task is skipped by adaptive loads or replicas, an
+    incremental sweep doesn't count it as done (see SweepState.skip())
+
+    Args:
+      task          : task
+    """
+    if self._state is not None:
+      self._state.skip(task)
+
+  def _track_state(self, task):
+    """
+    This records a task created by an incremental sweep in its state
+
+    Args:
+      task          : task
+    """
+    if self._state is not None:
+      self._state.track(task, self._stale[task.name])
+
+  def _file_condition(self, task, inputs, outputs, hashed=None):
+    """
+    This creates the condition running a task when its outputs are out of date,
+    by modification time or by content hash with a hash database
+
+    Args:
+      task          : task
+      inputs        : input files of the task
+      outputs       : output files of the task
+      hashed        : files hashed as the inputs (default: inputs)
+    """
+    condition = taskrun.FileModificationCondition(inputs, outputs)
+    if self._hash_db is not None:
+      from .HashDatabase import HashCondition
+      condition = HashCondition(self._hash_db, task,
+                                inputs if hashed is None else hashed, outputs,
+                                condition)
+    if self._sim_cache is not None:
+      # outputs linked with the cache are written as new files
+      condition = taskrun.FunctionCondition(self._check_unshared, outputs,
+                                            condition)
+    return condition
+
+  @staticmethod
+  def _check_unshared(outputs, condition):
+    if not condition.check():
+      return False
+    SimCache.unshare(outputs)
+    return True
+
+  @staticmethod
+  def _add_dependency(task, tasks, id_task):
+    """
+    This adds the dependency of a task on the task of an id, if it was created
+
+    Args:
+      task          : task
+      tasks         : dict of id to task
+      id_task       : id of the task depended on
+    """
+    if id_task in tasks:
+      task.add_dependency(tasks[id_task])
+
+  def _is_allowed(self, code):
+    """
+    This checks whether a config passes all the constraints
+
+    Args:
+      code          : config code
+    """
+    config = self._index.config(code)
+    return all([x_con(config) for x_con in self._constraints])
+
+  def _sample(self):
+    """
+    This samples the non-load configs, each is simulated at all loads allowed by
+    the constraints. Returns the set of codes of the sweep.
+    """
+    dims = self._index.dims(dont=self._load_name)
+    widths = self._index.widths
+    strides = [self._index.stride(x_dim) for x_dim in dims]
+    allowed = {}
+
+    def loads(values):
+      # the allowed loads of a non-load config
+      if values not in allowed:
+        base = sum([x_val * y_stride for x_val, y_stride
+                    in zip(values, strides)])
+        allowed[values] = [base + x_off for x_off in self._load_offsets
+                           if self._is_allowed(base + x_off)]
+      return allowed[values]
+
+    sampled = self._sampler.sample([widths[x_dim] for x_dim in dims],
+                                   lambda values: len(loads(values)) > 0)
+    return set([y_code for x_values in sampled for y_code in loads(x_values)])
+
+  def _bases(self, dims):
+    """
+    This returns the codes of the configs of the sweep that iterate through
+    every dimension except the given ones, which are held at index 0 (see
+    ConfigIndex.bases())
+
+    Args:
+      dims          : dimensions to hold fixed
+    """
+    if self._valid is None:
+      return self._index.bases(dims)
+    return sorted(set([x_code - sum([self._index.value_index(x_code, y_dim) *
+                                     self._index.stride(y_dim)
+                                     for y_dim in dims])
+                       for x_code in self._codes]))
+
+  def _run_phase(self, phase, create, *args):
+    """
+    This runs a task creation phase, instrumented when there are observers
+
+    Args:
+      phase         : name of the phase
+      create        : function creating the tasks
+      *             : arguments of create
+    """
+    if not self._observers:
+      create(*args)
+      return
+    for observer in self._observers:
+      observer.phase_started(phase)
+    self._bridge.begin_phase()
+    tracemalloc.reset_peak()
+    start = time.time()
+    create(*args)
+    elapsed = time.time() - start
+    tasks, command_bytes = self._bridge.end_phase()
+    stats = {
+      'elapsed': elapsed,
+      'tasks': tasks,
+      'command_bytes': command_bytes,
+      'peak_memory': tracemalloc.get_traced_memory()[1]
+    }
+    for observer in self._observers:
+      observer.phase_finished(phase, stats)
+
+  def _track_outputs(self, task, outputs):
+    """
+    This records the output files of a task to report the bytes it wrote
+
+    Args:
+      task          : task
+      outputs       : output files of the task
+    """
+    self._task_outputs[task.name] = list(outputs)
+
+  def results(self):
+    """
+    This returns the columnar results of the sweep (see Results). Configs are
+    included as soon as they are parsed.
+    """
+    return Results(self._get_files('')['results'])
+
+  def report(self):
+    """
+    This builds the performance report of the sweep: the status, wall time and
+    output bytes of every task that finished (sims, cache fetches, parses,
+    plots, ...), with the usage and simout logs of the sims, and their
+    aggregates per task kind and variable value. Sims with a usage log that
+    didn't run in this task manager are reported without status. It is written
+    next to the web viewer as report.html, report.json, report_configs.csv and
+    report_aggregates.csv, and returned as a SweepReport. Call it after the
+    tasks have run.
+    """
+    assert self._created, "Tasks must be created first!"
+    report = SweepReport([x_var['name'] for x_var in self._variables])
+    run_values = {}
+    for code in self._codes:
+      values = [x_var['value'] for x_var in self._index.config(code)]
+      for id_task in self._runs(code):
+        run_values[id_task] = values
+
+    def sim_metrics(id_task):
+      files = self._get_files(id_task)
+      if not os.path.isfile(files['usage_log']):
+        return None
+      metrics = SweepReport.parse_usage(files['usage_log'])
+      metrics['output_bytes'] = sum(
+        [os.path.getsize(x_file) for x_file in
+         self._sim_outputs(files).values() if os.path.isfile(x_file)])
+      if os.path.isfile(files['simout_log']):
+        metrics['simout_bytes'] = os.path.getsize(files['simout_log'])
+      return metrics
+
+    # the tasks are named <kind>_<id>, plots of several runs have no values
+    tasks = self._task_log.tasks()
+    for name, outcome in tasks.items():
+      kind, _, id_task = name.partition('_')
+      metrics = {'wall_s': outcome['wall_s'],
+                 'output_bytes': outcome['output_bytes']}
+      if kind == 'sim':
+        metrics.update(sim_metrics(id_task) or {})
+      report.add(id_task, kind, run_values.get(id_task), metrics,
+                 outcome['status'])
+    for id_task, values in run_values.items():
+      if 'sim_{0}'.format(id_task) not in tasks:
+        metrics = sim_metrics(id_task)
+        if metrics is not None:
+          report.add(id_task, 'sim', values, metrics)
+
+    files = self._get_files('')
+    report.write_json(files['report_json'])
+    report.write_csv(files['report_configs_csv'],
+                     files['report_aggregates_csv'])
+    report.write_html(files['report_html'], 'Sweep Report ({0})'.format(
+      os.path.basename(self._out_dir)))
+    return report
 
   def _create_sim_tasks(self, tm_var):
     # create config
-    for sim_config in self._dim_iter():
-      # make id & name
-      id_task = self._make_id(sim_config)
-      files = self._get_files(id_task)
-      sim_name = 'sim_{0}'.format(id_task)
-      # sim command
-      sim_cmd = ('/usr/bin/time -v -o {0} {1} {2} '
-                 'workload.message_log.file=string={3} '
-                 'workload.applications[0].rate_log.file=string={4} '
-                 'network.channel_log.file=string={5}'
-                ).format(
-                  files['usage_log'],
-                  self._supersim_path,
-                  self._settings_path,
-                  files['messages_mpf'],
-                  files['rates_csv'],
-                  files['channels_csv'])
-      #loop through each variable commands to add
-      for var in sim_config:
-        tmp_cmd = var['command'](var['value'], sim_config)
-        cmd = self._cmd_clean(tmp_cmd)
-        sim_cmd += cmd
-      # sim task
-      sim_task = taskrun.ProcessTask(tm_var, sim_name, sim_cmd)
-      sim_task.stdout_file = files['simout_log']
-      sim_task.stderr_file = files['simout_log']
-      if self._get_resources is not None:
-        sim_task.resources = self._get_resources('sim', sim_config)
-      sim_task.priority = 0
-      sim_task.add_condition(taskrun.FileModificationCondition(
-        [], [files['messages_mpf'], files['rates_csv'], files['channels_csv']]))
-      self._sim_tasks[id_task] = sim_task
+    for code in self._codes:
+      sim_config = self._index.config(code)
+      for replica, id_task in enumerate(self._runs(code)):
+        self._create_sim_task(tm_var, code, id_task, sim_config, replica)
+    if self._sim_levels > 1:
+      self._set_sim_priorities()
+
+  def _create_sim_task(self, tm_var, code, id_task, sim_config, replica):
+    """
+    This creates the sim task of a run of a config
+
+    Args:
+      tm_var        : task manager
+      code          : config code
+      id_task       : id of the run
+      sim_config    : config
+      replica       : replica of the run (0 without replication)
+    """
+    # make files & name
+    sim_name = 'sim_{0}'.format(id_task)
+    if not self._is_planned(sim_name):
+      return
+    files = self._get_files(id_task)
+    sim_cmd, overrides = self._sim_cmd(
+      files, self._run_config(sim_config, replica))
+    sim_outputs = self._sim_outputs(files)
+    # sim task
+    sim_task = self._process_task(tm_var, sim_name, sim_cmd)
+    sim_task.stdout_file = files['simout_log']
+    sim_task.stderr_file = files['simout_log']
+    sim_resources = self._sim_resources(sim_config, replica)
+    if sim_resources is not None:
+      sim_task.resources = sim_resources
+    sim_task.priority = 0
+    self._track_outputs(sim_task, sim_outputs.values())
+    self._track_state(sim_task)
+    # the settings change the outputs of sims
+    sim_fmc = self._file_condition(sim_task, [], list(sim_outputs.values()),
+                                   hashed=[self._settings_path])
+    if 'messages_mpf' in sim_outputs and self._reclaims(id_task):
+      # the parsed outputs stand in for the reclaimed message log
+      parsed = [y_file for x_role, y_file in sim_outputs.items()
+                if x_role != 'messages_mpf']
+      parsed += [files['latency_csv'], files['aggregate_csv']]
+      sim_fmc = taskrun.FunctionCondition(
+        self._check_reclaimed, files['messages_mpf'], sim_fmc,
+        self._file_condition(sim_task, [], parsed,
+                             hashed=[self._settings_path]))
+    if self._sim_cache is not None:
+      sim_fmc = self._create_sim_cache_task(
+        tm_var, code, id_task, sim_config, replica, sim_task, overrides,
+        self._cached_outputs(id_task, files, sim_outputs), sim_fmc)
+    sim_condition = self._run_condition(sim_task, code, replica, sim_fmc)
+    if self._resource_model is not None:
+      # resources are predicted with the latest usage when the sim starts
+      sim_condition = taskrun.FunctionCondition(
+        self._check_sim_resources, sim_task, sim_config, replica,
+        files['usage_log'], sim_condition)
+      self._create_usage_task(tm_var, id_task, sim_config, replica, sim_task,
+                              files)
+    sim_task.add_condition(sim_condition)
+    self._sim_tasks[id_task] = sim_task
+
+  def _sim_cmd(self, files, run_config):
+    """
+    This creates the sim command and returns it with its command modifiers
+
+    Args:
+      files         : files of the sim
+      run_config    : config of the run (see _run_config())
+    """
+    # staged sims write their outputs to scratch space
+    staged = files
+    if self._scratch is not None:
+      staged = self._staged_files(files)
+    sim_cmd = ('/usr/bin/time -v -o {0} {1} {2} '
+               'workload.message_log.file=string={3}'
+              ).format(
+                files['usage_log'],
+                self._supersim_path,
+                self._settings_path,
+                staged['messages_mpf' if self._codec.native and
+                       not self._stream else 'messages_fifo'])
+    if self._rate_log:
+      sim_cmd += (' workload.applications[0].rate_log.file=string={0}'
+                  .format(staged['rates_csv']))
+    if self._channel_log:
+      sim_cmd += (' network.channel_log.file=string={0}'
+                  .format(staged['channels_csv']))
+    #loop through each variable commands to add
+    overrides = ''
+    for var in run_config:
+      tmp_cmd = var['command'](var['value'], run_config)
+      cmd = self._cmd_clean(tmp_cmd)
+      overrides += cmd
+    sim_cmd += overrides
+    if self._stream:
+      sim_cmd = self._stream_cmd(files, sim_cmd)
+    elif not self._codec.native:
+      # the message log is compressed from a pipe
+      sim_cmd = self._pipe_cmd(
+        [staged['messages_fifo']],
+        [self._codec.compress_cmd(staged['messages_fifo'],
+                                  staged['messages_mpf'])], sim_cmd)
+    if self._scratch is not None:
+      sim_cmd = self._scratch_cmd(files, staged, sim_cmd)
+    return sim_cmd, overrides
+
+  def _staged_files(self, files):
+    """
+    This returns the files of a sim with its outputs and their parse in its
+    scratch directory
+
+    Args:
+      files         : files of the sim
+    """
+    staged = dict(files)
+    for role in ['messages_mpf', 'messages_fifo', 'latency_csv',
+                 'aggregate_csv', 'rates_csv', 'channels_csv']:
+      if role in files:
+        staged[role] = os.path.join(files['scratch_dir'],
+                                    os.path.basename(files[role]))
+    return staged
+
+  def _scratch_cmd(self, files, staged, sim_cmd):
+    """
+    This creates the shell command of a staged sim. supersim and sslatency run
+    back to back in the scratch directory of the sim, then the outputs are
+    moved to the data directory and the scratch directory is removed, also
+    when the sim or the parse fail.
+
+    Args:
+      files         : files of the sim
+      staged        : files of the sim in scratch space (see _staged_files())
+      sim_cmd       : supersim command writing its outputs to scratch space
+    """
+    scratch_dir = files['scratch_dir']
+    moved = ' '.join([staged[x_role] for x_role in
+                      sorted(self._sim_outputs(files))])
+    cmd = 'rm -rf {0} && mkdir -p {0} && {{ '.format(scratch_dir)
+    cmd += '{0} && {1} && '.format(sim_cmd, self._parse_mpf_cmd(staged))
+    cmd += 'mv -f {0} {1}; }}; s=$?; '.format(
+      moved, os.path.dirname(files['latency_csv']))
+    cmd += 'rm -rf {0}; [ $s -eq 0 ]'.format(scratch_dir)
+    return cmd
+
+  def _sim_resources(self, config, replica=0):
+    """
+    This returns the resources of a sim (None for the defaults). Staged sims
+    also request their scratch space ('scratch' in GiB), unless the resources
+    function sets it.
+
+    Args:
+      config        : config of the sim
+      replica       : replica of the run
+    """
+    resources = None
+    if self._resource_model is not None:
+      resources = self.get_resources('sim', config, replica)
+    elif self._get_resources is not None:
+      resources = self._get_resources('sim', config)
+    if self._scratch is not None:
+      resources = dict(resources or {})
+      resources.setdefault('scratch', self._scratch_size)
+    return resources
+
+  def _priority(self, level):
+    """
+    This returns the priority of the tasks following the sims at a level
+    (1 and up), above all the sim priority levels.
+
+    Args:
+      level         : priority level relative to the sims
+    """
+    return level + self._sim_levels - 1
+
+  def _set_sim_priorities(self):
+    """
+    This spreads the sims over the sim priority levels by their estimated run
+    time so that the longest sims start first and don't become the tail of the
+    sweep. The run time is predicted by the resource model when there is one,
+    sims it can't predict yet start first as they could be long and their usage
+    improves the model. Without a resource model the load is the estimate.
+    """
+    estimates = []
+    for code in self._codes:
+      if self._resource_model is not None:
+        estimate = self._resource_model.predict(self._index.config(code),
+                                                'time')
+        if estimate is None:
+          estimate = float('inf')
+      else:
+        estimate = float(self._index.config(code, [self._load_dim])[0]['value'])
+      estimates.append(estimate)
+    ranked = sorted(estimates)
+    for code, estimate in zip(self._codes, estimates):
+      rank = bisect.bisect_left(ranked, estimate)
+      for id_task in self._runs(code):
+        if id_task in self._sim_tasks:
+          self._sim_tasks[id_task].priority = (
+            rank * self._sim_levels // len(ranked))
+
+  def _sim_outputs(self, files):
+    """
+    This returns the output files of a sim by role
+
+    Args:
+      files         : files of the sim
+    """
+    sim_outputs = {}
+    if self._fused:
+      sim_outputs['latency_csv'] = files['latency_csv']
+      sim_outputs['aggregate_csv'] = files['aggregate_csv']
+    if not self._fused or self._stream_keep_mpf or self._scratch_keep:
+      sim_outputs['messages_mpf'] = files['messages_mpf']
+    if self._rate_log:
+      sim_outputs['rates_csv'] = files['rates_csv']
+    if self._channel_log:
+      sim_outputs['channels_csv'] = files['channels_csv']
+    return sim_outputs
+
+  def get_resources(self, task_type, config, replica=0):
+    """
+    This is the built-in resources function used with a resource model. It
+    returns the resources given by the get_resources function of the Sweeper
+    (1 cpu if none), with the memory ('mem' in GiB) of sims predicted by the
+    resource model once it has observed similar configs. The prediction is of
+    the peak resident memory, the headroom covers the address space limit that
+    taskrun's MemoryResource enforces beyond it.
+
+    Args:
+      task_type     : type of task ('sim', 'parse', 'qplot', ...)
+      config        : config of the task
+      replica       : replica of the run of a sim
+    """
+    if self._base_resources is not None:
+      resources = dict(self._base_resources(task_type, config) or {})
+    else:
+      resources = {'cpus': 1}
+    if task_type == 'sim' and self._resource_model is not None:
+      mem = self._resource_model.predict(config, 'mem', replica)
+      if mem is not None:
+        resources['mem'] = (mem * self._resource_margin +
+                            self._resource_headroom)
+    return resources
+
+  def _check_sim_resources(self, task, config, replica, usage_log, condition):
+    if not condition.check():
+      return False
+    # a previous run that failed isn't predicted again
+    if self._resource_model.is_stale(config, usage_log, replica):
+      self._resource_model.observe(config, usage_log, replica)
+    task.resources = self._sim_resources(config, replica)
+    return True
+
+  def _create_usage_task(self, tm_var, id_task, sim_config, replica, sim_task,
+                         files):
+    """
+    This creates the task adding the usage log of a sim to the resource model
+    """
+    usage_task = taskrun.FunctionTask(
+      tm_var, 'usage_{0}'.format(id_task), self._resource_model.observe,
+      sim_config, files['usage_log'], replica)
+    usage_task.resources = self._get_resources('usage', sim_config)
+    usage_task.priority = self._priority(2)
+    usage_task.add_dependency(sim_task)
+    usage_task.add_condition(taskrun.FunctionCondition(
+      self._resource_model.is_stale, sim_config, files['usage_log'], replica))
+
+  def _stream_cmd(self, files, sim_cmd):
+    """
+    This creates the shell command of a streaming sim. sslatency parses the
+    message log from a named pipe while supersim writes it, and when the
+    message log is kept tee also feeds it to the compressor of the codec.
+
+    Args:
+      files         : files of the sim
+      sim_cmd       : supersim command writing the message log to the pipe
+    """
+    fifo = files['messages_fifo']
+    if self._stream_keep_mpf:
+      parse_fifo = fifo + '.parse'
+      keep_fifo = fifo + '.keep'
+      fifos = [fifo, parse_fifo, keep_fifo]
+      jobs = [self._parse_cmd(files, parse_fifo),
+              self._codec.compress_cmd(keep_fifo, files['messages_mpf']),
+              'tee {0} {1} < {2} > /dev/null'.format(parse_fifo, keep_fifo,
+                                                     fifo)]
+    else:
+      fifos = [fifo]
+      jobs = [self._parse_cmd(files, fifo)]
+    return self._pipe_cmd(fifos, jobs, sim_cmd)
+
+  @staticmethod
+  def _pipe_cmd(fifos, jobs, main_cmd):
+    """
+    This creates the shell command running a command with jobs reading from or
+    writing to its named pipes in the background. The jobs are killed if the
+    command fails, as they could be blocked opening the pipes.
+
+    Args:
+      fifos         : named pipes
+      jobs          : background commands
+      main_cmd      : command
+    """
+    fifos = ' '.join(fifos)
+    pids = ' '.join(['$p{0}'.format(idx) for idx in range(len(jobs))])
+
+    cmd = 'rm -f {0} && mkfifo {0} && {{ '.format(fifos)
+    for idx, job in enumerate(jobs):
+      cmd += '{0} & p{1}=$!; '.format(job, idx)
+    cmd += '{0}; s=$?; '.format(main_cmd)
+    cmd += '[ $s -eq 0 ] || kill {0} 2>/dev/null; '.format(pids)
+    status = '[ $s -eq 0 ]'
+    for idx in range(len(jobs)):
+      cmd += 'wait $p{0}; r{0}=$?; '.format(idx)
+      status += ' && [ $r{0} -eq 0 ]'.format(idx)
+    cmd += 'rm -f {0}; {1}; }}'.format(fifos, status)
+    return cmd
+
+  def _create_sim_cache_task(self, tm_var, code, id_task, sim_config, replica,
+                             sim_task, overrides, sim_outputs, sim_fmc):
+    """
+    This creates the tasks fetching the outputs of a sim from the simulation
+    cache before it and storing them in the cache after it, and returns the sim
+    condition that skips the sim when its outputs were fetched. Sims with the
+    same command as an earlier sim of the sweep wait for it and fetch its
+    outputs.
+
+    Args:
+      tm_var        : task manager
+      code          : config code
+      id_task       : id of the sim
+      sim_config    : config of the sim
+      replica       : replica of the sim
+      sim_task      : sim task
+      overrides     : the command modifiers of the sim
+      sim_outputs   : dict of output role to output file
+      sim_fmc       : condition of the sim without cache
+    """
+    # settings and binaries are hashed once per sweep
+    if self._sim_cache_base is None:
+      self._sim_cache_base = SimCache.key(
+        SimCache.hash_file(self._settings_path),
+        SimCache.hash_file(self._supersim_path))
+      if self._latency_parser is None:
+        parser = SimCache.hash_file(self._sslatency_path)
+      else:
+        parser = 'numpy'
+      self._sim_cache_parsed = SimCache.key(
+        self._sim_cache_base, parser, self._latency_mode,
+        str(self._parse_scalar))
+    # entries holding parsed outputs also depend on the parse
+    base = self._sim_cache_base
+    if 'latency_csv' in sim_outputs:
+      base = self._sim_cache_parsed
+    outputs_key = ' '.join(sorted(sim_outputs))
+    if self._codec.name != 'gzip':
+      outputs_key += ' ' + self._codec.name
+    key = SimCache.key(base, overrides.strip(), outputs_key)
+
+    cache_task = taskrun.FunctionTask(
+      tm_var, 'simcache_{0}'.format(id_task), self._sim_cache.store, key,
+      sim_outputs)
+    if self._get_resources is not None:
+      cache_task.resources = self._get_resources('simcache', sim_config)
+    cache_task.priority = self._priority(1)
+    self._sim_cache_stores[id_task] = cache_task
+    cache_task.add_dependency(sim_task)
+
+    # the outputs are fetched by a task, the scheduler only looks the key up
+    fetch_task = taskrun.FunctionTask(
+      tm_var, 'simfetch_{0}'.format(id_task), self._fetch_sim, id_task, key,
+      sim_outputs)
+    if self._get_resources is not None:
+      fetch_task.resources = self._get_resources('simfetch', sim_config)
+    fetch_task.priority = 0
+    fetch_task.add_condition(self._run_condition(
+      fetch_task, code, replica, taskrun.FunctionCondition(
+        self._check_sim_cache, key, sim_fmc)))
+    self._sim_cache_fetches[id_task] = fetch_task
+    sim_task.add_dependency(fetch_task)
+    # within sweep dedup
+    if key in self._sim_cache_tasks:
+      fetch_task.add_dependency(self._sim_cache_tasks[key])
+    else:
+      self._sim_cache_tasks[key] = cache_task
+    return taskrun.FunctionCondition(self._check_sim_fetched, id_task, sim_fmc)
+
+  def _cached_outputs(self, id_task, files, sim_outputs):
+    """
+    This returns the outputs of a sim stored in the simulation cache. Message
+    logs that are reclaimed aren't cached, as the cache would hold on to them,
+    their parsed outputs are cached instead.
+
+    Args:
+      id_task       : id of the sim
+      files         : files of the sim
+      sim_outputs   : dict of output role to output file
+    """
+    if 'messages_mpf' not in sim_outputs or not self._reclaims(id_task):
+      return sim_outputs
+    cached = {x_role: y_file for x_role, y_file in sim_outputs.items()
+              if x_role != 'messages_mpf'}
+    cached['latency_csv'] = files['latency_csv']
+    cached['aggregate_csv'] = files['aggregate_csv']
+    return cached
+
+  def _check_sim_cache(self, key, condition):
+    return condition.check() and self._sim_cache.contains(key)
+
+  def _fetch_sim(self, id_task, key, sim_outputs):
+    """
+    This fetches the outputs of a sim from the simulation cache. The sim runs
+    if the entry was evicted in the meantime.
+
+    Args:
+      id_task       : id of the sim
+      key           : cache key of the sim
+      sim_outputs   : dict of output role to output file
+    """
+    if self._sim_cache.fetch(key, sim_outputs):
+      self._sim_cache_hits.add(id_task)
+
+  def _check_sim_fetched(self, id_task, condition):
+    if id_task in self._sim_cache_hits:
+      return False
+    return condition.check()
+
+  def _add_sim_dependency(self, id_task, tasks, id_dep):
+    """
+    This adds the dependency of the sim of a run on the task of an id, and of
+    the task fetching it from the simulation cache
+
+    Args:
+      id_task       : id of the run
+      tasks         : dict of id to task
+      id_dep        : id of the task depended on
+    """
+    self._add_dependency(self._sim_tasks[id_task], tasks, id_dep)
+    if id_task in self._sim_cache_fetches:
+      self._add_dependency(self._sim_cache_fetches[id_task], tasks, id_dep)
 
   def _create_parse_tasks(self, tm_var):
     # loop through all variables
-    for parse_config in self._dim_iter():
-      # make id and name
-      id_task = self._make_id(parse_config)
-      files = self._get_files(id_task)
-      parse_name = 'parse_{0}'.format(id_task)
-      # parse cmd
-      parse_cmd = '{0} -{1} {2} -a {3} {4}'.format(
-        self._sslatency_path,
-        self._latency_mode[:1].lower(),
-        files['latency_csv'],
-        files['aggregate_csv'],
-        files['messages_mpf'])
+    for code in self._codes:
+      parse_config = self._index.config(code)
+      # make id
+      id_task = self._index.task_id(code)
+      runs = self._runs(code)
+      for replica, id_run in enumerate(runs):
+        self._create_parse_task(tm_var, code, id_run, parse_config, replica)
+      if (self._replication is not None and
+          self._is_planned('combine_{0}'.format(id_task))):
+        # replicas are parsed into the statistics of the config
+        self._parse_tasks[id_task] = self._create_combine_task(
+          tm_var, code, id_task, parse_config)
+      # adaptive loads simulate each load after the previous one is parsed
+      prev_code = self._prev_load(code)
+      if self._saturation is not None and prev_code is not None:
+        prev_id = self._index.task_id(prev_code)
+        for id_run in runs:
+          if id_run in self._sim_tasks:
+            self._add_sim_dependency(id_run, self._parse_tasks, prev_id)
+
+  def _create_parse_task(self, tm_var, code, id_task, parse_config, replica):
+    """
+    This creates the parse task of a run of a config
 
-      if self._parse_scalar is not None:
-        parse_cmd += ' -s {0}'.format(self._parse_scalar)
+    Args:
+      tm_var        : task manager
+      code          : config code
+      id_task       : id of the run
+      parse_config  : config
+      replica       : replica of the run (0 without replication)
+    """
+    parse_name = 'parse_{0}'.format(id_task)
+    if self._fused:
+      # parsed while simulating
+      if id_task not in self._sim_tasks:
+        return
+      parse_task = self._sim_tasks[id_task]
+    else:
+      if not self._is_planned(parse_name):
+        return
+      files = self._get_files(id_task)
       # parse task
-      parse_task = taskrun.ProcessTask(tm_var, parse_name, parse_cmd)
+      if self._latency_parser is None:
+        parse_task = self._process_task(
+          tm_var, parse_name, self._parse_mpf_cmd(files))
+      else:
+        parse_task = taskrun.FunctionTask(
+          tm_var, parse_name, self._parse_in_process, code, id_task, files)
       if self._get_resources is not None:
         parse_task.resources = self._get_resources('parse', parse_config)
-      parse_task.priority = 1
-      parse_task.add_dependency(self._sim_tasks[id_task])
-      parse_task.add_condition(taskrun.FileModificationCondition(
-        [files['messages_mpf']],
-        [files['latency_csv'], files['aggregate_csv']]))
-      self._parse_tasks[id_task] = parse_task
+      parse_task.priority = self._priority(1)
+      self._add_dependency(parse_task, self._sim_tasks, id_task)
+      self._track_outputs(parse_task,
+                          [files['latency_csv'], files['aggregate_csv']])
+      self._track_state(parse_task)
+      parse_fmc = self._file_condition(
+        parse_task, [files['messages_mpf']],
+        [files['latency_csv'], files['aggregate_csv']])
+      if self._reclaims(id_task):
+        # a reclaimed message log was parsed before it was reclaimed
+        parse_fmc = taskrun.FunctionCondition(
+          self._check_reclaimed, files['messages_mpf'], parse_fmc,
+          taskrun.FileModificationCondition(
+            [], [files['latency_csv'], files['aggregate_csv']]))
+      parse_task.add_condition(self._run_condition(parse_task, code, replica,
+                                                   parse_fmc))
+      if self._reclaims(id_task):
+        # the parsed outputs are cached instead of the message log
+        if id_task in self._sim_cache_stores:
+          self._sim_cache_stores[id_task].add_dependency(parse_task)
+    self._parse_tasks[id_task] = parse_task
+    if self._reclaims(id_task):
+      files = self._get_files(id_task)
+      if 'messages_mpf' in self._sim_outputs(files):
+        self._create_reclaim_task(tm_var, id_task, parse_config, parse_task,
+                                  files)
+    # replicas past the minimum run once the previous one is parsed
+    if (self._replication is not None and id_task in self._sim_tasks and
+        replica >= self._replication.min_replicas):
+      prev_id = self._runs(code)[replica - 1]
+      self._add_sim_dependency(id_task, self._parse_tasks, prev_id)
+
+  def _parse_in_process(self, code, id_task, files):
+    """
+    This parses the message log of a run with the LatencyParser. The statistics
+    of a config are stored in the results without reading them back.
+
+    Args:
+      code          : config code
+      id_task       : id of the run
+      files         : files of the run
+    """
+    decompress_cmd = None
+    if not self._codec.native:
+      decompress_cmd = self._codec.decompress_cmd(files['messages_mpf'])
+    grid = self._latency_parser.parse(
+      files['messages_mpf'], files['latency_csv'], files['aggregate_csv'],
+      decompress_cmd)
+    if (self._results_store is not None and
+        id_task == self._index.task_id(code)):
+      self._results_store.update(code, files['aggregate_csv'], grid)
+    return None
+
+  def _reclaims(self, id_task):
+    """
+    This returns True if the message log of a run is reclaimed once it is
+    parsed. The runs keeping their message log are sampled by the hash of their
+    id, so they are the same in every run of the sweep.
+
+    Args:
+      id_task       : id of the run
+    """
+    if self._mpf_retention == 'keep':
+      return False
+    digest = hashlib.sha1(id_task.encode('utf-8')).hexdigest()
+    return int(digest[:8], 16) >= self._mpf_keep_fraction * 2**32
+
+  @staticmethod
+  def _check_reclaimed(messages_mpf, condition, reclaimed):
+    if os.path.isfile(messages_mpf):
+      return condition.check()
+    return reclaimed.check()
+
+  def _create_reclaim_task(self, tm_var, id_task, config, parse_task, files):
+    """
+    This creates the task reclaiming the message log of a run once it is parsed
+    (and stored in the simulation cache), by deleting it or by recompressing it
+    with xz
+
+    Args:
+      tm_var        : task manager
+      id_task       : id of the run
+      config        : config of the run
+      parse_task    : task parsing the message log
+      files         : files of the run
+    """
+    messages_mpf = files['messages_mpf']
+    if self._mpf_retention == 'archive':
+      tmp_xz = files['messages_xz'] + '.tmp'
+      reclaim_cmd = '{0} && {1} | xz -9 > {2} && mv -f {2} {3} && rm -f {4}'
+      reclaim_cmd = reclaim_cmd.format(
+        self._codec.test_cmd(messages_mpf),
+        self._codec.decompress_cmd(messages_mpf), tmp_xz, files['messages_xz'],
+        messages_mpf)
+    else:
+      reclaim_cmd = 'rm -f {0}'.format(messages_mpf)
+    reclaim_task = self._process_task(
+      tm_var, 'reclaim_{0}'.format(id_task), reclaim_cmd)
+    if self._get_resources is not None:
+      reclaim_task.resources = self._get_resources('reclaim', config)
+    reclaim_task.priority = self._priority(2)
+    reclaim_task.add_dependency(parse_task)
+    self._add_dependency(reclaim_task, self._sim_cache_stores, id_task)
+    reclaim_task.add_condition(taskrun.FunctionCondition(os.path.isfile,
+                                                         messages_mpf))
+
+  def _create_combine_task(self, tm_var, code, id_task, combine_config):
+    """
+    This creates the task combining the statistics of the replicas of a config
+    into the aggregate file of the config
+
+    Args:
+      tm_var        : task manager
+      code          : config code
+      id_task       : config id
+      combine_config : config
+    """
+    files = self._get_files(id_task)
+    combine_name = 'combine_{0}'.format(id_task)
+    combine_task = taskrun.FunctionTask(tm_var, combine_name,
+                                        self._combine_replicas, code)
+    if self._get_resources is not None:
+      combine_task.resources = self._get_resources('combine', combine_config)
+    combine_task.priority = self._priority(1)
+    for id_run in self._runs(code):
+      self._add_dependency(combine_task, self._parse_tasks, id_run)
+    self._track_outputs(combine_task, [files['latency_csv'],
+                                       files['aggregate_csv'],
+                                       files['replicas_json']])
+    self._track_state(combine_task)
+    combine_task.add_condition(self._load_condition(
+      combine_task, code, taskrun.FunctionCondition(self._check_combine,
+                                                    combine_task, code)))
+    return combine_task
+
+  def _replica_files(self, code):
+    """
+    This returns the files of the replicas of a config that were needed
+
+    Args:
+      code          : config code
+    """
+    return [self._get_files(x_id) for x_replica, x_id
+            in enumerate(self._runs(code))
+            if self._is_replica_needed(code, x_replica)]
+
+  def _check_combine(self, task, code):
+    files = self._get_files(self._index.task_id(code))
+    inputs = [x_files['aggregate_csv'] for x_files in self._replica_files(code)]
+    return self._file_condition(
+      task, inputs, [files['aggregate_csv'], files['replicas_json']]).check()
+
+  def _combine_replicas(self, code):
+    files = self._get_files(self._index.task_id(code))
+    replica_files = self._replica_files(code)
+    self._replication.combine(
+      [x_files['aggregate_csv'] for x_files in replica_files],
+      replica_files[0]['latency_csv'], files['aggregate_csv'],
+      files['latency_csv'], files['replicas_json'],
+      self._latency_mode.title())
+    return None
+
+  def _create_results_tasks(self, tm_var):
+    self._results_store = Results.create(
+      self._get_files('')['results'], self._variables, self._index,
+      ssplot.LoadLatencyStats.FIELDS, self._latency_mode,
+      None if self._valid is None else self._codes)
+    # the results are done again when the store is cleared
+    store_mtime = os.path.getmtime(os.path.join(
+      self._get_files('')['results'], 'index.json'))
+    # store the aggregate of each config as soon as it is parsed
+    for code in self._codes:
+      results_config = self._index.config(code)
+      id_task = self._index.task_id(code)
+      files = self._get_files(id_task)
+      results_name = 'results_{0}'.format(id_task)
+      if not self._is_stale(results_name, id_task in self._stale_ids,
+                            store_mtime, code, files['aggregate_csv']):
+        continue
+      results_task = taskrun.FunctionTask(
+        tm_var, results_name, self._results_store.update, code,
+        files['aggregate_csv'])
+      if self._get_resources is not None:
+        results_task.resources = self._get_resources('results', results_config)
+      results_task.priority = self._priority(2)
+      self._add_dependency(results_task, self._parse_tasks, id_task)
+      self._track_state(results_task)
+      results_task.add_condition(self._load_condition(
+        results_task, code, taskrun.FunctionCondition(
+          self._results_store.is_stale, code, files['aggregate_csv'])))
+
+  def _parse_mpf_cmd(self, files):
+    """
+    This creates the command parsing the message log of a run, through a pipe
+    fed by the decompressor if sslatency can't read the codec
+
+    Args:
+      files         : files of the parsed run
+    """
+    if self._codec.native:
+      return self._parse_cmd(files, files['messages_mpf'])
+    fifo = files['messages_fifo']
+    return self._pipe_cmd(
+      [fifo], ['{0} > {1}'.format(
+        self._codec.decompress_cmd(files['messages_mpf']), fifo)],
+      self._parse_cmd(files, fifo))
+
+  def _parse_cmd(self, files, messages):
+    """
+    This creates the sslatency command
+
+    Args:
+      files         : files of the parsed config
+      messages      : message log to parse
+    """
+    parse_cmd = '{0} -{1} {2} -a {3} {4}'.format(
+      self._sslatency_path,
+      self._latency_mode[:1].lower(),
+      files['latency_csv'],
+      files['aggregate_csv'],
+      messages)
+
+    if self._parse_scalar is not None:
+      parse_cmd += ' -s {0}'.format(self._parse_scalar)
+    return parse_cmd
 
   def _create_qplot_tasks(self, tm_var):
     # loop through all variables
-    for qplot_config in self._dim_iter():
-      id_task = self._make_id(qplot_config)
+    for code in self._codes:
+      qplot_config = self._index.config(code)
+      id_task = self._index.task_id(code)
       files = self._get_files(id_task)
       qplot_name = 'qplot_{0}'.format(id_task)
       qplot_title = self._make_title(qplot_config, 'qplot')
@@ -555,57 +1839,154 @@ class Sweeper(object):
         qplot_title)
       if self._plot_units is not None:
         qplot_cmd += (' --units {0} '.format(self._plot_units))
-      qplot_task = taskrun.ProcessTask(tm_var, qplot_name, qplot_cmd)
+      self._add_plots([files['qplot_png']])
+      if not self._is_stale(qplot_name, id_task in self._stale_ids,
+                            qplot_cmd, *self._gates()):
+        continue
+      qplot_task = self._create_plot_task(tm_var, qplot_name, qplot_cmd,
+                                          files['latency_csv'])
       if self._get_resources is not None:
         qplot_task.resources = self._get_resources('qplot', qplot_config)
-      qplot_task.priority = 1
-      qplot_task.add_dependency(self._parse_tasks[id_task])
-      qplot_task.add_condition(taskrun.FileModificationCondition(
-        [files['latency_csv']],
-        [files['qplot_png']]))
+      qplot_task.priority = self._priority(1)
+      self._add_dependency(qplot_task, self._parse_tasks, id_task)
+      self._track_outputs(qplot_task, [files['qplot_png']])
+      self._track_state(qplot_task)
+      qplot_task.add_condition(self._load_condition(
+        qplot_task, code, self._file_condition(
+          qplot_task, [files['latency_csv']],
+          [files['qplot_png']])))
 
   def _create_lplot_tasks(self, tm_var):
+    lplot_dims = self._index.dims(dont=self._load_name)
     # config with no load
-    for lplot_config in self._dim_iter(dont=self._load_name):
-      id_task1 = self._make_id(lplot_config)
+    for code in self._bases([self._load_dim]):
+      lplot_config = self._index.config(code, lplot_dims)
+      id_task1 = self._index.task_id(code, lplot_dims)
       lplot_name = 'lplot_{0}'.format(id_task1)
       lplot_title = self._make_title(lplot_config, 'lplot')
+      # loads plotted
+      bases, first, num_loads = self._plot_loads([code])
+      if num_loads == 0:
+        continue
       files1 = self._get_files(id_task1)
-      # lplot cmd
-      lplot_cmd = ('ssllp --row {0} {1} {2} {3} {4} --title {5}'
-                   .format(self._latency_mode.title(), files1['lplot_png'],
-                           self._start, self._stop + 1, self._step, lplot_title))
-      # check plot settings
-      if self._plot_units is not None:
-        lplot_cmd += (' --units {0}'.format(self._plot_units))
-      if self._ymin is not None:
-        lplot_cmd += (' --ymin {0}'.format(self._ymin))
-      if self._ymax is not None:
-        lplot_cmd += (' --ymax {0}'.format(self._ymax))
-
-      # add to lplot_cmd the load files- sweep load
-      for loads in  self._dim_iter(do_vars=self._load_name):
-        id_task2 = self._make_id(lplot_config, extra=self._make_id(loads))
-        files2 = self._get_files(id_task2)
-        lplot_cmd += ' {0}'.format(files2['aggregate_csv'])
+      # lplot cmd with the load files- sweep load
+      make_cmd = functools.partial(self._lplot_cmd, files1['lplot_png'],
+                                   lplot_title, first)
+      series = self._load_series(bases, num_loads, first)
+      self._add_plots([files1['lplot_png']])
+      if not self._is_stale(lplot_name, self._has_stale(series),
+                            make_cmd(series), series, *self._gates()):
+        continue
       # create task
-      lplot_task = taskrun.ProcessTask(tm_var, lplot_name, lplot_cmd)
+      lplot_task = self._create_plot_task(
+        tm_var, lplot_name, self._plot_command(make_cmd(series)),
+        series[0][0])
       if self._get_resources is not None:
         lplot_task.resources = self._get_resources('lplot', lplot_config)
-      lplot_task.priority = 1
+      lplot_task.priority = self._priority(1)
       # add dependencies
-      for loads in  self._dim_iter(do_vars=self._load_name):
-        id_task3 = self._make_id(lplot_config, extra=self._make_id(loads))
-        lplot_task.add_dependency(self._parse_tasks[id_task3])
+      for id_task2 in series[0]:
+        self._add_dependency(lplot_task, self._parse_tasks, id_task2)
+      self._track_outputs(lplot_task, [files1['lplot_png']])
+      self._track_state(lplot_task)
+      lplot_task.add_condition(self._plot_condition(
+        lplot_task, bases, first, series, make_cmd, [files1['lplot_png']]))
+
+  def _plot_command(self, cmd):
+    """
+    This returns the command line of a plot task from a plot command or a list
+    of plot commands rendered back to back. Response files are expanded by
+    PlotPool, so the plots using them run through it. The plot pool takes the
+    commands as is.
+
+    Args:
+      cmd           : plot command, or a list of them
+    """
+    if self._plot_pool is not None:
+      return cmd
+    if isinstance(cmd, list) or self._response_files:
+      from .PlotPool import PlotPool
+      return PlotPool.command_line(cmd if isinstance(cmd, list) else [cmd])
+    return cmd
+
+  def _plot_inputs(self, plot_png, series):
+    """
+    This returns the input files argument of a plot command: the aggregate files
+    of the series, or the response file holding them
+
+    Args:
+      plot_png      : plot file naming the response file
+      series        : list of load id lists
+    """
+    if self._response_files:
+      return ' @{0}'.format(self._args_file(plot_png))
+    return ''.join([' {0}'.format(x_file)
+                    for x_file in self._series_files(series)])
+
+  @staticmethod
+  def _args_file(plot_png):
+    """
+    This returns the response file of the plot command of a plot file
+
+    Args:
+      plot_png      : plot file
+    """
+    return os.path.splitext(plot_png)[0] + '.args'
+
+  def _process_task(self, tm_var, name, cmd):
+    """
+    This creates a task running a shell command, through the work queue when
+    enabled
+
+    Args:
+      tm_var        : task manager
+      name          : task name
+      cmd           : shell command
+    """
+    if self._work_queue is None:
+      return taskrun.ProcessTask(tm_var, name, cmd)
+    from .QueueTask import QueueTask
+    return QueueTask(tm_var, name, cmd, self._work_queue)
+
+  def _create_plot_task(self, tm_var, name, cmd, affinity):
+    """
+    This creates a plot task, rendered by the plot pool when enabled
+
+    Args:
+      tm_var        : task manager
+      name          : task name
+      cmd           : plot command
+      affinity      : plots with the same affinity are rendered by the same
+                      worker to share its cache
+    """
+    if self._plot_pool is None:
+      return self._process_task(tm_var, name, cmd)
+    from .PlotTask import PlotTask
+    return PlotTask(tm_var, name, cmd, self._plot_pool, affinity)
 
-      lplot_fmc = taskrun.FileModificationCondition([], [files1['lplot_png']])
+  def _lplot_cmd(self, lplot_png, lplot_title, first, series):
+    """
+    This creates the lplot command
 
-      # add input files to task
-      for loads in self._dim_iter(do_vars=self._load_name):
-        id_task4 = self._make_id(lplot_config, extra=self._make_id(loads))
-        files3 = self._get_files(id_task4)
-        lplot_fmc.add_input(files3['aggregate_csv'])
-      lplot_task.add_condition(lplot_fmc)
+    Args:
+      lplot_png     : plot file
+      lplot_title   : plot title
+      first         : index of the first load plotted
+      series        : list with the load ids of the plotted config
+    """
+    start, stop = self._load_range(first, len(series[0]))
+    lplot_cmd = ('ssllp --row {0} {1} {2} {3} {4} --title {5}'
+                 .format(self._latency_mode.title(), lplot_png,
+                         start, stop, self._step, lplot_title))
+    # check plot settings
+    if self._plot_units is not None:
+      lplot_cmd += (' --units {0}'.format(self._plot_units))
+    if self._ymin is not None:
+      lplot_cmd += (' --ymin {0}'.format(self._ymin))
+    if self._ymax is not None:
+      lplot_cmd += (' --ymax {0}'.format(self._ymax))
+    lplot_cmd += self._plot_inputs(lplot_png, series)
+    return lplot_cmd
 
   def _create_cplot_tasks(self, tm_var):
     # loop over all vars that should compared and have more than 1 value
@@ -614,10 +1995,25 @@ class Sweeper(object):
           and len(cvar['values']) > 1):
         # count number of compare variables
         self._comp_var_count += 1
+        cvar_dims = self._index.dims(cvar['name'])
+        cplot_dims = self._index.dims(dont=[self._load_name, cvar['name']])
+        cvar_offsets = self._index.offsets(cvar_dims)
         # iterate all configurations for this variable (no l, no cvar)
-        for cplot_config in self._dim_iter(dont=[self._load_name,
-                                                 cvar['name']]):
+        for code in self._bases(cvar_dims + [self._load_dim]):
+          cplot_config = self._index.config(code, cplot_dims)
+          # load ids of each value of the comp variable
+          bases, first, num_loads = self._plot_loads(
+            [code + offset for offset in cvar_offsets])
+          if len(bases) < 2 or num_loads == 0:
+            # nothing to compare
+            continue
+          series = self._load_series(bases, num_loads, first)
+          # loop through comp variable to create legend
+          labels = ''.join([' --label "{0}"'.format(
+            cvar['values'][self._index.value_index(x_base, cvar_dims[0])])
+                            for x_base in bases])
           # iterate all latency distributions (9)
+          cplot_fields = []
           for field in ssplot.LoadLatencyStats.FIELDS:
             # make id, plot title, png file
             id_task = self._make_id(cplot_config, extra=field)
@@ -627,55 +2023,410 @@ class Sweeper(object):
 
             files = self._get_files(('{0}_{1}'.format(cvar['short_name'],
                                                       id_task)))
+            cplot_fields.append((files['cplot_png'], cplot_title, field))
+
+            if not self._cplot_multi_field:
+              # cmd
+              make_cmd = functools.partial(self._cplot_cmd, files['cplot_png'],
+                                           cplot_title, field, labels, first)
+              self._add_cplot_task(tm_var, cplot_name, cplot_config, bases,
+                                   first, series, make_cmd,
+                                   [files['cplot_png']])
+
+          if self._cplot_multi_field:
+            # one task for all latency distributions
+            cplot_name = 'cplot_{0}_{1}'.format(
+              cvar['short_name'], self._make_id(cplot_config, extra='fields'))
+            make_cmd = functools.partial(self._cplot_fields_cmd, cplot_fields,
+                                         labels, first)
+            self._add_cplot_task(tm_var, cplot_name, cplot_config, bases,
+                                 first, series, make_cmd,
+                                 [x_field[0] for x_field in cplot_fields])
+
+  def _add_cplot_task(self, tm_var, name, config, bases, first, series,
+                      make_cmd, plot_files):
+    """
+    This creates a cplot task
 
-            # cmd
-            cplot_cmd = ('sslcp --row {0} --title {1} --field {2} {3} {4} {5} '
-                         '{6} '
-                         .format(self._latency_mode.title(), cplot_title,
-                                 field, files['cplot_png'],
-                                 self._start, self._stop + 1, self._step))
-            # add plot settings if they exist
-            if self._plot_units is not None:
-              cplot_cmd += (' --units {0}'.format(self._plot_units))
-            if self._ymin is not None:
-              cplot_cmd += (' --ymin {0}'.format(self._ymin))
-            if self._ymax is not None:
-              cplot_cmd += (' --ymax {0}'.format(self._ymax))
-
-            # loop through comp variable and loads to add agg files to cmd
-            for var_load_config in self._dim_iter(do_vars=[cvar['name'],
-                                                           self._load_name]):
-              # create ordered config with cvar and load
-              sim_config = self._create_config(cplot_config, var_load_config)
-              id_task2 = self._make_id(sim_config)
-              files2 = self._get_files(id_task2)
-              cplot_cmd += ' {0}'.format(files2['aggregate_csv'])
-            # loop through comp variable to create legend
-            for var_config in self._dim_iter(do_vars=cvar['name']):
-              for var in var_config:
-                cplot_cmd += ' --label "{0}"'.format(var['value'])
-            # create task
-            cplot_task = taskrun.ProcessTask(tm_var, cplot_name, cplot_cmd)
-            if self._get_resources is not None:
-              cplot_task.resources = self._get_resources('cplot', cplot_config)
-            cplot_task.priority = 1
-            # add dependencies (loop through load and cvar)
-            for var_load_config in self._dim_iter(do_vars=[cvar['name'],
-                                                           self._load_name]):
-              # create ordered config with cvar and load
-              sim_config = self._create_config(cplot_config, var_load_config)
-              id_task3 = self._make_id(sim_config)
-              cplot_task.add_dependency(self._parse_tasks[id_task3])
-            cplot_fmc = taskrun.FileModificationCondition(
-              [], [files['cplot_png']])
-            for var_load_config in self._dim_iter(do_vars=[cvar['name'],
-                                                           self._load_name]):
-              # create ordered config with cvar and load
-              sim_config = self._create_config(cplot_config, var_load_config)
-              id_task4 = self._make_id(sim_config)
-              files3 = self._get_files(id_task4)
-              cplot_fmc.add_input(files3['aggregate_csv'])
-            cplot_task.add_condition(cplot_fmc)
+    Args:
+      tm_var        : task manager
+      name          : task name
+      config        : cplot config
+      bases         : codes of the compared configs at the first load
+      first         : index of the first load plotted
+      series        : list with the load ids of each comp variable value
+      make_cmd      : function creating the plot command from series
+      plot_files    : plot files created by the task
+    """
+    self._add_plots(plot_files)
+    cmd = make_cmd(series)
+    if not self._is_stale(name, self._has_stale(series), cmd, series,
+                          *self._gates()):
+      return
+    cplot_task = self._create_plot_task(tm_var, name, self._plot_command(cmd),
+                                        series[0][0])
+    if self._get_resources is not None:
+      cplot_task.resources = self._get_resources('cplot', config)
+    cplot_task.priority = self._priority(1)
+    # add dependencies (loop through load and cvar)
+    for ids in series:
+      for id_task in ids:
+        self._add_dependency(cplot_task, self._parse_tasks, id_task)
+    self._track_outputs(cplot_task, plot_files)
+    self._track_state(cplot_task)
+    cplot_task.add_condition(self._plot_condition(
+      cplot_task, bases, first, series, make_cmd, plot_files))
+
+  def _cplot_fields_cmd(self, cplot_fields, labels, first, series):
+    """
+    This creates the command rendering the cplots of all latency distributions
+    in one process, which reads the aggregate files once. It is the list of
+    cplot commands rendered back to back (see _plot_command()).
+
+    Args:
+      cplot_fields  : list of (plot file, plot title, field) of each cplot
+      labels        : legend of the comp variable values
+      first         : index of the first load plotted
+      series        : list with the load ids of each comp variable value
+    """
+    # the cplots share the response file of the first one
+    return [self._cplot_cmd(cplot_png, cplot_title, field, labels, first,
+                            series, cplot_fields[0][0])
+            for cplot_png, cplot_title, field in cplot_fields]
+
+  def _cplot_cmd(self, cplot_png, cplot_title, field, labels, first, series,
+                 args_png=None):
+    """
+    This creates the cplot command
+
+    Args:
+      cplot_png     : plot file
+      cplot_title   : plot title
+      field         : latency distribution to plot
+      labels        : legend of the comp variable values
+      first         : index of the first load plotted
+      series        : list with the load ids of each comp variable value
+      args_png      : plot file naming the response file (default: cplot_png)
+    """
+    start, stop = self._load_range(first, len(series[0]))
+    cplot_cmd = ('sslcp --row {0} --title {1} --field {2} {3} {4} {5} '
+                 '{6} '
+                 .format(self._latency_mode.title(), cplot_title,
+                         field, cplot_png, start, stop, self._step))
+    # add plot settings if they exist
+    if self._plot_units is not None:
+      cplot_cmd += (' --units {0}'.format(self._plot_units))
+    if self._ymin is not None:
+      cplot_cmd += (' --ymin {0}'.format(self._ymin))
+    if self._ymax is not None:
+      cplot_cmd += (' --ymax {0}'.format(self._ymax))
+    # add agg files and legend to cmd
+    cplot_cmd += self._plot_inputs(
+      cplot_png if args_png is None else args_png, series)
+    cplot_cmd += labels
+    return cplot_cmd
+
+  def _load_series(self, bases, num_loads=None, first=0):
+    """
+    This creates the load ids of plotted configs
+
+    Args:
+      bases         : codes of the plotted configs at the first load
+      num_loads     : number of loads to include (None for all)
+      first         : index of the first load to include
+    """
+    if num_loads is None:
+      num_loads = len(self._load_offsets) - first
+    offsets = self._load_offsets[first:first + num_loads]
+    return [[self._index.task_id(code + offset) for offset in offsets]
+            for code in bases]
+
+  def _has_stale(self, series):
+    """
+    This checks whether load series have a stale id (see _plan_runs())
+
+    Args:
+      series        : list of load id lists
+    """
+    return any([x_id in self._stale_ids for ids in series for x_id in ids])
+
+  def _series_files(self, series):
+    """
+    This returns the aggregate files of load series
+
+    Args:
+      series        : list of load id lists
+    """
+    # only the aggregate file of each id, plots have many
+    data_dir = os.path.join(self._out_dir, 'data')
+    csv_ext = self._codec.csv_ext
+    agg_files = []
+    for ids in series:
+      for id_task in ids:
+        shard, stem = self._shard(id_task)
+        agg_files.append(os.path.join(
+          data_dir, shard, 'aggregate_{0}{1}'.format(stem, csv_ext)))
+    return agg_files
+
+  def _load_range(self, first, num_loads):
+    """
+    This returns the start and exclusive stop of the load range given to plots
+
+    Args:
+      first         : index of the first load being plotted
+      num_loads     : number of loads being plotted
+    """
+    start = self._start + first * self._step
+    if first + num_loads == len(self._load_offsets):
+      return start, self._stop + 1
+    return start, start + (num_loads - 1) * self._step + 1
+
+  def _plot_loads(self, bases):
+    """
+    This returns the configs and loads of a load sweep plot that weren't pruned:
+    the bases with at least one load and the longest run of consecutive loads
+    that all of them have, as (bases, first load index, number of loads). The
+    number of loads is 0 when the plot has nothing to show.
+
+    Args:
+      bases         : codes of the plotted configs at the first load
+    """
+    if self._valid is None:
+      return bases, 0, len(self._load_offsets)
+    bases = [x_base for x_base in bases
+             if any([x_base + y_off in self._valid
+                     for y_off in self._load_offsets])]
+    first = 0
+    num_loads = 0
+    run = 0
+    for load_idx, offset in enumerate(self._load_offsets):
+      if bases and all([x_base + offset in self._valid for x_base in bases]):
+        run += 1
+        if run > num_loads:
+          first = load_idx - run + 1
+          num_loads = run
+      else:
+        run = 0
+    return bases, first, num_loads
+
+  def _runs(self, code):
+    """
+    This returns the ids of the runs of a config, one per replica in replication
+    mode
+
+    Args:
+      code          : config code
+    """
+    id_task = self._index.task_id(code)
+    if self._replication is None:
+      return [id_task]
+    return ['{0}_{1}{2}'.format(id_task, self._replication.short_name,
+                                x_replica)
+            for x_replica in range(self._replication.max_replicas)]
+
+  def _run_config(self, config, replica):
+    """
+    This returns the config given to the set commands of a run, with the seed
+    variable in replication mode
+
+    Args:
+      config        : config
+      replica       : replica of the run
+    """
+    if self._replication is None:
+      return config
+    return config + [{
+      'name': self._replication.name,
+      'short_name': self._replication.short_name,
+      'value': self._replication.seed(replica),
+      'command': self._replication.set_command,
+      'compare': False
+    }]
+
+  def _run_condition(self, task, code, replica, condition):
+    """
+    This wraps the condition of a task of a run so that loads beyond saturation
+    and replicas that aren't needed are skipped
+
+    Args:
+      task          : task of the condition
+      code          : config code
+      replica       : replica of the run
+      condition     : condition used while the run is needed
+    """
+    condition = self._load_condition(task, code, condition)
+    if (self._replication is None or
+        replica < self._replication.min_replicas):
+      return condition
+    return taskrun.FunctionCondition(self._check_replica, task, code, replica,
+                                     condition)
+
+  def _check_replica(self, task, code, replica, condition):
+    if not self._is_replica_needed(code, replica):
+      self._skip(task)
+      return False
+    return condition.check()
+
+  def _is_replica_needed(self, code, replica):
+    """
+    This checks whether a replica of a config is simulated. Replicas are added
+    until the confidence interval of the statistic of the previous ones is
+    within the tolerance. Must be called after the previous replica has been
+    parsed.
+
+    Args:
+      code          : config code
+      replica       : replica
+    """
+    if replica < self._replication.min_replicas:
+      return True
+    key = (code, replica)
+    if key not in self._replica_needed:
+      if not self._is_replica_needed(code, replica - 1):
+        needed = False
+      else:
+        samples = []
+        for id_run in self._runs(code)[:replica]:
+          files = self._get_files(id_run)
+          if os.path.isfile(files['aggregate_csv']):
+            samples.append(self._replication.statistic_of(
+              files['aggregate_csv'], self._latency_mode.title()))
+        needed = not self._replication.converged(samples)
+      self._replica_needed[key] = needed
+    return self._replica_needed[key]
+
+  def _prev_load(self, code):
+    """
+    This returns the code of the previous load of a config that wasn't pruned,
+    None if there is none
+
+    Args:
+      code          : config code
+    """
+    load_idx = self._index.value_index(code, self._load_dim)
+    for prev_idx in range(load_idx - 1, -1, -1):
+      prev = code - (load_idx - prev_idx) * self._load_stride
+      if self._valid is None or prev in self._valid:
+        return prev
+    return None
+
+  def _add_plots(self, plot_files):
+    """
+    This records the plots of the sweep for the web viewer
+
+    Args:
+      plot_files    : plot files
+    """
+    if self._valid is not None:
+      plots_dir = os.path.join(self._out_dir, 'plots')
+      self._plots.update([os.path.relpath(x_file, plots_dir)
+                          for x_file in plot_files])
+
+  def _load_condition(self, task, code, condition):
+    """
+    This wraps the condition of a task of a single load so that loads beyond
+    saturation are skipped in adaptive load mode
+
+    Args:
+      task          : task of the condition
+      code          : config code of the task
+      condition     : condition used while the load is active
+    """
+    if self._saturation is None:
+      return condition
+    return taskrun.FunctionCondition(self._check_load, task, code, condition)
+
+  def _check_load(self, task, code, condition):
+    if not self._is_load_active(code):
+      self._skip(task)
+      return False
+    return condition.check()
+
+  def _is_load_active(self, code):
+    """
+    This checks whether a load is simulated in adaptive load mode. A load is
+    skipped once latency of the previous load exceeds the saturation multiple
+    of the latency of the first load. Must be called after the previous load
+    has been parsed.
+
+    Args:
+      code          : config code
+    """
+    if code not in self._load_active:
+      prev_code = self._prev_load(code)
+      if prev_code is None:
+        active = True
+      elif not self._is_load_active(prev_code):
+        active = False
+      else:
+        zero_code = prev_code
+        while self._prev_load(zero_code) is not None:
+          zero_code = self._prev_load(zero_code)
+        zero = self._read_latency(zero_code)
+        prev = self._read_latency(prev_code)
+        active = (zero is not None and prev is not None and
+                  prev <= self._saturation * zero)
+      self._load_active[code] = active
+    return self._load_active[code]
+
+  def _read_latency(self, code):
+    """
+    This reads the saturation latency statistic of a parsed config
+
+    Args:
+      code          : config code
+    """
+    files = self._get_files(self._index.task_id(code))
+    if not os.path.isfile(files['aggregate_csv']):
+      return None
+    grid = handycsv.GridStats.read(files['aggregate_csv'])
+    return float(grid.get(self._latency_mode.title(), self._saturation_field))
+
+  def _plot_condition(self, task, bases, first, series, make_cmd, plot_files):
+    """
+    This creates the condition of a load sweep plot. In adaptive load mode the
+    plot is trimmed to the loads that were simulated for every series once they
+    are known. With response files the inputs are only listed when the plot is
+    checked, and written to the response file when it runs.
+
+    Args:
+      task          : plot task
+      bases         : codes of the plotted configs at the first load
+      first         : index of the first load plotted
+      series        : list of load id lists of the plotted loads
+      make_cmd      : function creating the plot command from series
+      plot_files    : plot files created by the task
+    """
+    if self._saturation is None and not self._response_files:
+      return self._file_condition(task, self._series_files(series),
+                                  plot_files)
+    return taskrun.FunctionCondition(self._check_plot_loads, task, bases,
+                                     first, len(series[0]), make_cmd,
+                                     plot_files)
+
+  def _check_plot_loads(self, task, bases, first, num_loads, make_cmd,
+                        plot_files):
+    if self._saturation is not None:
+      offsets = self._load_offsets[first:first + num_loads]
+      for code in bases:
+        for load_idx, offset in enumerate(offsets):
+          if not self._is_load_active(code + offset):
+            num_loads = min(num_loads, load_idx)
+            break
+    if num_loads == 0:
+      # the plotted loads were all skipped
+      self._skip(task)
+      return False
+    series = self._load_series(bases, num_loads, first)
+    series_files = self._series_files(series)
+    task.command = self._plot_command(make_cmd(series))
+    if not self._file_condition(task, series_files, plot_files).check():
+      return False
+    if self._response_files:
+      with open(self._args_file(plot_files[0]), 'w') as fd_args:
+        for agg_file in series_files:
+          print(agg_file, file=fd_args)
+    return True
 
   def _create_web_viewer_task(self):
     files = self._get_files('')
@@ -697,7 +2448,11 @@ class Sweeper(object):
     # javascript
     show_div = get_show_div(self)
     cplot_divs = get_cplot_divs(self)
-    create_name = get_create_name()
+    if self._valid is None:
+      create_name = get_create_name()
+    else:
+      # grey out the plots pruned from the sweep
+      create_name = get_create_name(sorted(self._plots), self._id_cmp)
     compose_name = get_compose_name(self)
 
     js_all = show_div + cplot_divs + create_name + compose_name
@@ -0,0 +1,81 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+import collections
+import threading
+import time
+
+from .SweepObserver import SweepObserver
+
+class TaskLog(SweepObserver):
+  """
+  This is a SweepObserver recording the outcome of every task that finishes:
+  its status, wall time and the bytes it wrote. The Sweeper always observes its
+  tasks with one, so its report covers every kind of task.
+  """
+
+  def __init__(self):
+    """
+    Constructs a TaskLog object
+    """
+    self._lock = threading.Lock()
+    self._started = {}
+    self._tasks = collections.OrderedDict()
+
+  def task_started(self, name):
+    """
+    See SweepObserver.task_started()
+    """
+    with self._lock:
+      self._started[name] = time.time()
+
+  def task_finished(self, name, status, bytes_written):
+    """
+    See SweepObserver.task_finished()
+    """
+    with self._lock:
+      started = self._started.pop(name, None)
+      self._tasks[name] = {
+        'status': status,
+        'wall_s': None if started is None else time.time() - started,
+        'output_bytes': bytes_written
+      }
+
+  def tasks(self):
+    """
+    This returns an ordered dict of task name to its status, wall time in
+    seconds (None for tasks that didn't start) and bytes written (None for
+    tasks without output files), in the order they finished
+    """
+    with self._lock:
+      return collections.OrderedDict(self._tasks)
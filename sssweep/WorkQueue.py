@@ -0,0 +1,427 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import threading
+import time
+import uuid
+
+class WorkQueue(object):
+  """
+  This is a work queue in a directory shared by the hosts running a sweep. The
+  task manager of the sweep submits the commands of ready tasks (see QueueTask)
+  and any number of workers, on any host sharing the directory, claim and run
+  them. All state changes are atomic renames of files:
+
+    ready/<key>.json          a submitted job, keys sort by priority then age
+    claimed/<key>@<worker>    the job being run by a worker
+    done/<key>.json           the return code of a finished job
+    cancel/<key>              a request to kill a job
+    workers/<worker>          the heartbeat of a worker, touched periodically
+    stop                      a request to the workers to exit once idle
+
+  A worker whose heartbeat stops changing for longer than the timeout is dead,
+  its claimed jobs are put back in ready/ for other workers. Heartbeats are
+  compared by change rather than by age, so the clocks of the hosts don't need
+  to agree. A stop request only applies to the workers that were running when
+  it was made, workers started afterwards ignore it.
+  """
+
+  DIRS = ['ready', 'claimed', 'done', 'cancel', 'workers', 'output']
+
+  def __init__(self, queue_dir, heartbeat=5, timeout=60, poll=0.5):
+    """
+    Constructs a WorkQueue object
+
+    Args:
+      queue_dir     : shared directory of the queue
+      heartbeat     : seconds between the heartbeats of workers
+      timeout       : seconds without heartbeat after which a worker is dead
+      poll          : seconds between scans of the queue
+    """
+    self._dir = os.path.abspath(os.path.expanduser(queue_dir))
+    for sub_dir in WorkQueue.DIRS:
+      os.makedirs(os.path.join(self._dir, sub_dir), exist_ok=True)
+    self._heartbeat = heartbeat
+    self._timeout = timeout
+    self._poll = poll
+    self._lock = threading.Lock()
+    self._seq = 0
+    self._prefix = uuid.uuid4().hex[:8]
+    self._pending = {}
+    self._monitor = None
+    self._beats = {}
+    self._last_reclaim = time.time()
+
+  def _path(self, sub_dir, name):
+    return os.path.join(self._dir, sub_dir, name)
+
+  def _write(self, path, data):
+    """
+    This writes a json file atomically
+    """
+    tmp = '{0}.{1}.tmp'.format(path, uuid.uuid4().hex)
+    with open(tmp, 'w') as fd_tmp:
+      json.dump(data, fd_tmp)
+    os.replace(tmp, path)
+
+  def submit(self, name, command, resources, priority, stdout_file=None,
+             stderr_file=None):
+    """
+    This submits a command and returns the key of its job
+
+    Args:
+      name          : name of the task
+      command       : shell command
+      resources     : dict of resource to amount the command needs
+      priority      : priority of the task, higher runs first
+      stdout_file   : file of the stdout of the command (None to capture it)
+      stderr_file   : file of the stderr of the command (None to capture it)
+    """
+    with self._lock:
+      self._seq += 1
+      key = '{0:08d}-{1}-{2:09d}'.format(
+        max(0, 99999999 - int(priority)), self._prefix, self._seq)
+      self._pending[key] = [threading.Event(), None, None]
+      if self._monitor is None:
+        self._monitor = threading.Thread(target=self._monitor_jobs,
+                                         daemon=True)
+        self._monitor.start()
+    self._write(self._path('ready', key + '.json'), {
+      'name': name,
+      'command': command,
+      'resources': dict(resources or {}),
+      'stdout_file': stdout_file,
+      'stderr_file': stderr_file
+    })
+    return key
+
+  def wait(self, key):
+    """
+    This waits for a job and returns its return code (None if it was cancelled
+    before running) and its captured output
+    """
+    pending = self._pending[key]
+    pending[0].wait()
+    with self._lock:
+      del self._pending[key]
+    return pending[1], pending[2]
+
+  def cancel(self, key):
+    """
+    This kills a job, it is removed if it wasn't claimed yet
+    """
+    try:
+      os.remove(self._path('ready', key + '.json'))
+    except FileNotFoundError:
+      open(self._path('cancel', key), 'w').close()
+      return
+    self._finish(key, None, None)
+
+  def _finish(self, key, returncode, output):
+    with self._lock:
+      pending = self._pending.get(key)
+    if pending is not None and not pending[0].is_set():
+      pending[1] = returncode
+      pending[2] = output
+      pending[0].set()
+
+  def _monitor_jobs(self):
+    """
+    This collects the finished jobs of this queue and reclaims the jobs of dead
+    workers, while jobs are pending
+    """
+    while True:
+      with self._lock:
+        keys = set([x_key for x_key, x_pend in self._pending.items()
+                    if not x_pend[0].is_set()])
+        if not keys:
+          # started again by the next submit
+          self._monitor = None
+          return
+      for name in os.listdir(os.path.join(self._dir, 'done')):
+        key = name[:-len('.json')]
+        if not name.endswith('.json') or key not in keys:
+          continue
+        path = self._path('done', name)
+        with open(path, 'r') as fd_done:
+          done = json.load(fd_done)
+        os.remove(path)
+        output = None
+        out_path = self._path('output', key)
+        if os.path.isfile(out_path):
+          with open(out_path, 'r', errors='replace') as fd_out:
+            output = fd_out.read()
+          os.remove(out_path)
+        self._finish(key, done['returncode'], output)
+      self._maybe_reclaim()
+      time.sleep(self._poll)
+
+  def _maybe_reclaim(self):
+    if time.time() - self._last_reclaim >= self._heartbeat:
+      self._last_reclaim = time.time()
+      self.reclaim()
+
+  def reclaim(self):
+    """
+    This puts the claimed jobs of dead workers back in the queue and returns
+    their number
+    """
+    now = time.time()
+    alive = {}
+    reclaimed = 0
+    for name in os.listdir(os.path.join(self._dir, 'claimed')):
+      key, _, worker = name.partition('@')
+      if worker not in alive:
+        try:
+          mtime = os.path.getmtime(self._path('workers', worker))
+        except OSError:
+          mtime = None
+        # dead once the heartbeat hasn't changed for the timeout
+        seen = self._beats.get(worker)
+        if seen is None or seen[0] != mtime:
+          self._beats[worker] = seen = (mtime, now)
+        alive[worker] = now - seen[1] < self._timeout
+      if not alive[worker]:
+        try:
+          os.rename(self._path('claimed', name),
+                    self._path('ready', key + '.json'))
+          reclaimed += 1
+        except OSError:
+          pass
+    for worker, worker_alive in alive.items():
+      if not worker_alive:
+        try:
+          os.remove(self._path('workers', worker))
+        except OSError:
+          pass
+    return reclaimed
+
+  def stop(self):
+    """
+    This makes the running workers exit once they are idle
+    """
+    stop_file = os.path.join(self._dir, 'stop')
+    tmp = '{0}.{1}.tmp'.format(stop_file, uuid.uuid4().hex)
+    open(tmp, 'w').close()
+    os.replace(tmp, stop_file)
+
+  def _stop_request(self):
+    """
+    This returns the identity of the last stop request, None if there is none
+    """
+    try:
+      stat = os.stat(os.path.join(self._dir, 'stop'))
+    except FileNotFoundError:
+      return None
+    return (stat.st_ino, stat.st_mtime_ns)
+
+  def work(self, resources=None, idle_exit=None):
+    """
+    This runs a worker claiming and running the jobs that fit its resources,
+    until the queue is stopped or it has been idle for idle_exit seconds. Jobs
+    that don't give an amount of a resource use 1 cpu.
+
+    Args:
+      resources     : dict of resource to amount of this worker (default: the
+                      number of cpus)
+      idle_exit     : seconds of idleness after which the worker exits
+    """
+    capacity = dict(resources or {'cpus': os.cpu_count()})
+    used = {x_res: 0 for x_res in capacity}
+    worker = '{0}-{1}-{2}'.format(socket.gethostname(), os.getpid(),
+                                  uuid.uuid4().hex[:6])
+    beat_file = self._path('workers', worker)
+    # stop requests made before the worker started don't apply to it
+    old_stop = self._stop_request()
+    running = {}
+    stopping = threading.Event()
+    lock = threading.Lock()
+
+    def beat():
+      # heartbeat and kill requests
+      while not stopping.is_set():
+        with open(beat_file, 'w') as fd_beat:
+          fd_beat.write(str(time.time()))
+        with lock:
+          for key, job in running.items():
+            if os.path.exists(self._path('cancel', key)):
+              try:
+                os.killpg(os.getpgid(job['proc'].pid), signal.SIGTERM)
+              except ProcessLookupError:
+                pass
+        stopping.wait(self._heartbeat)
+    open(beat_file, 'w').close()
+    beater = threading.Thread(target=beat, daemon=True)
+    beater.start()
+
+    idle_since = time.time()
+    try:
+      while True:
+        # publish the finished jobs
+        with lock:
+          finished = [x_key for x_key, x_job in running.items()
+                      if x_job['proc'].poll() is not None]
+          for key in finished:
+            job = running.pop(key)
+            self._publish(key, worker, job)
+            for res, amount in job['needs'].items():
+              used[res] -= amount
+        # claim the jobs that fit, by priority
+        for name in sorted(os.listdir(os.path.join(self._dir, 'ready'))):
+          if not name.endswith('.json'):
+            # still being written
+            continue
+          key = name[:-len('.json')]
+          try:
+            with open(self._path('ready', name), 'r') as fd_job:
+              job = json.load(fd_job)
+          except (OSError, ValueError):
+            continue
+          needs = {x_res: job['resources'].get(x_res, 0) for x_res in used}
+          if 'cpus' in needs and 'cpus' not in job['resources']:
+            needs['cpus'] = 1
+          if any([used[x_res] + needs[x_res] > capacity[x_res]
+                  for x_res in needs]):
+            continue
+          try:
+            os.rename(self._path('ready', name),
+                      self._path('claimed', '{0}@{1}'.format(key, worker)))
+          except OSError:
+            # claimed by another worker
+            continue
+          job['needs'] = needs
+          with lock:
+            job['proc'] = self._start(key, job)
+            running[key] = job
+          for res, amount in needs.items():
+            used[res] += amount
+        if running:
+          idle_since = time.time()
+        elif (self._stop_request() not in [None, old_stop] or
+              (idle_exit is not None and
+               time.time() - idle_since >= idle_exit)):
+          break
+        self._maybe_reclaim()
+        time.sleep(self._poll)
+    finally:
+      # gives the running jobs back to the queue
+      stopping.set()
+      with lock:
+        for key, job in running.items():
+          try:
+            os.killpg(os.getpgid(job['proc'].pid), signal.SIGTERM)
+          except ProcessLookupError:
+            pass
+          job['proc'].wait()
+          try:
+            os.rename(self._path('claimed', '{0}@{1}'.format(key, worker)),
+                      self._path('ready', key + '.json'))
+          except OSError:
+            pass
+      if os.path.exists(beat_file):
+        os.remove(beat_file)
+
+  def _start(self, key, job):
+    """
+    This starts the process of a job
+    """
+    stdout_file = job['stdout_file']
+    if stdout_file is None:
+      stdout_file = self._path('output', key)
+    stdout_fd = open(stdout_file, 'w')
+    if job['stderr_file'] in [None, 'stdout', stdout_file]:
+      stderr_fd = stdout_fd
+    else:
+      stderr_fd = open(job['stderr_file'], 'w')
+    job['fds'] = [stdout_fd, stderr_fd]
+    return subprocess.Popen(job['command'], stdout=stdout_fd, stderr=stderr_fd,
+                            shell=True, start_new_session=True)
+
+  def _publish(self, key, worker, job):
+    """
+    This publishes the return code of a finished job, unless it was reclaimed
+    """
+    for fd_out in set(job['fds']):
+      fd_out.close()
+    done = self._path('done', key + '.json')
+    tmp = '{0}.{1}.tmp'.format(done, uuid.uuid4().hex)
+    with open(tmp, 'w') as fd_tmp:
+      json.dump({'returncode': job['proc'].returncode, 'worker': worker},
+                fd_tmp)
+    # removing the claim fails if the job was reclaimed meanwhile
+    try:
+      os.remove(self._path('claimed', '{0}@{1}'.format(key, worker)))
+    except FileNotFoundError:
+      os.remove(tmp)
+      return
+    os.replace(tmp, done)
+    try:
+      os.remove(self._path('cancel', key))
+    except FileNotFoundError:
+      pass
+
+
+if __name__ == '__main__':
+  # runs a worker of a queue
+  ap = argparse.ArgumentParser(description='sssweep work queue worker')
+  ap.add_argument('queue_dir', help='shared directory of the queue')
+  ap.add_argument('-c', '--cpus', type=int, default=os.cpu_count(),
+                  help='number of cpus of the worker')
+  ap.add_argument('-r', '--resource', action='append', default=[],
+                  help='other resource of the worker as name=amount')
+  ap.add_argument('-i', '--idle_exit', type=float, default=None,
+                  help='exit after being idle for this many seconds')
+  ap.add_argument('-b', '--heartbeat', type=float, default=5,
+                  help='seconds between heartbeats')
+  ap.add_argument('-t', '--timeout', type=float, default=60,
+                  help='seconds without heartbeat after which a worker is dead')
+  ap.add_argument('-s', '--stop', action='store_true',
+                  help='make the workers of the queue exit once idle')
+  args = ap.parse_args()
+  # kills the running jobs when terminated
+  signal.signal(signal.SIGTERM, lambda signum, frame: exit(-signum))
+  queue = WorkQueue(args.queue_dir, args.heartbeat, args.timeout)
+  if args.stop:
+    queue.stop()
+  else:
+    worker_res = {'cpus': args.cpus}
+    for res in args.resource:
+      res_name, _, res_amount = res.partition('=')
+      worker_res[res_name] = float(res_amount)
+    queue.work(worker_res, args.idle_exit)
@@ -28,7 +28,10 @@
  * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
  * POSSIBILITY OF SUCH DAMAGE.
 """
+from .ResourceModel import ResourceModel
+from .SweepObserver import SweepObserver
 from .Sweeper import Sweeper
+from .SweepTrace import SweepTrace
 from .web_viewer_gen import *
 
 __version__ = '0.1.0'
@@ -0,0 +1,73 @@
+"""
+ * Copyright (c) 2012-2017, Nic McDonald and Adriana Flores
+ * All rights reserved.
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its
+ * contributors may be used to endorse or promote products derived from
+ * this software without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+
+_lock = threading.Lock()
+
+class _LazyModule(types.ModuleType):
+  """
+  This is a stand-in for a module that imports it on the first attribute
+  access. The import is done under a lock so tasks running on several threads
+  never see a partially loaded module.
+  """
+
+  def __getattr__(self, attr):
+    # only called for attributes the stand-in doesn't have
+    module = self.__dict__.get('_module')
+    if module is None:
+      with _lock:
+        module = self.__dict__.get('_module')
+        if module is None:
+          module = importlib.import_module(self.__name__)
+          self.__dict__['_module'] = module
+    return getattr(module, attr)
+
+def lazy_import(name):
+  """
+  This returns a module that is only loaded when one of its attributes is first
+  used. This keeps heavy dependencies (e.g. ssplot pulls in matplotlib) out of
+  the import time of sssweep.
+
+  Args:
+    name      : absolute module name
+  """
+  if name in sys.modules:
+    return sys.modules[name]
+  if importlib.util.find_spec(name) is None:
+    raise ImportError('No module named {0}'.format(name), name=name)
+  return _LazyModule(name)
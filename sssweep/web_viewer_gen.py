@@ -29,6 +29,8 @@
  * POSSIBILITY OF SUCH DAMAGE.
 """
 
+import json
+
 
 def get_css():
   css = """\
@@ -400,8 +402,9 @@ function CplotDivs(elem) {{
   return top + dyn + bottom
 
 
-def get_create_name():
-  create_name = """\
+def get_create_name(plots=None, id_cmp=None):
+  if plots is None:
+    create_name = """\
 function noImgFile() {
   document.getElementById("plot_name").style.color = "red";
   document.getElementById('plot').src = '';
@@ -413,6 +416,70 @@ function createName() {
     document.getElementById('plot').src = '../plots/' + composeName();
 }
 """
+    return create_name
+
+  # sparse sweep - only the given plots exist
+  create_name = """\
+var plots_available = {{}};
+{0}.forEach(function(p) {{ plots_available[p] = true; }});
+
+function noImgFile() {{
+  document.getElementById("plot_name").style.color = "red";
+  document.getElementById('plot').src = '';
+}}
+
+function greyOptions() {{
+  // grey the options leading to plots pruned from the sweep
+  var sels = [];
+  var all = document.getElementsByTagName('select');
+  for (var i = 0; i < all.length; i++) {{
+    if (all[i].id != "mode_sel" && all[i].id != "{1}_sel" &&
+        all[i].parentNode.parentNode.style.display == "block") {{
+      sels.push(all[i]);
+    }}
+  }}
+  for (var i = 0; i < sels.length; i++) {{
+    // only when all other options are selected
+    var ready = true;
+    for (var j = 0; j < sels.length; j++) {{
+      if (j != i && sels[j].value == "") {{
+        ready = false;
+      }}
+    }}
+    var curr = sels[i].value;
+    for (var j = 0; j < sels[i].options.length; j++) {{
+      var opt = sels[i].options[j];
+      if (opt.value == "") {{
+        continue;
+      }}
+      var color = "";
+      if (ready) {{
+        sels[i].value = opt.value;
+        if (!plots_available[composeName()]) {{
+          color = "grey";
+        }}
+      }}
+      opt.style.color = color;
+    }}
+    sels[i].value = curr;
+  }}
+}}
+
+function createName() {{
+    greyOptions();
+    var name = composeName();
+    if (plots_available[name]) {{
+      document.getElementById("plot_name").innerHTML = name;
+      document.getElementById("plot_name").style.color = "black";
+      document.getElementById('plot').src = '../plots/' + name;
+    }} else {{
+      document.getElementById("plot_name").innerHTML = name +
+        " (not in sweep)";
+      document.getElementById("plot_name").style.color = "grey";
+      document.getElementById('plot').src = '';
+    }}
+}}
+""".format(json.dumps(plots), id_cmp)
   return create_name
 
 
@@ -437,6 +504,20 @@ function composeName() {
       y += document.getElementById(vars_sel_id[i]).value;
     }
   }
+"""
+  if self._layout == 'sharded':
+    # plots are in the shard subdirectory of their id (see the manifest)
+    top = 'var plot_shards = {0};\n\n'.format(
+      json.dumps(self._manifest, sort_keys=True)) + top
+    bottom += """\
+  var s = plot_shards[y.substr(1)];
+  if (s === undefined) {
+    return m + y + '.png';
+  }
+  return s[0] + '/' + m + '_' + s[1] + '.png'
+}"""
+  else:
+    bottom += """\
   return m + y + '.png'
 }"""
   # format variables for js
@@ -0,0 +1,85 @@
+"""
+Tests of the integer coded index of the sweep configs.
+"""
+
+import itertools
+import unittest
+from sssweep.ConfigIndex import ConfigIndex
+
+def variable(name, values):
+  return {'name': name, 'short_name': name[:2].upper(), 'values': values,
+          'command': None, 'compare': None}
+
+class ConfigIndexTest(unittest.TestCase):
+
+  def setUp(self):
+    self._variables = [variable('Routing', ['a', 'b']),
+                       variable('Size', [1, 2, 3]),
+                       variable('Load', [0.1, 0.2])]
+    self._index = ConfigIndex(self._variables)
+    # configs in generation order, the last variable varies the fastest
+    self._products = list(itertools.product(
+      *[x_var['values'] for x_var in self._variables]))
+
+  def test_shape(self):
+    self.assertEqual(self._index.widths, [2, 3, 2])
+    self.assertEqual(self._index.size, 12)
+    self.assertEqual([self._index.stride(dim) for dim in range(3)], [6, 2, 1])
+
+  def test_dims(self):
+    self.assertEqual(self._index.dims(), [0, 1, 2])
+    self.assertEqual(self._index.dims('Size'), [1])
+    self.assertEqual(self._index.dims(['Load', 'Routing']), [0, 2])
+    self.assertEqual(self._index.dims(dont='Load'), [0, 1])
+    self.assertEqual(self._index.dims(['Routing', 'Size'], dont=['Size']), [0])
+
+  def test_config(self):
+    for code, product in enumerate(self._products):
+      self.assertEqual(tuple([self._index.value_index(code, dim)
+                              for dim in range(3)]),
+                       tuple([self._variables[dim]['values'].index(value)
+                              for dim, value in enumerate(product)]))
+      config = self._index.config(code)
+      self.assertEqual(tuple([x_var['value'] for x_var in config]), product)
+      self.assertEqual([x_var['name'] for x_var in config],
+                       ['Routing', 'Size', 'Load'])
+    config = self._index.config(7, [0, 2])
+    self.assertEqual([x_var['value'] for x_var in config], ['b', 0.2])
+
+  def test_task_id(self):
+    on_demand = ConfigIndex(self._variables, precompute=False)
+    for code, product in enumerate(self._products):
+      task_id = '_'.join([str(x_val) for x_val in product])
+      self.assertEqual(self._index.task_id(code), task_id)
+      self.assertEqual(on_demand.task_id(code), task_id)
+    self.assertEqual(self._index.task_id(9, [0, 1]), 'b_2')
+    self.assertEqual(on_demand.task_id(9, [1]), '2')
+
+  def test_code(self):
+    # full configs round trip, missing variables of partial configs are at 0
+    for code in range(self._index.size):
+      self.assertEqual(self._index.code(self._index.config(code)), code)
+    self.assertEqual(self._index.code(self._index.config(9, [0, 1])), 8)
+    self.assertEqual(self._index.code([{'name': 'Load', 'value': 0.2},
+                                       {'name': 'Size', 'value': 3}]), 5)
+    self.assertEqual(self._index.code([]), 0)
+
+  def test_offsets(self):
+    # every combination of the given dimensions, in generation order
+    self.assertEqual(self._index.offsets([2]), [0, 1])
+    self.assertEqual(self._index.offsets([0, 2]), [0, 1, 6, 7])
+    self.assertEqual(self._index.offsets([2, 0]), [0, 1, 6, 7])
+    self.assertEqual(self._index.offsets([0, 1, 2]), list(range(12)))
+    self.assertEqual(self._index.offsets([]), [0])
+
+  def test_bases(self):
+    # every base plus every load offset covers all configs exactly once
+    bases = self._index.bases([2])
+    self.assertEqual(bases, [0, 2, 4, 6, 8, 10])
+    codes = [x_base + y_off for x_base in bases
+             for y_off in self._index.offsets([2])]
+    self.assertEqual(codes, list(range(12)))
+    self.assertEqual(self._index.bases([0, 1, 2]), [0])
+
+if __name__ == '__main__':
+  unittest.main()
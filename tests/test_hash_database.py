@@ -0,0 +1,102 @@
+"""
+Tests of the content hash up-to-date checks.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import taskrun
+from sssweep.HashDatabase import HashCondition, HashDatabase
+
+class Task(object):
+  def __init__(self, name, command):
+    self.name = name
+    self.command = command
+
+class SlowDatabase(HashDatabase):
+  # hashes files once released
+  def __init__(self, filename):
+    super().__init__(filename, 2)
+    self.release = threading.Event()
+
+  def _hash(self, filename, stamp):
+    self.release.wait()
+    return super()._hash(filename, stamp)
+
+class HashDatabaseTest(unittest.TestCase):
+
+  def setUp(self):
+    self._dir = tempfile.mkdtemp()
+    self._input = self._write('messages.mpf', 'messages')
+    self._output = self._write('aggregate.csv', 'aggregate')
+    self._db = os.path.join(self._dir, 'hashes.json')
+
+  def tearDown(self):
+    shutil.rmtree(self._dir)
+
+  def _write(self, name, text):
+    filename = os.path.join(self._dir, name)
+    with open(filename, 'w') as fd_out:
+      fd_out.write(text)
+    return filename
+
+  def _condition(self, database, task):
+    return HashCondition(database, task, [self._input], [self._output],
+                         taskrun.FileModificationCondition([self._input],
+                                                           [self._output]))
+
+  def _run(self, database, task, condition):
+    database.run_starting()
+    run = condition.check()
+    if run:
+      database.task_completed(task)
+    else:
+      database.task_bypassed(task)
+    database.run_complete()
+    return run
+
+  def test_touched(self):
+    # touched inputs with the same content are up to date
+    task = Task('parse', 'sslatency')
+    database = HashDatabase(self._db)
+    self.assertFalse(self._run(database, task,
+                               self._condition(database, task)))
+    os.utime(self._input, (1e9, 2e9))
+    os.utime(self._output, (1e9, 1e9))
+    database = HashDatabase(self._db)
+    self.assertFalse(self._run(database, task,
+                               self._condition(database, task)))
+    self._write('messages.mpf', 'other messages')
+    database = HashDatabase(self._db)
+    self.assertTrue(self._run(database, task, self._condition(database, task)))
+
+  def test_command(self):
+    task = Task('parse', 'sslatency')
+    database = HashDatabase(self._db)
+    self._run(database, task, self._condition(database, task))
+    task = Task('parse', 'sslatency --scalar 2')
+    database = HashDatabase(self._db)
+    self.assertTrue(self._run(database, task, self._condition(database, task)))
+
+  def test_no_wait(self):
+    # an input written during the run isn't hashed by the condition
+    task = Task('parse', 'sslatency')
+    database = SlowDatabase(self._db)
+    database.release.set()
+    database.run_starting()
+    database.release.clear()
+    self._write('messages.mpf', 'new messages')
+    condition = self._condition(database, task)
+    self.assertTrue(condition.check())
+    database.task_completed(task)
+    # the signature is recorded once the input is hashed
+    database.release.set()
+    database.run_complete()
+    database = HashDatabase(self._db)
+    self.assertFalse(self._run(database, task,
+                               self._condition(database, task)))
+
+if __name__ == '__main__':
+  unittest.main()
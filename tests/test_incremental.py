@@ -0,0 +1,117 @@
+"""
+Regression tests of incremental sweeps whose tasks are skipped by adaptive
+loads or replicas. The sweeps run fake supersim and sslatency binaries whose
+latency grows with the load and varies with the seed.
+"""
+
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import taskrun
+import sssweep
+
+SUPERSIM = '''#!{python}
+import gzip, sys
+load = seed = '0'
+outs = []
+for arg in sys.argv[2:]:
+  if '=string=' in arg:
+    outs.append(arg.split('=string=')[1])
+  elif arg.startswith('load='):
+    load = arg[5:]
+  elif arg.startswith('seed='):
+    seed = arg[5:]
+for out in outs:
+  with (gzip.open(out, 'wt') if out.endswith('.gz') else open(out, 'w')) as fd:
+    fd.write('{{0}} {{1}}\\n'.format(load, seed))
+'''
+
+SSLATENCY = '''#!{python}
+import gzip, sys
+lat, agg, mpf = sys.argv[2], sys.argv[4], sys.argv[5]
+load, seed = [float(x) for x in gzip.open(mpf, 'rt').read().split()]
+mean = 10.0 / (1 - load) * (1 + 0.05 * ((seed * 7) % 5 - 2))
+fields = ['Minimum', 'Mean', 'Median', '90th%', '99th%', '99.9th%',
+          '99.99th%', '99.999th%', 'Maximum']
+with gzip.open(agg, 'wt') as fd:
+  fd.write('Latency,' + ','.join(fields) + '\\n')
+  for row in ['Packet', 'Message', 'Transaction']:
+    fd.write(row + ',' + ','.join([str(mean)] * len(fields)) + '\\n')
+with gzip.open(lat, 'wt') as fd:
+  fd.write('{{0}}\\n'.format(mean))
+'''
+
+class IncrementalTest(unittest.TestCase):
+
+  def setUp(self):
+    self._dir = tempfile.mkdtemp()
+    self._bin = os.path.join(self._dir, 'bin')
+    os.mkdir(self._bin)
+    for name, script in [('supersim', SUPERSIM), ('sslatency', SSLATENCY)]:
+      path = os.path.join(self._bin, name)
+      with open(path, 'w') as fd_bin:
+        fd_bin.write(script.format(python=sys.executable))
+      os.chmod(path, 0o755)
+    self._settings = os.path.join(self._dir, 'settings.json')
+    open(self._settings, 'w').close()
+
+  def tearDown(self):
+    shutil.rmtree(self._dir)
+
+  def _sweep(self, out, incremental=True, saturation=None, tolerance=None):
+    # runs a sweep, returns whether all tasks succeeded
+    rm = taskrun.ResourceManager(taskrun.CounterResource('cpus', 1, 4))
+    tm = taskrun.TaskManager(
+      resource_manager=rm, failure_mode=taskrun.FailureMode.ACTIVE_CONTINUE)
+    sweeper = sssweep.Sweeper(
+      os.path.join(self._bin, 'supersim'), self._settings,
+      os.path.join(self._bin, 'sslatency'), os.path.join(self._dir, out),
+      qplot=False, lplot=False, cplot=False, web_viewer=False,
+      incremental=incremental)
+    sweeper.add_variable('Routing', 'RA', ['OB', 'AD'],
+                         lambda v, c: 'ra={0}'.format(v))
+    sweeper.add_loads('Load', 'LD', 0, 90, 10,
+                      lambda v, c: 'load={0}'.format(v),
+                      saturation=saturation)
+    if tolerance is not None:
+      sweeper.add_replicas('Seed', 'S', 5, lambda v, c: 'seed={0}'.format(v),
+                           min_replicas=2, tolerance=tolerance)
+    sweeper.create_tasks(tm)
+    return tm.run_tasks()
+
+  def _aggregates(self, out):
+    return sorted([os.path.basename(x_file) for x_file in glob.glob(
+      os.path.join(self._dir, out, 'data', 'aggregate_*.csv.gz'))])
+
+  def test_saturation_raised(self):
+    # loads skipped at the first saturation are simulated at the second
+    self.assertTrue(self._sweep('inc', saturation=1.3))
+    first = self._aggregates('inc')
+    self.assertTrue(self._sweep('inc', saturation=3.0))
+    self.assertTrue(self._sweep('full', incremental=False, saturation=3.0))
+    self.assertGreater(len(self._aggregates('full')), len(first))
+    self.assertEqual(self._aggregates('inc'), self._aggregates('full'))
+
+  def test_tolerance_lowered(self):
+    # replicas that weren't needed at the first tolerance are simulated when
+    # the lower tolerance needs them
+    self.assertTrue(self._sweep('inc', tolerance=0.2))
+    first = self._aggregates('inc')
+    self.assertTrue(self._sweep('inc', tolerance=0.01))
+    self.assertTrue(self._sweep('full', incremental=False, tolerance=0.01))
+    self.assertGreater(len(self._aggregates('full')), len(first))
+    self.assertEqual(self._aggregates('inc'), self._aggregates('full'))
+    for replicas in glob.glob(os.path.join(self._dir, 'inc', 'data',
+                                           'replicas_*.json')):
+      full = os.path.join(self._dir, 'full', 'data',
+                          os.path.basename(replicas))
+      with open(replicas, 'r') as fd_inc, open(full, 'r') as fd_full:
+        self.assertEqual(json.load(fd_inc)['replicas'],
+                         json.load(fd_full)['replicas'])
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,91 @@
+"""
+Golden file tests of the in-process latency parser. The expected latency and
+aggregate files of a small message log with two transactions, two messages and
+three packets are in the format of sslatency and were checked by hand.
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from sssweep.LatencyParser import LatencyParser
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data',
+                    'latency')
+
+class SmallChunks(LatencyParser):
+  CHUNK = 16
+
+class LatencyParserTest(unittest.TestCase):
+
+  def setUp(self):
+    self._dir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self._dir)
+
+  def _read(self, filename):
+    opener = gzip.open if filename.endswith('.gz') else open
+    with opener(filename, 'rt') as fd_in:
+      return fd_in.read()
+
+  def _parse(self, parser, messages, ext=''):
+    latency = os.path.join(self._dir, 'latency.csv' + ext)
+    aggregate = os.path.join(self._dir, 'aggregate.csv' + ext)
+    grid = parser.parse(messages, latency, aggregate)
+    return grid, self._read(latency), self._read(aggregate)
+
+  def _golden(self, name):
+    return self._read(os.path.join(DATA, name))
+
+  def test_golden(self):
+    grid, latency, aggregate = self._parse(
+      LatencyParser('Packet'), os.path.join(DATA, 'messages.mpf'))
+    self.assertEqual(latency, self._golden('latency.csv'))
+    self.assertEqual(aggregate, self._golden('aggregate.csv'))
+    self.assertEqual(aggregate.splitlines()[0],
+                     'Latency,' + ','.join([x_field for x_field, _
+                                            in LatencyParser.FIELDS]))
+    self.assertAlmostEqual(grid.get('Packet', 'Mean'), 35 / 3, places=5)
+    self.assertEqual(grid.get('Transaction', 'Maximum'), 40)
+
+  def test_scaled(self):
+    _, latency, aggregate = self._parse(
+      LatencyParser('Transaction', 0.5), os.path.join(DATA, 'messages.mpf'))
+    self.assertEqual(latency, self._golden('latency_scaled.csv'))
+    self.assertEqual(aggregate, self._golden('aggregate_scaled.csv'))
+
+  def test_compressed_chunks(self):
+    # messages split over many chunks of a gzip message log
+    messages = os.path.join(self._dir, 'messages.mpf.gz')
+    with gzip.open(messages, 'wt') as fd_mpf:
+      fd_mpf.write(self._golden('messages.mpf'))
+    _, latency, aggregate = self._parse(SmallChunks('Packet'), messages,
+                                        '.gz')
+    self.assertEqual(latency, self._golden('latency.csv'))
+    self.assertEqual(aggregate, self._golden('aggregate.csv'))
+
+  def test_empty(self):
+    messages = os.path.join(self._dir, 'messages.mpf')
+    open(messages, 'w').close()
+    grid, latency, aggregate = self._parse(LatencyParser('Message'), messages)
+    self.assertEqual(latency, '')
+    lines = aggregate.splitlines()
+    self.assertEqual(len(lines), 4)
+    for row, line in zip(LatencyParser.ROWS, lines[1:]):
+      self.assertEqual(line, ','.join([row] + ['nan'] * 9))
+
+  def test_unfinished(self):
+    # transactions that didn't end have no latency
+    messages = os.path.join(self._dir, 'messages.mpf')
+    with open(messages, 'w') as fd_mpf:
+      fd_mpf.write('+T,1,10\n+M,0,0,1\n+P,0,0,1\nF,0,10,14\n-P\n-M\n')
+    _, latency, aggregate = self._parse(LatencyParser('Transaction'), messages)
+    self.assertEqual(latency, '')
+    lines = aggregate.splitlines()
+    self.assertEqual(lines[1], ','.join(['Packet'] + ['4.000000'] * 9))
+    self.assertEqual(lines[3], ','.join(['Transaction'] + ['nan'] * 9))
+
+if __name__ == '__main__':
+  unittest.main()
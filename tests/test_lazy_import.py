@@ -0,0 +1,63 @@
+"""
+Tests of the modules that are loaded on first use.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from sssweep.lazy_import import lazy_import
+
+SLOW_MODULE = '''
+import time
+time.sleep(0.2)
+def array(values):
+  return list(values)
+'''
+
+class LazyImportTest(unittest.TestCase):
+
+  def setUp(self):
+    self._dir = tempfile.mkdtemp()
+    with open(os.path.join(self._dir, 'sssweep_slow.py'), 'w') as fd_mod:
+      fd_mod.write(SLOW_MODULE)
+    sys.path.insert(0, self._dir)
+
+  def tearDown(self):
+    sys.path.remove(self._dir)
+    sys.modules.pop('sssweep_slow', None)
+    shutil.rmtree(self._dir)
+
+  def test_first_use(self):
+    module = lazy_import('sssweep_slow')
+    self.assertNotIn('sssweep_slow', sys.modules)
+    self.assertEqual(module.array((1, 2)), [1, 2])
+    self.assertIn('sssweep_slow', sys.modules)
+    self.assertIs(lazy_import('sssweep_slow'), sys.modules['sssweep_slow'])
+
+  def test_missing(self):
+    with self.assertRaises(ImportError):
+      lazy_import('sssweep_missing')
+
+  def test_threads(self):
+    # tasks on several threads use the module while it is still loading
+    module = lazy_import('sssweep_slow')
+    results = []
+    errors = []
+    def use():
+      try:
+        results.append(module.array([1]))
+      except Exception as ex:
+        errors.append(ex)
+    threads = [threading.Thread(target=use) for _ in range(16)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    self.assertEqual(errors, [])
+    self.assertEqual(results, [[1]] * 16)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,43 @@
+"""
+Tests of the warm plotting worker processes.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# a sweep script without an "if __name__ == '__main__':" guard
+SCRIPT = textwrap.dedent("""
+  import os
+  import sys
+  sys.path.insert(0, {root!r})
+  from sssweep.PlotPool import PlotPool
+  print('script ran', flush=True)
+  pool = PlotPool(2)
+  pool.run_starting()
+  print(pool.submit('missing_plot_script').result(), flush=True)
+  pool.run_complete()
+""")
+
+class PlotPoolTest(unittest.TestCase):
+
+  def test_unguarded_script(self):
+    # the workers don't run the script again
+    with tempfile.TemporaryDirectory() as tmp:
+      script = os.path.join(tmp, 'sweep.py')
+      with open(script, 'w') as fd:
+        fd.write(SCRIPT.format(root=ROOT))
+      out = subprocess.run([sys.executable, script], stdout=subprocess.PIPE,
+                           stderr=subprocess.STDOUT, universal_newlines=True,
+                           timeout=120)
+    self.assertEqual(out.returncode, 0, out.stdout)
+    self.assertEqual(out.stdout.splitlines(),
+                     ['script ran', 'missing_plot_script not found'])
+
+if __name__ == '__main__':
+  unittest.main()
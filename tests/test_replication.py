@@ -0,0 +1,102 @@
+"""
+Tests of the confidence intervals and the combination of replicated runs.
+"""
+
+import json
+import math
+import os
+import shutil
+import tempfile
+import unittest
+import handycsv
+from sssweep.Replication import Replication
+
+class ReplicationTest(unittest.TestCase):
+
+  def setUp(self):
+    self._dir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self._dir)
+
+  def test_t_quantile(self):
+    # two sided 95% quantiles of the tables
+    for dof, quantile in [(1, 12.7062), (2, 4.3027), (4, 2.7764),
+                          (9, 2.2622), (30, 2.0423), (1000, 1.9623)]:
+      self.assertAlmostEqual(Replication.t_quantile(0.975, dof), quantile,
+                             places=3)
+    self.assertAlmostEqual(Replication.t_quantile(0.95, 10), 1.8125, places=3)
+    self.assertAlmostEqual(Replication.t_quantile(0.995, 5), 4.0321, places=3)
+
+  def test_betainc(self):
+    self.assertEqual(Replication._betainc(2, 3, 0), 0.0)
+    self.assertEqual(Replication._betainc(2, 3, 1), 1.0)
+    for x_val in [0.1, 0.5, 0.9]:
+      self.assertAlmostEqual(Replication._betainc(1, 1, x_val), x_val)
+      self.assertAlmostEqual(Replication._betainc(3, 1, x_val), x_val ** 3)
+      self.assertAlmostEqual(Replication._betainc(1, 4, x_val),
+                             1 - (1 - x_val) ** 4)
+    self.assertAlmostEqual(Replication._betainc(2.5, 2.5, 0.5), 0.5)
+
+  def test_interval(self):
+    replication = Replication('Seed', 'S', 10, None)
+    mean, half_width = replication.interval([1.0, 2.0, 3.0])
+    self.assertAlmostEqual(mean, 2.0)
+    self.assertAlmostEqual(half_width, 4.3027 / math.sqrt(3), places=3)
+
+  def test_converged(self):
+    replication = Replication('Seed', 'S', 10, None, tolerance=0.05)
+    self.assertFalse(replication.converged([]))
+    self.assertFalse(replication.converged([10.0]))
+    self.assertTrue(replication.converged([10.0, 10.0]))
+    # half width of 6.3% of the mean with 2 samples, 0.4% with 10
+    self.assertFalse(replication.converged([10.0, 10.1]))
+    self.assertTrue(replication.converged([10.0, 10.1] * 5))
+    self.assertTrue(Replication('Seed', 'S', 10, None, tolerance=0.1)
+                    .converged([10.0, 10.1]))
+
+  def _aggregate(self, name, rows):
+    filename = os.path.join(self._dir, name)
+    with open(filename, 'w') as fd_agg:
+      print('Latency,Minimum,Mean,Maximum', file=fd_agg)
+      for row, values in rows.items():
+        print(','.join([row] + [str(x_val) for x_val in values]), file=fd_agg)
+    return filename
+
+  def test_combine(self):
+    replication = Replication('Seed', 'S', 10, None, min_replicas=2)
+    aggregates = [
+      self._aggregate('agg0.csv', {'Packet': [1, 4, 9], 'Message': [2, 5, 8]}),
+      self._aggregate('agg1.csv', {'Packet': [2, 6, 7], 'Message': [1, 7, 9]}),
+      self._aggregate('agg2.csv', {'Packet': [3, 8, 8], 'Message': [3, 6, 7]})]
+    latency = os.path.join(self._dir, 'lat0.csv')
+    with open(latency, 'w') as fd_lat:
+      print('1,2,3', file=fd_lat)
+    out = os.path.join(self._dir, 'agg.csv')
+    latency_out = os.path.join(self._dir, 'lat.csv')
+    summary_json = os.path.join(self._dir, 'replicas.json')
+    replication.combine(aggregates, latency, out, latency_out, summary_json,
+                        'Packet')
+
+    # extremes over the replicas, means of the other statistics
+    grid = handycsv.GridStats.read(out)
+    self.assertEqual(float(grid.get('Packet', 'Minimum')), 1)
+    self.assertEqual(float(grid.get('Packet', 'Mean')), 6)
+    self.assertEqual(float(grid.get('Packet', 'Maximum')), 9)
+    self.assertEqual(float(grid.get('Message', 'Minimum')), 1)
+    self.assertEqual(float(grid.get('Message', 'Mean')), 6)
+    self.assertEqual(float(grid.get('Message', 'Maximum')), 9)
+    with open(latency_out, 'r') as fd_lat:
+      self.assertEqual(fd_lat.read(), '1,2,3\n')
+
+    with open(summary_json, 'r') as fd_sum:
+      summary = json.load(fd_sum)
+    self.assertEqual(summary['replicas'], 3)
+    self.assertEqual(summary['samples'], [4.0, 6.0, 8.0])
+    self.assertAlmostEqual(summary['mean'], 6.0)
+    self.assertAlmostEqual(summary['half_width'], 4.3027 * 2 / math.sqrt(3),
+                           places=3)
+    self.assertFalse(summary['converged'])
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,70 @@
+"""
+Tests of the model predicting the resources of sims from their usage logs.
+"""
+
+import os
+import tempfile
+import unittest
+from sssweep.ResourceModel import ResourceModel
+
+USAGE = """\
+\tCommand being timed: "supersim"
+\tElapsed (wall clock) time (h:mm:ss or m:ss): 0:{time:05.2f}
+\tMaximum resident set size (kbytes): {mem_kb}
+\tExit status: 0
+"""
+
+def config(routing, load):
+  return [{'name': 'Routing', 'value': routing},
+          {'name': 'Load', 'value': load}]
+
+class ResourceModelTest(unittest.TestCase):
+
+  def setUp(self):
+    self._tmp = tempfile.TemporaryDirectory()
+    self._model = os.path.join(self._tmp.name, 'model.jsonl')
+    self._logs = 0
+
+  def tearDown(self):
+    self._tmp.cleanup()
+
+  def _log(self, time, mem_gib):
+    self._logs += 1
+    usage_log = os.path.join(self._tmp.name, 'usage_{0}.log'.format(self._logs))
+    with open(usage_log, 'w') as fd_log:
+      fd_log.write(USAGE.format(time=time, mem_kb=int(mem_gib * 1024**2)))
+    return usage_log
+
+  def test_predict(self):
+    # loads are fitted linearly within the family of a routing algorithm
+    model = ResourceModel(self._model, 'sweep')
+    for load, mem in [(10, 1.0), (20, 2.0)]:
+      model.observe(config('OB', load), self._log(load, mem))
+    self.assertAlmostEqual(model.predict(config('OB', 20), 'mem'), 2.0)
+    self.assertAlmostEqual(model.predict(config('OB', 30), 'mem'), 3.0)
+    self.assertAlmostEqual(model.predict(config('OB', 30), 'time'), 30.0)
+    self.assertIsNone(model.predict(config('AD', 30), 'mem'))
+
+  def test_sweeps_and_replicas(self):
+    # identical configs of other sweeps and replicas don't collide
+    one = ResourceModel(self._model, 'one')
+    log_one = self._log(10, 1.0)
+    one.observe(config('OB', 10), log_one)
+    log_replica = self._log(11, 1.5)
+    one.observe(config('OB', 10), log_replica, replica=1)
+    two = ResourceModel(self._model, 'two')
+    log_two = self._log(12, 4.0)
+    two.observe(config('OB', 10), log_two)
+
+    one = ResourceModel(self._model, 'one')
+    self.assertFalse(one.is_stale(config('OB', 10), log_one))
+    self.assertFalse(one.is_stale(config('OB', 10), log_replica, replica=1))
+    self.assertTrue(one.is_stale(config('OB', 10), log_two))
+    self.assertAlmostEqual(one.predict(config('OB', 10), 'mem'), 1.0)
+    self.assertAlmostEqual(one.predict(config('OB', 10), 'mem', 1), 1.5)
+    self.assertAlmostEqual(two.predict(config('OB', 10), 'mem'), 4.0)
+    with open(self._model, 'r') as fd_model:
+      self.assertEqual(len(fd_model.readlines()), 3)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,98 @@
+"""
+Tests of the sampling modes of sampled sweeps.
+"""
+
+import collections
+import itertools
+import unittest
+from sssweep.Sampler import Sampler
+
+def everything(config):
+  return True
+
+class SamplerTest(unittest.TestCase):
+
+  def _counts(self, configs, dim):
+    return collections.Counter([x_config[dim] for x_config in configs])
+
+  def test_random(self):
+    configs = Sampler('random', 10, seed=1).sample([4, 5, 6], everything)
+    self.assertEqual(len(configs), 10)
+    self.assertEqual(len(set(configs)), 10)
+    self.assertEqual(configs, sorted(configs))
+    self.assertEqual(configs,
+                     Sampler('random', 10, seed=1).sample([4, 5, 6],
+                                                          everything))
+    self.assertNotEqual(configs,
+                        Sampler('random', 10, seed=2).sample([4, 5, 6],
+                                                             everything))
+
+  def test_random_invalid(self):
+    # only the valid configs are sampled, all of them when there are fewer
+    def is_valid(config):
+      return config[0] == 0
+    configs = Sampler('random', 100).sample([4, 5], is_valid)
+    self.assertEqual(configs, [(0, x_idx) for x_idx in range(5)])
+
+  def test_lhs(self):
+    # every value of every dimension is sampled the same number of times
+    configs = Sampler('lhs', 8, seed=3).sample([8, 4, 2], everything)
+    self.assertEqual(len(configs), 8)
+    self.assertEqual(self._counts(configs, 0), {x_idx: 1 for x_idx in range(8)})
+    self.assertEqual(self._counts(configs, 1), {x_idx: 2 for x_idx in range(4)})
+    self.assertEqual(self._counts(configs, 2), {x_idx: 4 for x_idx in range(2)})
+
+  def test_lhs_invalid(self):
+    # invalid configs are replaced by valid ones
+    def is_valid(config):
+      return config[1] != 0
+    configs = Sampler('lhs', 6, seed=3).sample([6, 3], is_valid)
+    self.assertEqual(len(configs), 6)
+    self.assertTrue(all([is_valid(x_config) for x_config in configs]))
+
+  def _check_orthogonal(self, configs, widths):
+    # every pair of dimensions has every pair of values the same number of
+    # times, so no main effects are aliased
+    for dim0, dim1 in itertools.combinations(range(len(widths)), 2):
+      pairs = collections.Counter([(x_config[dim0], x_config[dim1])
+                                   for x_config in configs])
+      self.assertEqual(len(pairs), widths[dim0] * widths[dim1])
+      self.assertEqual(len(set(pairs.values())), 1)
+
+  def test_fractional_two_levels(self):
+    # half fraction of 2^4 with the full factorial of the first 3 dimensions
+    widths = [2, 2, 2, 2]
+    configs = Sampler('fractional', 8).sample(widths, everything)
+    self.assertEqual(len(configs), 8)
+    self.assertEqual(set([x_config[:3] for x_config in configs]),
+                     set(itertools.product(range(2), repeat=3)))
+    self._check_orthogonal(configs, widths)
+
+  def test_fractional_three_levels(self):
+    # the L9 orthogonal array of 4 dimensions of 3 values
+    widths = [3, 3, 3, 3]
+    configs = Sampler('fractional', 9).sample(widths, everything)
+    self.assertEqual(len(configs), 9)
+    self._check_orthogonal(configs, widths)
+
+  def test_fractional_single_value(self):
+    # dimensions with a single value don't take part
+    widths = [1, 2, 2, 2]
+    configs = Sampler('fractional', 4).sample(widths, everything)
+    self.assertEqual(len(configs), 4)
+    self.assertTrue(all([x_config[0] == 0 for x_config in configs]))
+    self._check_orthogonal([x_config[1:] for x_config in configs], widths[1:])
+
+  def test_fractional_too_many(self):
+    # 4 runs of 2 values only generate one more dimension
+    with self.assertRaises(AssertionError):
+      Sampler('fractional', 4).sample([2, 2, 2, 2], everything)
+
+  def test_invalid_settings(self):
+    with self.assertRaises(AssertionError):
+      Sampler('grid', 4)
+    with self.assertRaises(AssertionError):
+      Sampler('random', None)
+
+if __name__ == '__main__':
+  unittest.main()
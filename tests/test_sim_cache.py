@@ -0,0 +1,65 @@
+"""
+Tests of the simulation cache shared between sweeps.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from sssweep.SimCache import SimCache
+
+class SimCacheTest(unittest.TestCase):
+
+  def setUp(self):
+    self._dir = tempfile.mkdtemp()
+    self._cache = SimCache(os.path.join(self._dir, 'cache'))
+
+  def tearDown(self):
+    shutil.rmtree(self._dir)
+
+  def _write(self, name, text):
+    filename = os.path.join(self._dir, name)
+    with open(filename, 'w') as fd_out:
+      fd_out.write(text)
+    return filename
+
+  def _read(self, filename):
+    with open(filename, 'r') as fd_in:
+      return fd_in.read()
+
+  def test_fetch(self):
+    key = SimCache.key('settings', 'load=0.1')
+    messages = self._write('messages.mpf', 'simulated')
+    self.assertFalse(self._cache.contains(key))
+    self.assertFalse(self._cache.fetch(key, {'messages_mpf': messages}))
+    self._cache.store(key, {'messages_mpf': messages})
+    self.assertTrue(self._cache.contains(key))
+
+    # the outputs of another sweep are linked with the entry
+    fetched = os.path.join(self._dir, 'fetched.mpf')
+    self.assertTrue(self._cache.fetch(key, {'messages_mpf': fetched}))
+    self.assertEqual(self._read(fetched), 'simulated')
+    self.assertEqual(os.stat(fetched).st_ino, os.stat(messages).st_ino)
+    with open(os.path.join(self._dir, 'cache', 'size'), 'r') as fd_size:
+      self.assertEqual(int(fd_size.read()), len('simulated'))
+
+  def test_unshare(self):
+    # outputs written again after unsharing don't change the entry
+    key = SimCache.key('settings', 'load=0.2')
+    messages = self._write('messages.mpf', 'simulated')
+    self._cache.store(key, {'messages_mpf': messages})
+    SimCache.unshare([messages, os.path.join(self._dir, 'missing.mpf')])
+    self.assertFalse(os.path.exists(messages))
+    self._write('messages.mpf', 'simulated again')
+    fetched = os.path.join(self._dir, 'fetched.mpf')
+    self.assertTrue(self._cache.fetch(key, {'messages_mpf': fetched}))
+    self.assertEqual(self._read(fetched), 'simulated')
+
+  def test_missing_output(self):
+    # outputs that were never created aren't stored
+    key = SimCache.key('settings', 'load=0.9')
+    self._cache.store(key, {'messages_mpf': os.path.join(self._dir, 'none')})
+    self.assertFalse(self._cache.contains(key))
+
+if __name__ == '__main__':
+  unittest.main()
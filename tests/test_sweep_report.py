@@ -0,0 +1,66 @@
+"""
+Tests of the performance report of sweeps.
+"""
+
+import unittest
+from sssweep.SweepReport import SweepReport
+from sssweep.TaskLog import TaskLog
+
+class SweepReportTest(unittest.TestCase):
+
+  def _report(self):
+    report = SweepReport(['Routing', 'Load'])
+    report.add('OB_0', 'sim', ['OB', '0'], {'wall_s': 10.0, 'cpu_s': 9.0},
+               'completed')
+    report.add('AD_0', 'sim', ['AD', '0'], {'wall_s': 30.0, 'cpu_s': 28.0},
+               'bypassed')
+    report.add('AD_0', 'simfetch', ['AD', '0'], {'wall_s': 0.5}, 'completed')
+    report.add('OB_0', 'parse', ['OB', '0'], {'wall_s': None}, 'bypassed')
+    report.add('Cmp_0', 'lplot', None, {'wall_s': 2.0, 'output_bytes': 100},
+               'failed')
+    return report
+
+  def test_totals(self):
+    # every kind of task is counted per status
+    totals = self._report().totals()
+    self.assertEqual(list(totals.keys()), ['sim', 'simfetch', 'parse', 'lplot'])
+    self.assertEqual(totals['sim']['count'], 2)
+    self.assertEqual(totals['sim']['completed'], 1)
+    self.assertEqual(totals['sim']['bypassed'], 1)
+    self.assertEqual(totals['sim']['wall_s'], 40.0)
+    self.assertEqual(totals['parse']['bypassed'], 1)
+    self.assertEqual(totals['parse']['wall_s'], 0.0)
+    self.assertEqual(totals['lplot']['failed'], 1)
+    self.assertEqual(totals['lplot']['output_bytes'], 100)
+
+  def test_aggregates(self):
+    # tasks of several configs have no values to aggregate by
+    aggregates = self._report().aggregates()
+    self.assertEqual(list(aggregates.keys()), ['sim', 'simfetch', 'parse'])
+    self.assertEqual(aggregates['sim']['Routing']['AD']['wall_s_mean'], 30.0)
+    self.assertEqual(aggregates['sim']['Load']['0']['count'], 2)
+    self.assertIsNone(aggregates['parse']['Load']['0']['wall_s_mean'])
+
+  def test_configs(self):
+    configs = self._report().configs()
+    self.assertEqual(len(configs), 5)
+    self.assertEqual(configs[4]['task'], 'lplot')
+    self.assertEqual(configs[4]['status'], 'failed')
+    self.assertIsNone(configs[4]['Routing'])
+
+  def test_task_log(self):
+    # tasks bypassed without starting have no wall time
+    log = TaskLog()
+    log.task_queued('sim_OB_0')
+    log.task_started('sim_OB_0')
+    log.task_finished('sim_OB_0', 'completed', 10)
+    log.task_finished('parse_OB_0', 'bypassed', None)
+    tasks = log.tasks()
+    self.assertEqual(list(tasks.keys()), ['sim_OB_0', 'parse_OB_0'])
+    self.assertEqual(tasks['sim_OB_0']['status'], 'completed')
+    self.assertGreaterEqual(tasks['sim_OB_0']['wall_s'], 0)
+    self.assertEqual(tasks['sim_OB_0']['output_bytes'], 10)
+    self.assertIsNone(tasks['parse_OB_0']['wall_s'])
+
+if __name__ == '__main__':
+  unittest.main()
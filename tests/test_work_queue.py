@@ -0,0 +1,97 @@
+"""
+Tests of the filesystem work queue with several local worker processes.
+"""
+
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from sssweep.WorkQueue import WorkQueue
+
+class WorkQueueTest(unittest.TestCase):
+
+  def setUp(self):
+    self._dir = tempfile.mkdtemp()
+    self._queue_dir = os.path.join(self._dir, 'queue')
+    self._queue = WorkQueue(self._queue_dir, heartbeat=0.2, timeout=1,
+                            poll=0.1)
+    self._workers = []
+
+  def tearDown(self):
+    for worker in self._workers:
+      if worker.poll() is None:
+        worker.kill()
+      worker.wait()
+    shutil.rmtree(self._dir)
+
+  def _worker(self, cpus=2):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    worker = subprocess.Popen(
+      [sys.executable, '-m', 'sssweep.WorkQueue', self._queue_dir, '-c',
+       str(cpus), '-b', '0.2', '-t', '1'], cwd=root)
+    self._workers.append(worker)
+    return worker
+
+  def _wait_exit(self, worker, timeout=20):
+    deadline = time.time() + timeout
+    while worker.poll() is None and time.time() < deadline:
+      time.sleep(0.1)
+    return worker.poll()
+
+  def _file(self, name):
+    return os.path.join(self._dir, name)
+
+  def test_workers(self):
+    # jobs are spread over the workers and each runs once
+    workers = [self._worker(), self._worker()]
+    keys = []
+    for idx in range(8):
+      keys.append(self._queue.submit(
+        'job{0}'.format(idx),
+        'echo $PPID >> {0} && sleep 0.5 && echo {1}'.format(
+          self._file('runs'), idx), {'cpus': 1}, 0))
+    keys.append(self._queue.submit('fail', 'exit 3', {'cpus': 1}, 0))
+    results = [self._queue.wait(x_key) for x_key in keys]
+    self.assertEqual(results[:8], [(0, '{0}\n'.format(x_idx))
+                                   for x_idx in range(8)])
+    self.assertEqual(results[8][0], 3)
+    with open(self._file('runs'), 'r') as fd_runs:
+      pids = [int(x_line) for x_line in fd_runs.read().split()]
+    self.assertEqual(len(pids), 8)
+    self.assertEqual(set(pids), set([x_worker.pid for x_worker in workers]))
+    self.assertEqual(os.listdir(os.path.join(self._queue_dir, 'claimed')), [])
+    self.assertEqual(os.listdir(os.path.join(self._queue_dir, 'done')), [])
+
+    self._queue.stop()
+    for worker in workers:
+      self.assertEqual(self._wait_exit(worker), 0)
+
+  def test_reclaim(self):
+    # the job of a worker that died is run by another worker
+    first = self._worker()
+    key = self._queue.submit(
+      'job', '[ -f {0} ] && echo again || {{ touch {0}; sleep 5; }}'.format(
+        self._file('started')), {'cpus': 1}, 0)
+    while not os.path.exists(self._file('started')):
+      time.sleep(0.1)
+    first.send_signal(signal.SIGKILL)
+    first.wait()
+    self._worker()
+    self.assertEqual(self._queue.wait(key), (0, 'again\n'))
+
+  def test_stop(self):
+    # a stop request doesn't apply to the workers started after it
+    self._queue.stop()
+    worker = self._worker()
+    key = self._queue.submit('job', 'echo ran', {'cpus': 1}, 0)
+    self.assertEqual(self._queue.wait(key), (0, 'ran\n'))
+    self.assertIsNone(worker.poll())
+    self._queue.stop()
+    self.assertEqual(self._wait_exit(worker), 0)
+
+if __name__ == '__main__':
+  unittest.main()